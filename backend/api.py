@@ -1,16 +1,40 @@
+import asyncio
 import os
-import numpy as np
+import hmac
+import threading
+import time
+from contextlib import asynccontextmanager
 import pandas as pd
-import joblib
 from pathlib import Path
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 
-from backend.utils import prepare_data, create_features, train_models
+from backend.data import load_sales
+from backend.metadata import MetadataIndex
+from backend.cache import PredictionCache, canonical_key
+from backend.metrics import MetricsMiddleware, MetricsRegistry, StageTimer
+from backend.profiling import ProfilingMiddleware, is_profiling, profile_thread
+from backend.batch import BatchFormatError, is_ndjson, parse_batch_body, validate_batch, row_error
+from backend import executor
+from backend.executor import InferenceExecutor
+from backend.registry import ModelRegistry, ModelVersion
+from backend.streaming import PredictionStream, UploadStreamingResponse
+from backend.price_prediction_model.artifacts import (
+    LATEST_FILE, PriceArtifacts, artifacts_from_state, artifacts_lock, build_price_artifacts,
+    latest_version, load_price_artifacts, save_price_artifacts,
+)
+from backend.price_prediction_model.table import PriceForecastTable
+from backend.price_prediction_model.state import PRICE_COLUMNS, append_sales_csv
+from backend.price_prediction_model.forecast import MAX_HORIZON
 
 
-from .models.revenue import RevenuePayload, RevenuePredictionResult
-from .models.discount import DiscountPayload, DiscountPredictionResult
+from .models.revenue import RevenuePayload, RevenuePredictionResult, RevenueBatchResult
+from .models.discount import DiscountPayload, DiscountPredictionResult, DiscountBatchResult
+from .models.price import PricePayload, PriceBatchResult
+from .models.sales import SalesRecord, AppendResult
+from .models.versions import ActivateVersionRequest, LoadVersionRequest
 
 # --- Path and Environment Configuration ---
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
@@ -28,147 +52,825 @@ REVENUE_CATEGORY_PATH = get_absolute_path(os.getenv("REVENUE_CATEGORY_PATH"))
 REVENUE_PLATFORM_PATH = get_absolute_path(os.getenv("REVENUE_PLATFORM_PATH"))
 DISCOUNT_MODEL_PATH = get_absolute_path(os.getenv("DISCOUNT_MODEL_PATH"))
 DATA_PATH = PROJECT_ROOT / os.getenv("DATA_PATH")
+PRICE_ARTIFACTS_DIR = get_absolute_path(os.getenv("PRICE_ARTIFACTS_DIR", "./resources/price"))
+# Pin a specific artifact version instead of the one in PRICE_ARTIFACTS_DIR/LATEST
+PRICE_ARTIFACTS_VERSION = os.getenv("PRICE_ARTIFACTS_VERSION") or None
+# Years ("first-last") whose price forecasts are precomputed for every product
+# when the price models load, and the memory the table may use; empty disables it
+PRICE_TABLE_YEARS = os.getenv("PRICE_TABLE_YEARS", "2023-2100")
+PRICE_TABLE_MAX_MB = float(os.getenv("PRICE_TABLE_MAX_MB", "64"))
 
 # The endpoint is a string, not a file path
 REVENUE_PREDICTION_ENDPOINT = os.getenv("REVENUE_PREDICTION_ENDPOINT")
 DISCOUNT_PREDICTION_ENDPOINT = os.getenv("DISCOUNT_PREDICTION_ENDPOINT")
 PRICE_PREDICTION_ENDPOINT = os.getenv("PRICE_PREDICTION_ENDPOINT")
 
-# Load the pre-trained model and scaler
+# Upper bound on the number of rows accepted by the batch endpoints
+BATCH_MAX_ROWS = int(os.getenv("BATCH_MAX_ROWS", "100000"))
+# Streaming endpoints: rows scored per chunk, chunks read but not yet written
+# back, and bytes of unsent response kept in memory before spilling to disk
+STREAM_CHUNK_ROWS = int(os.getenv("STREAM_CHUNK_ROWS", "1000"))
+STREAM_MAX_IN_FLIGHT = int(os.getenv("STREAM_MAX_IN_FLIGHT", "4"))
+STREAM_SPOOL_BYTES = int(os.getenv("STREAM_SPOOL_BYTES", str(1 << 20)))
+
+# Admin endpoints (e.g. /data/append) require it in the X-Admin-Token header;
+# without it they are disabled
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN") or None
+# Model versions can only be loaded from files inside this directory
+MODELS_DIR = get_absolute_path(os.getenv("MODELS_DIR", "./resources"))
+# Versions loaded and activated through /models, shared by the server's worker
+# processes and kept across restarts (empty keeps them in each process only)
+MODEL_REGISTRY_PATH = os.getenv("MODEL_REGISTRY_PATH", "./resources/model_registry.json")
+
+# Score the discount model from flat arrays instead of the sklearn pipeline
+DISCOUNT_COMPILED = os.getenv("DISCOUNT_COMPILED", "true").lower() in ("1", "true", "yes")
+# Score revenue with the scaler folded into the linear model's weights
+REVENUE_COMPILED = os.getenv("REVENUE_COMPILED", "true").lower() in ("1", "true", "yes")
+
+# Names of the model versions loaded from the paths above. Revenue defaults to
+# the model file name without 'model_' (model_ridge.joblib -> ridge)
+REVENUE_MODEL_VERSION = os.getenv("REVENUE_MODEL_VERSION") or REVENUE_MODEL_PATH.stem.removeprefix("model_")
+DISCOUNT_MODEL_VERSION = os.getenv("DISCOUNT_MODEL_VERSION", "v1")
+
+# Shared cache of single predictions (PREDICTION_CACHE_SIZE=0 disables it)
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "4096"))
+PREDICTION_CACHE_TTL = float(os.getenv("PREDICTION_CACHE_TTL", "300"))
+prediction_cache = PredictionCache(PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL)
+
+# Opt-in cProfile of single requests (X-Profile header or ?profile=, with the
+# admin token) and of a random fraction of all requests
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR = get_absolute_path(os.getenv("PROFILE_DIR", "./resources/profiles"))
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "50"))
+
+# Prometheus metrics on /metrics, request middleware and per-stage timers
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+metrics = MetricsRegistry(enabled=METRICS_ENABLED)
+stage_duration = metrics.histogram(
+    "prediction_stage_duration_seconds", "Time spent in each stage of a prediction request.", ("model", "stage")
+)
+startup_duration = metrics.gauge(
+    "startup_duration_seconds", "Duration of the model loading and training steps.", ("stage",)
+)
+
+
+def observe_stages(model: str, stages: list):
+    if metrics.enabled:
+        for stage, seconds in stages:
+            stage_duration.labels(model, stage).observe(seconds)
+
+
+async def resolve_version(task: str, request: Request, response: Response | None = None) -> ModelVersion:
+    """
+    The model version a request asked for with ?model_version= or the
+    X-Model-Version header, or the active one. The name is echoed in the
+    X-Model-Version response header. Versions that another worker published
+    in the registry manifest are loaded here first.
+    """
+    name = request.query_params.get("model_version") or request.headers.get("x-model-version")
+    registry.sync(warm_version)
+    if name is not None:
+        await registry.wait_loaded(task, name)
+    try:
+        version = registry.get(task, name)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown {task} model version '{name}'.")
+    if response is not None:
+        response.headers["X-Model-Version"] = version.name
+    return version
+
+
+def cached_prediction(key: str):
+    """Cache lookup of the single-prediction endpoints; profiled requests always score."""
+    return None if is_profiling() else prediction_cache.get(key)
+
+
+def request_timer(request: Request) -> StageTimer:
+    """
+    Starts the stage timer of a handler. With the metrics middleware, the time
+    before the handler runs (body parsing and Pydantic validation) is the
+    first stage.
+    """
+    start = request.scope.get("state", {}).get("request_start")
+    timer = StageTimer(start)
+    if start is not None:
+        timer.mark("parse_validate")
+    return timer
+
+
+# Revenue and discount scoring: number of worker processes (0 = threads in this
+# process) and the micro-batching window for concurrent single-row requests
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "0"))
+MICROBATCH_MAX_SIZE = int(os.getenv("MICROBATCH_MAX_SIZE", "64"))
+MICROBATCH_WAIT_MS = float(os.getenv("MICROBATCH_WAIT_MS", "2"))
+
+# Sample rows used to warm a model version before it serves requests
+WARMUP_ROWS = {
+    "revenue": RevenuePayload(Price=30, Day=15).model_dump(),
+    "discount": DiscountPayload(
+        product_name="Whey Protein", category="Protein", price=30, units_sold=150, location="USA", platform="Amazon"
+    ).model_dump(),
+}
+
+
+def revenue_model_version(name: str, model_path: Path) -> ModelVersion:
+    """A revenue version: its own model file with the shared scaler and encodings."""
+    return ModelVersion.create("revenue", name, {
+        "revenue_model": model_path,
+        "revenue_scaler": REVENUE_SCALER_PATH,
+        "revenue_category": REVENUE_CATEGORY_PATH,
+        "revenue_location": REVENUE_LOCATION_PATH,
+        "revenue_platform": REVENUE_PLATFORM_PATH,
+    }, REVENUE_COMPILED)
+
+
+def discount_model_version(name: str, model_path: Path) -> ModelVersion:
+    # The discount model includes its own categorical mapping
+    return ModelVersion.create("discount", name, {"discount_model": model_path}, DISCOUNT_COMPILED)
+
+
+MODEL_VERSION_FACTORIES = {"revenue": revenue_model_version, "discount": discount_model_version}
+
+# Register the pre-trained models. Their files are only checked here; they are
+# loaded on first use, or ahead of it by the start-up warm-up (STARTUP_WARMUP)
 try:
-    revenue_model = joblib.load(REVENUE_MODEL_PATH)
-    revenue_scaler = joblib.load(REVENUE_SCALER_PATH)
-    revenue_category_dict = joblib.load(REVENUE_CATEGORY_PATH)
-    revenue_platform_dict = joblib.load(REVENUE_PLATFORM_PATH)
-    revenue_location_dict = joblib.load(REVENUE_LOCATION_PATH)
-
-    # Now we only load the discount model, which includes the internal mapping
-    discount_model = joblib.load(DISCOUNT_MODEL_PATH)
-    products_df = pd.read_csv(DATA_PATH)
+    registry = ModelRegistry(get_absolute_path(MODEL_REGISTRY_PATH) if MODEL_REGISTRY_PATH else None)
+    initial_versions = [
+        revenue_model_version(REVENUE_MODEL_VERSION, REVENUE_MODEL_PATH),
+        discount_model_version(DISCOUNT_MODEL_VERSION, DISCOUNT_MODEL_PATH),
+    ]
+    for version in initial_versions:
+        registry.add(version, activate=True)
+
+    inference = InferenceExecutor(
+        initial_versions, INFERENCE_WORKERS,
+        max_batch_size=MICROBATCH_MAX_SIZE, max_wait=MICROBATCH_WAIT_MS / 1000,
+        on_stages=lambda task, stages: observe_stages(task, [(f"model_{stage}", s) for stage, s in stages]),
+    )
+
+    # Product metadata is built on first use and only rebuilt if DATA_PATH changes
+    metadata_index = MetadataIndex(DATA_PATH)
 except FileNotFoundError as e:
     raise RuntimeError(f"Model or scaler not found. Details: {e}")
 
+
+def record_load_stages(version: ModelVersion, stages: list):
+    """Start-up metrics of the active versions, whenever this process loads them."""
+    if registry.get(version.task).name == version.name:
+        for stage, seconds in stages:
+            startup_duration.labels(stage).set(seconds)
+
+
+executor.on_load = record_load_stages
+
+
+# --- Start-up ---
+# 'background' loads the models and the metadata after the server starts and
+# reports progress on /ready; 'blocking' loads them before it accepts
+# requests; 'off' leaves everything to the first request that needs it.
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "background").lower()
+WARMUP_COMPONENTS = ("revenue", "discount", "price", "metadata")
+warmup_status = {}  # component -> dict with state, seconds and error
+
+
+async def warm_version(version: ModelVersion):
+    """Loads `version` where it will be scored and checks that a sample row scores."""
+    value = (await inference.run(version.task, [WARMUP_ROWS[version.task]], version))[0]
+    if value != value:
+        raise ValueError(f"{version.task} model '{version.name}' predicted NaN for the warm-up row.")
+
+
+def load_component(component: str):
+    """Loads one of WARMUP_COMPONENTS in this process, if it is not loaded yet."""
+    if component in ("revenue", "discount"):
+        executor.model_artifacts(registry.get(component))
+    elif component == "price":
+        get_price_artifacts()
+    elif component == "metadata":
+        start = time.perf_counter()
+        metadata_index.get()
+        startup_duration.labels("metadata").set(time.perf_counter() - start)
+    else:
+        raise ValueError(f"Unknown component: {component}")
+
+
+def is_component_loaded(component: str) -> bool:
+    if component in ("revenue", "discount"):
+        if INFERENCE_WORKERS:
+            # Loaded by the worker processes, known once the warm-up scored a row there
+            return warmup_status.get(component, {}).get("state") == "ready"
+        return executor.is_loaded(registry.get(component))
+    if component == "price":
+        return _price_artifacts is not None
+    return metadata_index.is_loaded
+
+
+async def warm_up():
+    """
+    Loads the models and the metadata one at a time, off the event loop.
+    A failure is kept in `warmup_status`; the component is then loaded on
+    first use, where the error reaches the request.
+    """
+    for component in WARMUP_COMPONENTS:
+        warmup_status[component] = {"state": "loading"}
+        start = time.perf_counter()
+        try:
+            if component in ("revenue", "discount") and INFERENCE_WORKERS:
+                await warm_version(registry.get(component))
+            else:
+                await run_in_threadpool(load_component, component)
+        except Exception as e:
+            warmup_status[component] = {"state": "failed", "error": str(e)}
+        else:
+            warmup_status[component] = {"state": "ready", "seconds": round(time.perf_counter() - start, 4)}
+
+
+async def load_sibling_revenue_models():
+    """Loads the other model_*.joblib files next to the revenue model (lasso, elastic) in the background."""
+    for path in sorted(REVENUE_MODEL_PATH.parent.glob("model_*.joblib")):
+        name = path.stem.removeprefix("model_")
+        if path != REVENUE_MODEL_PATH and name != REVENUE_MODEL_VERSION:
+            registry.load_in_background(revenue_model_version(name, path), warm_version)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    warmup = None
+    if STARTUP_WARMUP == "blocking":
+        await warm_up()
+    elif STARTUP_WARMUP == "background":
+        warmup = asyncio.ensure_future(warm_up())
+    await load_sibling_revenue_models()
+    try:
+        yield
+    finally:
+        if warmup is not None:
+            warmup.cancel()
+        inference.shutdown()
+
+
 # --- FastAPI ---
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(
+    ProfilingMiddleware, admin_token=ADMIN_TOKEN, directory=PROFILE_DIR,
+    keep=PROFILE_KEEP, sample_rate=PROFILE_SAMPLE_RATE,
+)
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware, registry=metrics)
+
+
+def collect_runtime_metrics():
+    """Values kept by the cache and the inference executor, read at scrape time."""
+    cache = prediction_cache.stats()
+    yield "prediction_cache_hits_total", "counter", "Prediction cache hits.", [({}, cache["hits"])]
+    yield "prediction_cache_misses_total", "counter", "Prediction cache misses.", [({}, cache["misses"])]
+    yield "prediction_cache_hit_ratio", "gauge", "Hits over lookups since start.", [({}, cache["hit_ratio"])]
+    yield "prediction_cache_entries", "gauge", "Entries in the prediction cache.", [({}, cache["size"])]
+    table = _price_artifacts.table if _price_artifacts is not None else None
+    if table is not None:
+        yield "price_table_hits_total", "counter", "Price targets answered from the forecast table.", [({}, table.hits)]
+        yield "price_table_misses_total", "counter", "Price targets scored live, outside the table.", [({}, table.misses)]
+        yield "price_table_bytes", "gauge", "Memory used by the price forecast table.", [({}, table.nbytes)]
+    yield (
+        "inference_queue_depth", "histogram", "Pending rows seen by each micro-batched request.",
+        [({"model": task}, batcher.queue_depth) for task, batcher in inference.batchers.items()],
+    )
+    yield (
+        "inference_batch_size", "histogram", "Rows per micro-batched model call.",
+        [({"model": task}, batcher.batch_size) for task, batcher in inference.batchers.items()],
+    )
+
+
+metrics.add_collector(collect_runtime_metrics)
+
+
+@app.get("/metrics")
+def get_metrics():
+    if not metrics.enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled.")
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+# Which models are loaded; 503 until all of them are
+@app.get("/ready")
+def get_readiness(response: Response):
+    components = {
+        component: {"loaded": is_component_loaded(component), **warmup_status.get(component, {})}
+        for component in WARMUP_COMPONENTS
+    }
+    ready = all(component["loaded"] for component in components.values())
+    if not ready:
+        response.status_code = 503
+    return {"ready": ready, "warmup": STARTUP_WARMUP, "components": components}
+
 
 # Endpoint for product metadata
 @app.get("/metadata")
-def get_metadata():
-    if products_df.empty:
+@profile_thread
+def get_metadata(request: Request):
+    try:
+        snapshot = metadata_index.get()
+    except (OSError, ValueError):
         raise HTTPException(
             status_code=500, detail="Could not load the products DataFrame."
         )
 
-    product_list = products_df["Product_Name"].unique().tolist()
-    product_info = {
-        name: {
-            "category": products_df[products_df["Product_Name"] == name]["Category"]
-            .mode()
-            .iloc[0],
-            "avg_price": products_df[products_df["Product_Name"] == name][
-                "Price"
-            ].mean(),
-            "avg_units_sold": products_df[products_df["Product_Name"] == name][
-                "Units_Sold"
-            ].mean(),
-        }
-        for name in product_list
+    headers = {
+        "ETag": snapshot.etag,
+        "Last-Modified": snapshot.last_modified,
+        "Cache-Control": "no-cache",
     }
+    if snapshot.not_modified(request.headers):
+        return Response(status_code=304, headers=headers)
 
-    return {
-        "products": product_list,
-        "product_info": product_info,
-        "categories": sorted(products_df["Category"].unique().tolist()),
-        "locations": sorted(products_df["Location"].unique().tolist()),
-        "platforms": sorted(products_df["Platform"].unique().tolist()),
-    }
+    return Response(content=snapshot.body, media_type="application/json", headers=headers)
+
+
+# Hit/miss counters of the prediction cache
+@app.get("/cache/stats")
+def get_cache_stats():
+    return prediction_cache.stats()
+
+
+# Queue depth and batch size histograms of the inference micro-batchers
+@app.get("/inference/stats")
+def get_inference_stats():
+    return inference.stats()
 
 
 # Create the prediction endpoint for Revenue
 @app.post(REVENUE_PREDICTION_ENDPOINT, response_model=RevenuePredictionResult)
-def predict_revenue(data: RevenuePayload):
+async def predict_revenue(data: RevenuePayload, request: Request, response: Response):
     """
     Predicts revenue based on Price and Day.
+    Unseen categories are encoded with the value for 'Unknown'.
     """
-    # Get the encoded value for each categorical feature.
-    # If the key is not found, default to the value for 'Unknown'.
-    # This prevents NaN values if an unseen category is provided.
-    unknown_category_val = revenue_category_dict.get('Unknown')
-    unknown_platform_val = revenue_platform_dict.get('Unknown')
-    unknown_location_val = revenue_location_dict.get('Unknown')
+    timer = request_timer(request)
+    version = await resolve_version("revenue", request, response)
+    key = canonical_key("revenue", version.cache_version, data)
+    cached = cached_prediction(key)
+    timer.mark("cache")
+    if cached is not None:
+        observe_stages("revenue", timer.stages)
+        return cached
 
-    category_by_price = revenue_category_dict.get(data.Category, unknown_category_val)
-    platform_by_price = revenue_platform_dict.get(data.Platform, unknown_platform_val)
-    location_by_price = revenue_location_dict.get(data.Location, unknown_location_val)
-
-    input_df = pd.DataFrame(
-        [[data.Price, category_by_price, location_by_price, platform_by_price, data.Day]],
-        columns=["Price", "Category_By_Price", "Location_By_Price", "Platform_By_Price", "Day"]
-    )
-
-    scaled_input = revenue_scaler.transform(input_df)
-    prediction = revenue_model.predict(scaled_input)
-    return {"predicted_revenue": prediction[0]}
+    prediction = await inference.predict_one("revenue", data.model_dump(), version)
+    timer.mark("inference")
+    result = {"predicted_revenue": prediction}
+    prediction_cache.set(key, result)
+    observe_stages("revenue", timer.stages)
+    return result
 
 # Endpoint for discount prediction
 @app.post(DISCOUNT_PREDICTION_ENDPOINT, response_model=DiscountPredictionResult)
-def predict_discount(payload: DiscountPayload):
-    try:
-        data = pd.DataFrame([payload.model_dump()])
+async def predict_discount(payload: DiscountPayload, request: Request, response: Response):
+    timer = request_timer(request)
+    version = await resolve_version("discount", request, response)
+    key = canonical_key("discount", version.cache_version, payload)
+    cached = cached_prediction(key)
+    timer.mark("cache")
+    if cached is not None:
+        observe_stages("discount", timer.stages)
+        return cached
 
+    try:
         # The discount model pipeline handles categorical variables internally
-        prediction = discount_model.predict(data)[0]
+        prediction = await inference.predict_one("discount", payload.model_dump(), version)
+        timer.mark("inference")
 
-        return {"predicted_discount": prediction}
+        result = {"predicted_discount": prediction}
+        prediction_cache.set(key, result)
+        observe_stages("discount", timer.stages)
+        return result
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    
+
+
+# --- Batch prediction endpoints ---
+# They accept a JSON array or an NDJSON body (Content-Type: application/x-ndjson).
+# Invalid rows are reported in "errors" and the remaining rows are still scored.
+async def read_batch(request: Request, payload_model, timer: StageTimer | None = None):
+    body = await request.body()
+    try:
+        rows = parse_batch_body(body, request.headers.get("content-type"))
+    except BatchFormatError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if timer is not None:
+        timer.mark("read_parse")
+
+    if len(rows) > BATCH_MAX_ROWS:
+        raise HTTPException(
+            status_code=413, detail=f"Batch too large: {len(rows)} rows (max {BATCH_MAX_ROWS})."
+        )
+    result = validate_batch(rows, payload_model)
+    if timer is not None:
+        timer.mark("validate")
+    return result
+
+
+@app.post(f"{REVENUE_PREDICTION_ENDPOINT}/batch", response_model=RevenueBatchResult)
+async def predict_revenue_batch(request: Request, response: Response):
+    timer = request_timer(request)
+    version = await resolve_version("revenue", request, response)
+    indices, payloads, errors = await read_batch(request, RevenuePayload, timer)
+    predictions = []
+
+    if payloads:
+        values = await inference.run("revenue", [payload.model_dump() for payload in payloads], version)
+        timer.mark("inference")
+        predictions = [
+            {"index": index, "predicted_revenue": value}
+            for index, value in zip(indices, values)
+        ]
+
+    observe_stages("revenue_batch", timer.stages)
+    return {"predictions": predictions, "errors": errors}
+
+
+@app.post(f"{DISCOUNT_PREDICTION_ENDPOINT}/batch", response_model=DiscountBatchResult)
+async def predict_discount_batch(request: Request, response: Response):
+    timer = request_timer(request)
+    version = await resolve_version("discount", request, response)
+    indices, payloads, errors = await read_batch(request, DiscountPayload, timer)
+    predictions = []
+
+    if payloads:
+        values = await inference.run("discount", [payload.model_dump() for payload in payloads], version)
+        timer.mark("inference")
+        predictions = [
+            {"index": index, "predicted_discount": value}
+            for index, value in zip(indices, values)
+        ]
+
+    observe_stages("discount_batch", timer.stages)
+    return {"predictions": predictions, "errors": errors}
+
+
+@app.post(f"{PRICE_PREDICTION_ENDPOINT}/batch", response_model=PriceBatchResult)
+async def predict_price_batch(request: Request):
+    timer = request_timer(request)
+    indices, payloads, errors = await read_batch(request, PricePayload, timer)
+    predictions, price_errors = await run_in_threadpool(score_prices, indices, payloads)
+    timer.mark("predict")
+    observe_stages("price_batch", timer.stages)
+
+    return {
+        "predictions": predictions,
+        "errors": sorted(errors + price_errors, key=lambda error: error["index"]),
+    }
+
+
+# --- Streaming prediction endpoints ---
+# They read an NDJSON upload chunk by chunk and answer with NDJSON lines as
+# each chunk is scored (see backend/streaming.py), so neither side holds the
+# whole batch. There is no BATCH_MAX_ROWS limit.
+async def stream_predictions(request: Request, task: str, payload_model, score_chunk) -> StreamingResponse:
+    if not is_ndjson(request.headers.get("content-type")):
+        raise HTTPException(status_code=415, detail="Send the rows as NDJSON (Content-Type: application/x-ndjson).")
+    timer = request_timer(request)
+
+    async def body():
+        async for data in stream.lines():
+            yield data
+        observe_stages(f"{task}_stream", timer.stages)
+
+    stream = PredictionStream(
+        request.stream(), payload_model, score_chunk, STREAM_CHUNK_ROWS, STREAM_MAX_IN_FLIGHT,
+        STREAM_SPOOL_BYTES, on_chunk=lambda: timer.mark("chunk"),
+    )
+    return UploadStreamingResponse(body(), media_type="application/x-ndjson")
+
+
+def versioned_scorer(task: str, version: ModelVersion, key: str):
+    async def score_chunk(indices: list[int], payloads: list):
+        values = await inference.run(task, [payload.model_dump() for payload in payloads], version)
+        return [{"index": index, key: value} for index, value in zip(indices, values)], []
+    return score_chunk
+
+
+@app.post(f"{REVENUE_PREDICTION_ENDPOINT}/stream")
+async def predict_revenue_stream(request: Request):
+    version = await resolve_version("revenue", request)
+    streaming = await stream_predictions(
+        request, "revenue", RevenuePayload, versioned_scorer("revenue", version, "predicted_revenue")
+    )
+    streaming.headers["X-Model-Version"] = version.name
+    return streaming
+
+
+@app.post(f"{DISCOUNT_PREDICTION_ENDPOINT}/stream")
+async def predict_discount_stream(request: Request):
+    version = await resolve_version("discount", request)
+    streaming = await stream_predictions(
+        request, "discount", DiscountPayload, versioned_scorer("discount", version, "predicted_discount")
+    )
+    streaming.headers["X-Model-Version"] = version.name
+    return streaming
+
+
+@app.post(f"{PRICE_PREDICTION_ENDPOINT}/stream")
+async def predict_price_stream(request: Request):
+    async def score_chunk(indices: list[int], payloads: list):
+        return await run_in_threadpool(score_prices, indices, payloads)
+    return await stream_predictions(request, "price", PricePayload, score_chunk)
+
 
 # --- Modelo Bunty ---
-# Cargar dataset de suplementos
-#DATA_PATH = PROJECT_ROOT / "resources" / "data" / "Supplement_Sales_Weekly_Expanded.csv"
-df = pd.read_csv(DATA_PATH)
+# The per-product price models are built offline by
+# backend/price_prediction_model/generate_models.py and loaded (memory-mapped)
+# the first time a price endpoint is called. Without a built artifact they are
+# trained from DATA_PATH instead. /data/append in any worker saves a new
+# version; the others reload it when PRICE_ARTIFACTS_DIR/LATEST changes.
+_price_artifacts = None
+_price_latest_stamp = None  # stamp of LATEST when _price_artifacts was loaded
+_price_lock = threading.Lock()
 
-# Preparar datos y entrenar modelos
-df_prepared = prepare_data(df)
-df_features = create_features(df_prepared)
-models = train_models(df_features)
+
+def price_latest_stamp() -> tuple | None:
+    """Modification time and inode of PRICE_ARTIFACTS_DIR/LATEST (replaced on every save), one stat."""
+    try:
+        stat = os.stat(PRICE_ARTIFACTS_DIR / LATEST_FILE)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_ino
+
+
+def is_price_stale(artifacts: PriceArtifacts, stamp: tuple | None) -> bool:
+    """Whether LATEST moved to another version than `artifacts` since they were loaded."""
+    if PRICE_ARTIFACTS_VERSION or stamp is None or stamp == _price_latest_stamp:
+        return False
+    return latest_version(PRICE_ARTIFACTS_DIR) != artifacts.version
+
+
+def load_price_models(with_training: bool = False) -> PriceArtifacts:
+    start = time.perf_counter()
+    if PRICE_ARTIFACTS_VERSION or latest_version(PRICE_ARTIFACTS_DIR):
+        artifacts = load_price_artifacts(PRICE_ARTIFACTS_DIR, PRICE_ARTIFACTS_VERSION, with_training=with_training)
+        startup_duration.labels("price_load").set(time.perf_counter() - start)
+    else:
+        artifacts = build_price_artifacts(load_sales(DATA_PATH, columns=PRICE_COLUMNS))
+        startup_duration.labels("price_train").set(time.perf_counter() - start)
+    return artifacts
+
+
+def with_forecast_table(artifacts: PriceArtifacts) -> PriceArtifacts:
+    """Attaches the PRICE_TABLE_YEARS forecast table to `artifacts`, if enabled."""
+    if not PRICE_TABLE_YEARS:
+        return artifacts
+    start = time.perf_counter()
+    first_year, _, last_year = PRICE_TABLE_YEARS.partition("-")
+    artifacts.table = PriceForecastTable.build(
+        artifacts, int(first_year), int(last_year or first_year), max_bytes=int(PRICE_TABLE_MAX_MB * 2 ** 20)
+    )
+    startup_duration.labels("price_table").set(time.perf_counter() - start)
+    return artifacts
+
+
+def get_price_artifacts() -> PriceArtifacts:
+    """The loaded price models, reloaded if another worker saved a newer version."""
+    global _price_artifacts, _price_latest_stamp
+    current, stamp = _price_artifacts, price_latest_stamp()
+    if current is not None and (stamp == _price_latest_stamp or not is_price_stale(current, stamp)):
+        _price_latest_stamp = stamp
+        return current
+    with _price_lock:
+        stamp = price_latest_stamp()
+        if _price_artifacts is None or is_price_stale(_price_artifacts, stamp):
+            stale = _price_artifacts is not None
+            _price_artifacts = with_forecast_table(load_price_models())
+            if stale:
+                prediction_cache.invalidate("price")
+        _price_latest_stamp = stamp
+    return _price_artifacts
+
+
+def preload():
+    """
+    Loads everything that is otherwise loaded on first use, so a gunicorn
+    master can do it once before forking its workers.
+    """
+    for component in WARMUP_COMPONENTS:
+        if component not in ("revenue", "discount") or not INFERENCE_WORKERS:
+            load_component(component)
+
+
+@profile_thread
+def score_prices(indices: list[int], payloads: list[PricePayload]):
+    """
+    Scores price requests grouped by product, with one matrix product per product.
+    """
+    price = get_price_artifacts()
+    rows_by_product = {}
+    for index, payload in zip(indices, payloads):
+        rows_by_product.setdefault(payload.product, []).append((index, payload))
+
+    predictions, errors = [], []
+    for product, rows in rows_by_product.items():
+        if product not in price.store:
+            errors.extend(row_error(index, "product_not_found", "Producto no encontrado") for index, _ in rows)
+            continue
+
+        years = [payload.year for _, payload in rows]
+        months = [payload.month for _, payload in rows]
+        values = price.predict(product, years, months)
+
+        predictions.extend(
+            {
+                "index": index,
+                "product": product,
+                "year": payload.year,
+                "month": payload.month,
+                "predicted_price": round(float(value), 2),
+            }
+            for (index, payload), value in zip(rows, values)
+        )
+
+    predictions.sort(key=lambda prediction: prediction["index"])
+    return predictions, errors
 
 @app.get("/products")
+@profile_thread
 def get_products():
-    products = df_prepared["Product_Name"].unique().tolist()
-    return {"products": products}
+    return {"products": get_price_artifacts().catalog}
 
 
 @app.get(PRICE_PREDICTION_ENDPOINT)
-def predict(product: str, year: int, month: int):
-    if product not in models:
+@profile_thread
+def predict(product: str, year: int, month: int, request: Request):
+    timer = request_timer(request)
+    price = get_price_artifacts()
+    # Targets in the forecast table are a lookup, cheaper than the cache
+    in_table = price.table is not None and price.table.covers(year, month)
+    key = canonical_key("price", price.version, {"product": product, "year": year, "month": month})
+    cached = None if in_table else cached_prediction(key)
+    timer.mark("cache")
+    if cached is not None:
+        observe_stages("price", timer.stages)
+        return cached
+
+    if product not in price.store:
         return {"error": "Producto no encontrado"}
-    
-    model = models[product]
-
-    features = {
-        "Year": year,
-        "Month": month,
-        "Month_sin": np.sin(2 * np.pi * month / 12),
-        "Month_cos": np.cos(2 * np.pi * month / 12),
-        "Years_From_Start": year - df_prepared['Year'].min(),
-        "Time_Index": (year - df_prepared['Year'].min()) * 12 + month,
-        "Time_Index_Squared": ((year - df_prepared['Year'].min()) * 12 + month) ** 2,
-        "Price_Lag_1": df_features[df_features['Product_Name'] == product]['Price_Avg'].iloc[-1],
-        "Price_Lag_3": df_features[df_features['Product_Name'] == product]['Price_Avg'].iloc[-3],
-        "Price_Lag_12": df_features[df_features['Product_Name'] == product]['Price_Avg'].iloc[-12],
-        "Price_MA_6": df_features[df_features['Product_Name'] == product]['Price_Avg'].rolling(6).mean().iloc[-1],
-        "Price_MA_12": df_features[df_features['Product_Name'] == product]['Price_Avg'].rolling(12).mean().iloc[-1],
-    }
 
-    X_new = pd.DataFrame([features])
-    pred = model.predict(X_new)[0]
+    if in_table:
+        pred = price.table.value(price.store.index[product], year, month)
+    else:
+        pred = price.predict(product, [year], [month])[0]
+    timer.mark("predict")
+    observe_stages("price", timer.stages)
 
-    return {
+    result = {
         "product": product,
         "year": year,
         "month": month,
         "predicted_price": round(float(pred), 2)
-    }
\ No newline at end of file
+    }
+    if not in_table:
+        prediction_cache.set(key, result)
+    return result
+
+
+@app.get(f"{PRICE_PREDICTION_ENDPOINT}/horizon")
+@profile_thread
+def predict_horizon(product: str, year: int, month: int):
+    """
+    Forecasts every month from the last observed month up to (year, month),
+    feeding each prediction back into the lag and moving-average features.
+    """
+    price = get_price_artifacts()
+    if product not in price.store:
+        return {"error": "Producto no encontrado"}
+
+    horizon = price.forecaster.horizon(product, year, month)
+    if horizon < 1:
+        return {"error": "La fecha debe ser posterior al último mes observado"}
+    if horizon > MAX_HORIZON:
+        return {"error": f"El horizonte máximo es de {MAX_HORIZON} meses"}
+
+    years, months, prices = price.forecaster.trajectory(product, horizon)
+    last_year, last_month = price.store.last_period[price.store.index[product]]
+
+    return {
+        "product": product,
+        "last_observed": {
+            "year": int(last_year),
+            "month": int(last_month),
+            "price": round(float(price.store.history(product)[-1]), 2),
+        },
+        "trajectory": [
+            {"year": int(y), "month": int(m), "predicted_price": round(float(p), 2)}
+            for y, m, p in zip(years, months, prices)
+        ],
+    }
+
+
+def require_admin(request: Request):
+    if ADMIN_TOKEN is None:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled: set ADMIN_TOKEN.")
+    # Header values are latin-1 decoded; compare the raw bytes, which also works for non-ASCII values
+    if not hmac.compare_digest(request.headers.get("x-admin-token", "").encode("latin-1"), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token.")
+
+
+@profile_thread
+def append_price_data(new_rows: pd.DataFrame) -> dict:
+    """
+    Updates the price models with new sales rows, saves them as a new version
+    in PRICE_ARTIFACTS_DIR and swaps them into the app. Requests keep using
+    the previous models until the new ones are complete.
+
+    The directory's file lock makes appends from different workers run one
+    after another, each on top of the version the previous one saved. The
+    rows are removed from DATA_PATH again if the new version cannot be saved,
+    so a retry does not duplicate them.
+    """
+    global _price_artifacts, _price_latest_stamp
+    with _price_lock, artifacts_lock(PRICE_ARTIFACTS_DIR):
+        current = _price_artifacts
+        if current is None or current.training is None or is_price_stale(current, price_latest_stamp()):
+            current = load_price_models(with_training=True)
+
+        state, affected = current.training.append(new_rows)
+        size = append_sales_csv(new_rows, DATA_PATH)
+        try:
+            version = save_price_artifacts(artifacts_from_state(state, "pending"), PRICE_ARTIFACTS_DIR, source=DATA_PATH)
+        except BaseException:
+            os.truncate(DATA_PATH, size)
+            raise
+
+        refreshed = artifacts_from_state(state, version=version)
+        _price_artifacts = with_forecast_table(refreshed)
+        _price_latest_stamp = price_latest_stamp()
+        prediction_cache.invalidate("price")
+
+    return {"appended": len(new_rows), "affected_products": affected, "version": refreshed.version}
+
+
+@app.post("/data/append", response_model=AppendResult)
+async def append_data(request: Request):
+    """
+    Appends new weekly sales rows (JSON array or NDJSON) to the dataset and
+    updates the price models incrementally, without restarting the app.
+    The whole request is rejected if any row is invalid.
+    """
+    require_admin(request)
+    if PRICE_ARTIFACTS_VERSION:
+        # Other workers would keep serving the pinned version
+        raise HTTPException(
+            status_code=409, detail="The price models are pinned by PRICE_ARTIFACTS_VERSION; unset it to append data."
+        )
+    _, payloads, errors = await read_batch(request, SalesRecord)
+    if errors:
+        raise HTTPException(status_code=422, detail=errors)
+    if not payloads:
+        raise HTTPException(status_code=422, detail="No rows to append.")
+
+    new_rows = pd.DataFrame([payload.model_dump() for payload in payloads])
+    try:
+        return await run_in_threadpool(append_price_data, new_rows)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+# --- Model versions ---
+# Named versions of the revenue and discount models. New versions are loaded
+# and warmed in the background and can be requested per request with
+# ?model_version=<name> (or X-Model-Version) before they are activated.
+@app.get("/models")
+async def get_model_versions():
+    # Each worker has its own registry, synced from the manifest; pid tells which one answered
+    registry.sync(warm_version)
+    return {"pid": os.getpid(), **registry.describe()}
+
+
+@app.post("/models/{task}/versions", status_code=202)
+async def load_model_version(task: str, body: LoadVersionRequest, request: Request):
+    require_admin(request)
+    if task not in MODEL_VERSION_FACTORIES:
+        raise HTTPException(status_code=404, detail=f"Unknown model '{task}'.")
+    if registry.is_loading(task, body.name):
+        raise HTTPException(status_code=409, detail=f"{task} model '{body.name}' is already loading.")
+    path = get_absolute_path(body.path).resolve()
+    if not path.is_relative_to(MODELS_DIR.resolve()):
+        raise HTTPException(status_code=422, detail=f"Model files must be inside {MODELS_DIR}.")
+    try:
+        version = MODEL_VERSION_FACTORIES[task](body.name, path)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=422, detail=f"Model file not found: {e.filename}")
+
+    registry.load_in_background(version, warm_version, activate=body.activate, publish=True)
+    return registry.describe()[task]
+
+
+@app.put("/models/{task}/active")
+async def activate_model_version(task: str, body: ActivateVersionRequest, request: Request):
+    require_admin(request)
+    if task not in MODEL_VERSION_FACTORIES:
+        raise HTTPException(status_code=404, detail=f"Unknown model '{task}'.")
+    registry.sync(warm_version)
+    await registry.wait_loaded(task, body.name)
+    try:
+        registry.activate(task, body.name)
+    except KeyError:
+        raise HTTPException(status_code=409, detail=f"{task} model '{body.name}' is not loaded.")
+    return registry.describe()[task]
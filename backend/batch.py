@@ -0,0 +1,94 @@
+import json
+
+from pydantic import BaseModel, ValidationError
+
+NDJSON_MEDIA_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl"}
+
+
+class BatchFormatError(ValueError):
+    """Raised when a batch body cannot be split into rows at all."""
+
+
+def is_ndjson(content_type: str | None) -> bool:
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    return media_type in NDJSON_MEDIA_TYPES
+
+
+def parse_batch_body(body: bytes, content_type: str | None) -> list:
+    """
+    Splits a batch request body into its rows.
+
+    JSON bodies must be an array of objects. NDJSON bodies hold one object per
+    line; a malformed line is kept as a `json.JSONDecodeError` so it can be
+    reported for that row without rejecting the rest of the batch.
+    """
+    if is_ndjson(content_type):
+        return [parse_ndjson_line(line) for line in body.splitlines() if line.strip()]
+
+    try:
+        rows = json.loads(body)
+    except json.JSONDecodeError as e:
+        raise BatchFormatError(f"Invalid JSON body: {e}")
+    except UnicodeDecodeError as e:
+        raise BatchFormatError(f"The request body is not valid UTF-8: {e.reason} at byte {e.start}.")
+    if not isinstance(rows, list):
+        raise BatchFormatError("The request body must be a JSON array of objects.")
+    return rows
+
+
+def parse_ndjson_line(line: bytes):
+    """One NDJSON row, or the `json.JSONDecodeError` to report for it."""
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError as e:
+        return e
+    except UnicodeDecodeError as e:
+        return json.JSONDecodeError(f"not valid UTF-8 ({e.reason})", line.decode(errors="replace"), e.start)
+
+
+async def iter_ndjson_chunks(stream, chunk_rows: int, max_line_bytes: int = 1 << 20):
+    """
+    Splits an NDJSON byte stream (e.g. `request.stream()`) into lists of up to
+    `chunk_rows` rows, parsed as by `parse_batch_body`, as the bytes arrive.
+    Only the current chunk and one partial line are kept in memory; a line
+    longer than `max_line_bytes` raises BatchFormatError.
+    """
+    rows, pending = [], b""
+    async for data in stream:
+        lines = (pending + data).split(b"\n")
+        pending = lines.pop()
+        if len(pending) > max_line_bytes:
+            raise BatchFormatError(f"NDJSON line longer than {max_line_bytes} bytes.")
+        for line in lines:
+            if line.strip():
+                rows.append(parse_ndjson_line(line))
+                if len(rows) >= chunk_rows:
+                    yield rows
+                    rows = []
+    if pending.strip():
+        rows.append(parse_ndjson_line(pending))
+    if rows:
+        yield rows
+
+
+def validate_batch(rows: list, payload_model: type[BaseModel], start: int = 0) -> tuple[list[int], list, list[dict]]:
+    """
+    Validates every row against `payload_model`.
+    Returns the indices and payloads of the valid rows and a list of per-row errors.
+    Indices are counted from `start` (the position of the first row in a stream).
+    """
+    indices, payloads, errors = [], [], []
+    for index, row in enumerate(rows, start):
+        if isinstance(row, json.JSONDecodeError):
+            errors.append(row_error(index, "json_invalid", f"Invalid JSON: {row.msg}"))
+            continue
+        try:
+            payloads.append(payload_model.model_validate(row))
+            indices.append(index)
+        except ValidationError as e:
+            errors.append({"index": index, "detail": json.loads(e.json(include_url=False))})
+    return indices, payloads, errors
+
+
+def row_error(index: int, error_type: str, msg: str) -> dict:
+    return {"index": index, "detail": [{"type": error_type, "msg": msg}]}
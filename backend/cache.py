@@ -0,0 +1,97 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from pydantic import BaseModel
+
+_MISSING = object()
+
+
+def file_version(*paths: Path) -> str:
+    """Version token of model files on disk, from their size and modification time."""
+    digest = hashlib.sha256()
+    for path in paths:
+        stat = os.stat(path)
+        digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return digest.hexdigest()[:12]
+
+
+def canonical_key(model: str, version: str, payload: BaseModel | dict) -> str:
+    """
+    Cache key of a prediction: the model name, its artifact version and the
+    payload serialized with sorted keys, so equal payloads always share a key.
+    """
+    if isinstance(payload, BaseModel):
+        payload = payload.model_dump(mode="json")
+    body = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return f"{model}|{version}|{body}"
+
+
+class PredictionCache:
+    """
+    Thread-safe LRU cache of prediction responses with a time-to-live.
+
+    Keys start with the model name (see `canonical_key`), so `invalidate(model)`
+    drops every entry of one model when it is reloaded. A `max_size` of 0
+    disables the cache.
+    """
+
+    def __init__(self, max_size: int = 4096, ttl: float = 300.0, clock=time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str, default=None):
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING and entry[0] > self._clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not _MISSING:
+                del self._entries[key]
+                self.evictions += 1
+            self.misses += 1
+            return default
+
+    def set(self, key: str, value):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, model: str | None = None):
+        """Drops the entries of `model`, or every entry."""
+        with self._lock:
+            if model is None:
+                self._entries.clear()
+                return
+            prefix = f"{model}|"
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                del self._entries[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
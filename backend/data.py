@@ -0,0 +1,116 @@
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401 - only needed for the Parquet cache
+except ImportError:
+    pyarrow = None
+
+# Columns of the sales dataset stored as pandas categoricals
+CATEGORICAL_COLUMNS = ["Product_Name", "Category", "Location", "Platform"]
+DATE_COLUMNS = ["Date"]
+
+# Bump when the conversion below changes, to invalidate existing caches
+CACHE_FORMAT = 1
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_sales_csv(path: Path, columns: list[str] | None = None) -> pd.DataFrame:
+    """Parses the sales CSV with typed categories and dates."""
+    header = pd.read_csv(path, nrows=0).columns
+    usecols = [column for column in header if columns is None or column in columns]
+    dtype = {column: "category" for column in CATEGORICAL_COLUMNS if column in usecols}
+    parse_dates = [column for column in DATE_COLUMNS if column in usecols]
+    return pd.read_csv(path, usecols=usecols, dtype=dtype, parse_dates=parse_dates)
+
+
+def cache_path(path: Path, cache_dir: Path | None = None) -> Path:
+    path = Path(path)
+    cache_dir = Path(cache_dir or os.getenv("DATA_CACHE_DIR") or path.parent / ".cache")
+    return cache_dir / f"{path.stem}.parquet"
+
+
+def _source_stamp(path: Path) -> dict:
+    stat = os.stat(path)
+    return {"format": CACHE_FORMAT, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def _cache_is_fresh(path: Path, parquet: Path) -> bool:
+    """
+    The cache is fresh if the source's mtime and size are unchanged. If only
+    the mtime moved (e.g. the file was touched or copied), the content hash
+    decides, and the stored stamp is refreshed.
+    """
+    meta_path = parquet.with_suffix(".json")
+    if not parquet.exists() or not meta_path.exists():
+        return False
+
+    meta = json.loads(meta_path.read_text())
+    stamp = _source_stamp(path)
+    if meta.get("format") != CACHE_FORMAT or meta.get("size") != stamp["size"]:
+        return False
+    if meta.get("mtime_ns") == stamp["mtime_ns"]:
+        return True
+    if meta.get("sha256") != _sha256(path):
+        return False
+
+    _write_atomic(meta_path, json.dumps({**meta, **stamp}).encode())
+    return True
+
+
+def _write_atomic(target: Path, content: bytes):
+    fd, tmp = tempfile.mkstemp(prefix=f".{target.name}.", dir=target.parent)
+    with os.fdopen(fd, "wb") as f:
+        f.write(content)
+    os.replace(tmp, target)
+
+
+def build_cache(path: Path, cache_dir: Path | None = None) -> Path:
+    """Converts the CSV to Parquet once; later reads only touch the Parquet file."""
+    path = Path(path)
+    parquet = cache_path(path, cache_dir)
+    parquet.parent.mkdir(parents=True, exist_ok=True)
+
+    stamp = _source_stamp(path)
+    df = read_sales_csv(path)
+    fd, tmp = tempfile.mkstemp(prefix=f".{parquet.name}.", dir=parquet.parent)
+    os.close(fd)
+    try:
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, parquet)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+    meta = {**stamp, "sha256": _sha256(path), "rows": len(df)}
+    _write_atomic(parquet.with_suffix(".json"), json.dumps(meta).encode())
+    return parquet
+
+
+def load_sales(path: Path, columns: list[str] | None = None, cache_dir: Path | None = None) -> pd.DataFrame:
+    """
+    Loads the sales dataset with categorical string columns and a parsed Date.
+
+    Reads go through a Parquet copy of the CSV, rebuilt when the CSV changes,
+    and only the requested `columns` are read. Without pyarrow the CSV is
+    parsed directly with the same dtypes.
+    """
+    if pyarrow is None:
+        return read_sales_csv(path, columns)
+
+    parquet = cache_path(path, cache_dir)
+    if not _cache_is_fresh(Path(path), parquet):
+        build_cache(path, cache_dir)
+    return pd.read_parquet(parquet, columns=columns)
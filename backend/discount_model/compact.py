@@ -0,0 +1,180 @@
+"""
+Compact discount model artifacts.
+
+    python -m backend.discount_model.compact export                     # discount_model.forest next to the model
+    python -m backend.discount_model.compact export --max-depth 16      # trees cut at depth 16
+    python -m backend.discount_model.compact report --depths 8 12 16    # compare the options on a held-out split
+
+`export` flattens the pipeline into the node arrays of CompiledDiscountModel,
+stores them in the smallest dtypes and writes one file that the API
+memory-maps (DISCOUNT_MODEL_PATH can point to it directly). `report` trains
+the current model on 80% of the rows and compares it with its compact
+exports, depth-limited versions and a HistGradientBoostingRegressor on the
+same features: file size, load time, single-row latency and test accuracy.
+"""
+import argparse
+import json
+import statistics
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import HistGradientBoostingRegressor
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import Pipeline
+
+from backend.discount_model.compiled import ARTIFACT_SUFFIX, CompiledDiscountModel
+from backend.discount_model.train import (
+    DATA_PATH, DEFAULT_PARAMS, DISCOUNT_MODEL_PATH, FEATURES, build_pipeline, build_preprocessor,
+    load_discount_data, save_pipeline,
+)
+
+REPORT_DIR = DISCOUNT_MODEL_PATH.parent / "compact"
+
+
+def export(pipeline: Pipeline, output: Path, max_depth: int | None = None) -> CompiledDiscountModel:
+    """Writes the compact artifact of `pipeline`, cut at `max_depth` if given."""
+    compiled = CompiledDiscountModel.from_pipeline(pipeline)
+    if max_depth is not None:
+        compiled = compiled.prune(max_depth)
+    compiled = compiled.compact()
+    compiled.save(output)
+    return compiled
+
+
+def load_joblib(path: Path):
+    # As the API serves it: the pipeline scored through its compiled arrays
+    return CompiledDiscountModel.from_pipeline(joblib.load(path))
+
+
+def load_hgb(path: Path):
+    return joblib.load(path)
+
+
+def predict_rows(model, records: list[dict]) -> np.ndarray:
+    if isinstance(model, CompiledDiscountModel):
+        return model.predict_records(records)
+    return model.predict(pd.DataFrame(records, columns=FEATURES))
+
+
+def measure(name: str, path: Path, load, X_test: pd.DataFrame, y_test: pd.Series,
+            reference: np.ndarray | None, repeats: int, rows: int) -> tuple[dict, np.ndarray]:
+    """Size, median load time, median single-row latency and test scores of one artifact."""
+    load_times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model = load(path)
+        load_times.append(time.perf_counter() - start)
+
+    records = X_test.to_dict("records")
+    predicted = predict_rows(model, records)
+    latencies = []
+    for record in records[:rows]:
+        start = time.perf_counter()
+        predict_rows(model, [record])
+        latencies.append(time.perf_counter() - start)
+
+    result = {
+        "name": name,
+        "path": str(path),
+        "bytes": path.stat().st_size,
+        "load_ms": round(statistics.median(load_times) * 1000, 3),
+        "row_us": round(statistics.median(latencies) * 1e6, 1),
+        "mae": float(mean_absolute_error(y_test, predicted)),
+        "rmse": float(np.sqrt(mean_squared_error(y_test, predicted))),
+        "r2": float(r2_score(y_test, predicted)),
+        # Largest change from the current model's predictions
+        "max_diff": float(np.abs(predicted - reference).max()) if reference is not None else 0.0,
+    }
+    if isinstance(model, CompiledDiscountModel):
+        result["nodes"] = len(model.children)
+        result["max_depth"] = model.max_depth
+    return result, predicted
+
+
+def report(data: Path, output_dir: Path, depths: list[int], n_estimators: int = DEFAULT_PARAMS["n_estimators"],
+           seed: int = 42, repeats: int = 5, rows: int = 200) -> dict:
+    """Trains the candidates on an 80/20 split, measures them and writes report.json to `output_dir`."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    X, y = load_discount_data(data)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=seed)
+
+    pipeline = build_pipeline({**DEFAULT_PARAMS, "n_estimators": n_estimators}, n_jobs=-1, random_state=seed)
+    pipeline.fit(X_train, y_train)
+    pipeline.set_params(regressor__n_jobs=None)
+    baseline_path = output_dir / "baseline.joblib"
+    save_pipeline(pipeline, baseline_path)
+
+    hgb = Pipeline(steps=[
+        ("preprocessor", build_preprocessor()),
+        ("regressor", HistGradientBoostingRegressor(random_state=seed)),
+    ]).fit(X_train, y_train)
+    hgb_path = output_dir / "hgb.joblib"
+    save_pipeline(hgb, hgb_path)
+
+    candidates = [("random_forest", baseline_path, load_joblib), ("compact", output_dir / f"full{ARTIFACT_SUFFIX}", None)]
+    export(pipeline, candidates[-1][1])
+    for depth in depths:
+        path = output_dir / f"depth{depth}{ARTIFACT_SUFFIX}"
+        export(pipeline, path, depth)
+        candidates.append((f"compact_depth{depth}", path, None))
+    candidates.append(("hist_gradient_boosting", hgb_path, load_hgb))
+
+    results, reference = [], None
+    for name, path, load in candidates:
+        result, predicted = measure(
+            name, path, load or CompiledDiscountModel.load, X_test, y_test, reference, repeats, rows
+        )
+        reference = predicted if reference is None else reference
+        results.append(result)
+        print(f"  {name:<24} {result['bytes'] / 1e6:8.2f} MB  load {result['load_ms']:8.2f} ms  "
+              f"row {result['row_us']:8.1f} µs  MAE {result['mae']:.5f}  R2 {result['r2']:.4f}  "
+              f"max diff {result['max_diff']:.5f}")
+
+    summary = {
+        "data": str(data),
+        "train_rows": len(X_train),
+        "test_rows": len(X_test),
+        "n_estimators": n_estimators,
+        "seed": seed,
+        "candidates": results,
+    }
+    (output_dir / "report.json").write_text(json.dumps(summary, indent=2))
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export and compare compact discount model artifacts.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export", help="Write the compact artifact of a saved pipeline")
+    export_parser.add_argument("--model", type=Path, default=DISCOUNT_MODEL_PATH, help="Pipeline .joblib")
+    export_parser.add_argument("--output", type=Path, help=f"Default: the model path with {ARTIFACT_SUFFIX}")
+    export_parser.add_argument("--max-depth", type=int, help="Cut the trees at this depth")
+
+    report_parser = commands.add_parser("report", help="Compare the artifacts on a held-out split")
+    report_parser.add_argument("--data", type=Path, default=DATA_PATH, help="Weekly sales CSV")
+    report_parser.add_argument("--output-dir", type=Path, default=REPORT_DIR, help="Artifacts and report.json")
+    report_parser.add_argument("--depths", type=int, nargs="*", default=[8, 12, 16])
+    report_parser.add_argument("--n-estimators", type=int, default=DEFAULT_PARAMS["n_estimators"])
+    report_parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        output = args.output or args.model.with_suffix(ARTIFACT_SUFFIX)
+        start = time.perf_counter()
+        compiled = export(joblib.load(args.model), output, args.max_depth)
+        print(f"{len(compiled.children)} nodes, depth {compiled.max_depth}: {args.model.stat().st_size / 1e6:.2f} MB -> "
+              f"{output.stat().st_size / 1e6:.2f} MB in {time.perf_counter() - start:.1f} s ({output})")
+        return compiled
+
+    summary = report(args.data, args.output_dir, args.depths, args.n_estimators, args.seed)
+    print(f"Report in {args.output_dir / 'report.json'}")
+    return summary
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+import json
+import logging
+import mmap
+import os
+import tempfile
+from collections.abc import Mapping, Sequence
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+if TYPE_CHECKING:
+    from sklearn.ensemble import RandomForestRegressor
+
+# Above this many rows the forest's own (compiled) tree traversal is faster
+# than walking the flat arrays with NumPy; the inputs are still encoded here.
+WALK_MAX_ROWS = 32
+# Rows walked at once by models without a forest (compact artifacts)
+WALK_CHUNK_ROWS = 4096
+
+# Compact artifact file: magic, header length, JSON header, then the raw arrays
+ARTIFACT_MAGIC = b"DFOREST1"
+ARTIFACT_SUFFIX = ".forest"
+ARRAY_ALIGNMENT = 64
+NODE_ARRAYS = ("roots", "children", "feature", "threshold", "value")
+
+logger = logging.getLogger(__name__)
+
+
+class CompiledDiscountModel:
+    """
+    The discount pipeline (one-hot ColumnTransformer + RandomForestRegressor)
+    flattened into NumPy arrays, so rows are scored without building a
+    DataFrame or running the ColumnTransformer.
+
+    All trees are stored in one set of node arrays; `children[node]` holds the
+    (right, left) child, indexed by the outcome of `x <= threshold`. Leaves
+    point to themselves, so every row walks exactly `max_depth` steps through
+    all trees at once.
+    Like sklearn, inputs are compared as float32 against float64 thresholds,
+    so predictions match `pipeline.predict` up to the summation order of the
+    tree outputs. Batches larger than WALK_MAX_ROWS are encoded here and
+    handed to the forest's own predict.
+
+    `compact`, `prune` and `save` turn it into a standalone artifact without
+    the forest (see compact.py); `load` memory-maps one, and such models walk
+    the arrays for every batch, WALK_CHUNK_ROWS rows at a time.
+    """
+
+    def __init__(self, vocabularies: dict, numerical: dict, n_features: int,
+                 roots: np.ndarray, children: np.ndarray, feature: np.ndarray,
+                 threshold: np.ndarray, value: np.ndarray, max_depth: int,
+                 forest: "RandomForestRegressor | None" = None):
+        self.vocabularies = vocabularies  # {column: {category: feature index}}
+        self.numerical = numerical  # {column: feature index}
+        self.n_features = n_features
+        self.roots = roots
+        self.children = children
+        self.feature = feature
+        self.threshold = threshold
+        self.value = value
+        self.max_depth = max_depth
+        self.forest = forest
+
+    @classmethod
+    def from_pipeline(cls, pipeline) -> "CompiledDiscountModel":
+        """Raises ValueError if the pipeline is not the layout built by generate_models.py."""
+        # Imported here so that serving a compact artifact does not import sklearn
+        from sklearn.compose import ColumnTransformer
+        from sklearn.ensemble import RandomForestRegressor
+        from sklearn.pipeline import Pipeline
+        from sklearn.preprocessing import FunctionTransformer, OneHotEncoder
+
+        if not isinstance(pipeline, Pipeline) or len(pipeline.steps) != 2:
+            raise ValueError("Expected a (preprocessor, regressor) Pipeline.")
+        preprocessor, forest = pipeline.steps[0][1], pipeline.steps[1][1]
+        if not isinstance(preprocessor, ColumnTransformer) or not isinstance(forest, RandomForestRegressor):
+            raise ValueError("Expected a ColumnTransformer followed by a RandomForestRegressor.")
+        if forest.n_outputs_ != 1:
+            raise ValueError("Only single-output forests are supported.")
+
+        vocabularies, numerical = {}, {}
+        offset = 0
+        for name, transformer, columns in preprocessor.transformers_:
+            if transformer == "drop":
+                continue
+            if isinstance(transformer, OneHotEncoder):
+                if transformer.drop_idx_ is not None or transformer._infrequent_enabled:
+                    raise ValueError("OneHotEncoder with drop or infrequent categories is not supported.")
+                if transformer.handle_unknown != "ignore":
+                    raise ValueError("OneHotEncoder must ignore unknown categories.")
+                for column, categories in zip(columns, transformer.categories_):
+                    vocabularies[column] = {category: offset + j for j, category in enumerate(categories)}
+                    offset += len(categories)
+            elif transformer == "passthrough" or (
+                isinstance(transformer, FunctionTransformer) and transformer.func is None
+            ):
+                for column in columns:
+                    numerical[column] = offset
+                    offset += 1
+            else:
+                raise ValueError(f"Unsupported transformer '{name}': {transformer!r}")
+
+        if offset != forest.n_features_in_:
+            raise ValueError(f"Preprocessor yields {offset} features, the forest expects {forest.n_features_in_}.")
+
+        trees = [estimator.tree_ for estimator in forest.estimators_]
+        sizes = np.array([tree.node_count for tree in trees])
+        starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+        children, feature = [], []
+        for start, tree in zip(starts, trees):
+            nodes = np.arange(tree.node_count)
+            leaf = tree.children_left == -1
+            right = np.where(leaf, nodes, tree.children_right)
+            left = np.where(leaf, nodes, tree.children_left)
+            children.append(np.column_stack([right, left]) + start)
+            feature.append(np.where(leaf, 0, tree.feature))
+
+        return cls(
+            vocabularies=vocabularies,
+            numerical=numerical,
+            n_features=offset,
+            roots=starts.astype(np.intp),
+            children=np.concatenate(children).astype(np.intp),
+            feature=np.concatenate(feature).astype(np.intp),
+            threshold=np.concatenate([tree.threshold for tree in trees]),
+            value=np.concatenate([tree.value[:, 0, 0] for tree in trees]),
+            max_depth=max(tree.max_depth for tree in trees),
+            forest=forest,
+        )
+
+    def encode(self, columns: Mapping[str, Sequence]) -> np.ndarray:
+        """
+        Builds the (n, n_features) float32 forest input from column values
+        (a dict of lists or a DataFrame). Unknown categories encode as all zeros.
+        """
+        n = len(next(iter(columns.values())) if isinstance(columns, dict) else columns)
+        X = np.zeros((n, self.n_features), dtype=np.float32)
+        rows = np.arange(n)
+        for column, vocabulary in self.vocabularies.items():
+            values = columns[column]
+            if isinstance(values, pd.Series) and isinstance(values.dtype, pd.CategoricalDtype):
+                # One lookup per category; code -1 (missing) takes the last entry
+                table = np.array([vocabulary.get(category, -1) for category in values.cat.categories] + [-1])
+                index = table[values.cat.codes.to_numpy()].astype(np.intp)
+            else:
+                index = np.fromiter((vocabulary.get(value, -1) for value in values), dtype=np.intp, count=n)
+            known = index >= 0
+            X[rows[known], index[known]] = 1.0
+        for column, index in self.numerical.items():
+            # Same float64 -> float32 cast as the pipeline
+            X[:, index] = np.asarray(columns[column], dtype=np.float64)
+        return X
+
+    def predict_encoded(self, X: np.ndarray) -> np.ndarray:
+        if self.forest is not None and len(X) > WALK_MAX_ROWS:
+            return self.forest.predict(X)
+        if len(X) > WALK_CHUNK_ROWS:
+            return np.concatenate([
+                self.predict_encoded(X[start:start + WALK_CHUNK_ROWS]) for start in range(0, len(X), WALK_CHUNK_ROWS)
+            ])
+
+        nodes = np.repeat(self.roots.astype(np.intp)[:, None], len(X), axis=1)  # (n_trees, n)
+        rows = np.arange(len(X))
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            # intp cursor: indexing with the int32 indexes of compact models converts them at every step
+            nodes = self.children[nodes, go_left.view(np.uint8)].astype(np.intp, copy=False)
+        # Summed tree by tree, as RandomForestRegressor.predict does
+        return self.value[nodes].sum(axis=0, dtype=np.float64) / len(self.roots)
+
+    def predict(self, columns: Mapping[str, Sequence]) -> np.ndarray:
+        return self.predict_encoded(self.encode(columns))
+
+    def encode_records(self, records: Sequence[Mapping]) -> np.ndarray:
+        columns = {column: [record[column] for record in records] for column in [*self.vocabularies, *self.numerical]}
+        return self.encode(columns)
+
+    def predict_records(self, records: Sequence[Mapping]) -> np.ndarray:
+        """Scores a list of payload dicts."""
+        return self.predict_encoded(self.encode_records(records))
+
+    def node_depths(self) -> np.ndarray:
+        """Depth of every node (-1 for nodes no root reaches)."""
+        depth = np.full(len(self.children), -1, dtype=np.int64)
+        frontier, level = np.asarray(self.roots), 0
+        while len(frontier):
+            depth[frontier] = level
+            internal = frontier[self.children[frontier, 1] != frontier]
+            frontier = self.children[internal].ravel()
+            level += 1
+        return depth
+
+    def prune(self, max_depth: int) -> "CompiledDiscountModel":
+        """
+        Cuts every tree at `max_depth`: nodes at that depth become leaves with
+        their node value (the mean target of their training samples), and
+        nodes below them are dropped. There is no forest left to fall back on.
+        """
+        depth = self.node_depths()
+        keep = (depth >= 0) & (depth <= max_depth)
+        new_index = np.cumsum(keep) - 1
+        nodes = np.flatnonzero(keep)
+        cut = depth[nodes] == max_depth
+        children = np.where(cut[:, None], nodes[:, None], self.children[nodes])
+        return CompiledDiscountModel(
+            vocabularies=self.vocabularies,
+            numerical=self.numerical,
+            n_features=self.n_features,
+            roots=new_index[self.roots],
+            children=new_index[children],
+            feature=np.where(cut, 0, self.feature[nodes]),
+            threshold=self.threshold[nodes],
+            value=self.value[nodes],
+            max_depth=min(self.max_depth, max_depth),
+        )
+
+    def compact(self) -> "CompiledDiscountModel":
+        """
+        The same trees in the smallest dtypes: int32 node indexes, the smallest
+        unsigned type for feature indexes and float32 thresholds and values.
+        Thresholds are rounded down to float32, so `x <= threshold` gives the
+        same result for every float32 input and the splits are unchanged; only
+        the float32 leaf values differ from the forest (by about 1e-9).
+        """
+        threshold = self.threshold.astype(np.float32)
+        above = threshold.astype(np.float64) > self.threshold
+        threshold[above] = np.nextafter(threshold[above], np.float32(-np.inf))
+        return CompiledDiscountModel(
+            vocabularies=self.vocabularies,
+            numerical=self.numerical,
+            n_features=self.n_features,
+            roots=self.roots.astype(np.int32),
+            children=self.children.astype(np.int32),
+            feature=self.feature.astype(np.min_scalar_type(max(self.n_features - 1, 0))),
+            threshold=threshold,
+            value=self.value.astype(np.float32),
+            max_depth=self.max_depth,
+        )
+
+    def save(self, path: Path) -> Path:
+        """
+        Writes the model as one file that `load` can memory-map: a JSON header
+        (vocabularies, feature indexes, array dtypes and offsets) followed by
+        the aligned raw node arrays. The file is replaced atomically.
+        """
+        path = Path(path)
+        arrays = {name: np.ascontiguousarray(getattr(self, name)) for name in NODE_ARRAYS}
+        offset, layout = 0, {}
+        for name, array in arrays.items():
+            layout[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+            offset += -(-array.nbytes // ARRAY_ALIGNMENT) * ARRAY_ALIGNMENT
+        header = json.dumps({
+            "vocabularies": self.vocabularies,
+            "numerical": self.numerical,
+            "n_features": self.n_features,
+            "max_depth": self.max_depth,
+            "arrays": layout,
+        }).encode()
+        start = -(-(len(ARTIFACT_MAGIC) + 8 + len(header)) // ARRAY_ALIGNMENT) * ARRAY_ALIGNMENT
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", dir=path.parent)
+        with os.fdopen(fd, "wb") as f:
+            f.write(ARTIFACT_MAGIC + len(header).to_bytes(8, "little") + header)
+            for name, array in arrays.items():
+                f.seek(start + layout[name]["offset"])
+                f.write(array.tobytes())
+            f.truncate(start + offset)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path: Path, memory_map: bool = True) -> "CompiledDiscountModel":
+        """
+        Reads a file written by `save`. With `memory_map` the arrays are views
+        of the mapped file: loading reads only the header, and worker processes
+        mapping the same file share its pages.
+        """
+        with open(path, "rb") as f:
+            if f.read(len(ARTIFACT_MAGIC)) != ARTIFACT_MAGIC:
+                raise ValueError(f"{path} is not a compact discount model.")
+            size = int.from_bytes(f.read(8), "little")
+            header = json.loads(f.read(size))
+            f.seek(0)
+            # Plain arrays over the buffer: np.memmap slows down every indexing step
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if memory_map else f.read()
+        start = -(-(len(ARTIFACT_MAGIC) + 8 + size) // ARRAY_ALIGNMENT) * ARRAY_ALIGNMENT
+        arrays = {
+            name: np.frombuffer(
+                buffer, dtype=spec["dtype"], count=int(np.prod(spec["shape"])), offset=start + spec["offset"]
+            ).reshape(spec["shape"])
+            for name, spec in header["arrays"].items()
+        }
+        return cls(
+            vocabularies=header["vocabularies"],
+            numerical=header["numerical"],
+            n_features=header["n_features"],
+            max_depth=header["max_depth"],
+            **arrays,
+        )
+
+
+def compile_discount_model(pipeline) -> CompiledDiscountModel | None:
+    """Compiles the pipeline, or returns None (scoring then uses the pipeline) if it cannot."""
+    try:
+        return CompiledDiscountModel.from_pipeline(pipeline)
+    except (ValueError, AttributeError, TypeError) as e:
+        logger.warning("Discount model not compiled, using the sklearn pipeline: %s", e)
+        return None
+
+
+def is_compact_artifact(path: Path) -> bool:
+    """Whether `path` is a file written by CompiledDiscountModel.save."""
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(ARTIFACT_MAGIC)) == ARTIFACT_MAGIC
+    except OSError:
+        return False
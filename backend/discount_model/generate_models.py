@@ -1,4 +1,3 @@
-import pandas as pd
 import numpy as np
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.preprocessing import OneHotEncoder
@@ -8,6 +7,8 @@ import joblib
 import os
 from pathlib import Path
 
+from backend.data import load_sales
+
 # --- Configuración de rutas (debe coincidir con tu .env) ---
 # Se define la ruta del proyecto como el directorio padre del directorio donde se encuentra este script
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
@@ -24,7 +25,11 @@ def train_discount_model():
     Entrena un modelo de regresión para predecir el descuento.
     """
     try:
-        df = pd.read_csv(f"{PROJECT_ROOT}/../resources/data/Supplement_Sales_Weekly_Expanded.csv")
+        # Lectura a través de la caché Parquet de backend/data.py, solo con las columnas del modelo
+        df = load_sales(
+            PROJECT_ROOT / "../resources/data/Supplement_Sales_Weekly_Expanded.csv",
+            columns=["Product_Name", "Category", "Price", "Units_Sold", "Location", "Platform", "Discount"],
+        )
     except FileNotFoundError:
         print(
             "Error: El archivo 'Supplement_Sales_Weekly_Expanded.csv' no se encontró. Asegúrate de que esté en la carpeta 'resources/data'."
@@ -34,7 +39,7 @@ def train_discount_model():
     df.columns = df.columns.str.lower().str.replace(" ", "_")
     for col in ["product_name", "category", "location", "platform"]:
         if col in df.columns:
-            df[col] = df[col].str.strip()
+            df[col] = df[col].astype(str).str.strip()
 
     features = [
         "product_name",
@@ -64,11 +69,14 @@ def train_discount_model():
     model_pipeline = Pipeline(
         steps=[
             ("preprocessor", preprocessor),
-            ("regressor", RandomForestRegressor(n_estimators=100, random_state=42)),
+            # n_jobs=-1: entrena los árboles con todos los núcleos
+            ("regressor", RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1)),
         ]
     )
 
     model_pipeline.fit(X, y)
+    # La API predice filas sueltas o lotes pequeños: un solo hilo es más rápido
+    model_pipeline.set_params(regressor__n_jobs=None)
 
     return model_pipeline
 
@@ -86,6 +94,7 @@ def save_model(model, path):
 
 
 # --- Proceso principal ---
+# Uso: python -m backend.discount_model.generate_models
 if __name__ == "__main__":
     print("Iniciando el entrenamiento del modelo de descuento...")
 
@@ -0,0 +1,279 @@
+"""
+Discount model training with a parallel, resumable hyperparameter sweep.
+
+    python -m backend.discount_model.train                          # the current model, all cores
+    python -m backend.discount_model.train --n-estimators 50 100 200 --max-depth none 20 --cv 5
+    python -m backend.discount_model.train ... --resume             # continue an interrupted sweep
+
+Every candidate is cross-validated in a pool of worker processes on the
+one-hot encoded matrix, which is built once and cached in the sweep
+directory. Each finished candidate is appended to results.jsonl, so
+`--resume` only evaluates the missing ones. The best candidate is refitted
+on all rows with every core and saved as the usual pipeline, next to a
+report.json with the scores of every candidate.
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from sklearn.model_selection import KFold
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder
+
+from backend.cache import file_version
+from backend.data import load_sales
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+load_dotenv(dotenv_path=PROJECT_ROOT / ".env")
+
+DATA_PATH = PROJECT_ROOT / os.getenv("DATA_PATH", "./resources/data/Supplement_Sales_Weekly_Expanded.csv")
+DISCOUNT_MODEL_PATH = PROJECT_ROOT / os.getenv("DISCOUNT_MODEL_PATH", "./resources/discount/discount_model.joblib")
+SWEEP_DIR = PROJECT_ROOT / "resources" / "discount" / "sweep"
+
+CATEGORICAL_FEATURES = ["product_name", "category", "location", "platform"]
+NUMERICAL_FEATURES = ["price", "units_sold"]
+FEATURES = ["product_name", "category", "price", "units_sold", "location", "platform"]
+TARGET = "discount"
+# Hyperparameters of the current model, the default (single-candidate) sweep
+DEFAULT_PARAMS = {"n_estimators": 100, "max_depth": None, "min_samples_leaf": 1, "max_features": 1.0}
+# Metric that picks the best candidate (lower is better)
+SELECTION_METRIC = "mae"
+
+
+def load_discount_data(path: Path) -> tuple[pd.DataFrame, pd.Series]:
+    """Features and target with the lower-case column names used by the model."""
+    df = load_sales(path)
+    df.columns = df.columns.str.lower().str.replace(" ", "_")
+    for column in CATEGORICAL_FEATURES:
+        df[column] = df[column].astype(str).str.strip()
+    return df[FEATURES], df[TARGET]
+
+
+def build_preprocessor() -> ColumnTransformer:
+    return ColumnTransformer(
+        transformers=[
+            ("cat", OneHotEncoder(handle_unknown="ignore", sparse_output=False), CATEGORICAL_FEATURES),
+            ("num", "passthrough", NUMERICAL_FEATURES),
+        ]
+    )
+
+
+def build_pipeline(params: dict, n_jobs: int | None = None, random_state: int = 42) -> Pipeline:
+    """The (preprocessor, regressor) layout that the API and the compiled model expect."""
+    return Pipeline(
+        steps=[
+            ("preprocessor", build_preprocessor()),
+            ("regressor", RandomForestRegressor(**params, n_jobs=n_jobs, random_state=random_state)),
+        ]
+    )
+
+
+def candidate_grid(n_estimators, max_depth, min_samples_leaf, max_features) -> list[dict]:
+    return [
+        {"n_estimators": n, "max_depth": depth, "min_samples_leaf": leaf, "max_features": features}
+        for n, depth, leaf, features in itertools.product(n_estimators, max_depth, min_samples_leaf, max_features)
+    ]
+
+
+def candidate_key(params: dict) -> str:
+    return json.dumps(params, sort_keys=True)
+
+
+def cache_matrix(X: pd.DataFrame, y: pd.Series, sweep_dir: Path, stamp: str) -> Path:
+    """
+    One-hot encodes the features once and saves [X | y] as a .npy file that
+    the workers memory-map, reusing it while the data stamp is unchanged.
+    The encoder sees every category, which gives trees the same splits as
+    encoding each fold separately: a category missing from a training fold
+    is an all-zero column there and is never split on.
+    """
+    path = sweep_dir / f"matrix-{stamp}.npy"
+    if not path.exists():
+        for old in sweep_dir.glob("matrix-*.npy"):
+            old.unlink()
+        encoded = build_preprocessor().fit_transform(X).astype(np.float64)
+        matrix = np.column_stack([encoded, y.to_numpy(dtype=np.float64)])
+        fd, tmp = tempfile.mkstemp(prefix=".matrix.", suffix=".npy", dir=sweep_dir)
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, matrix)
+        os.replace(tmp, path)
+    return path
+
+
+def evaluate_candidate(params: dict, matrix_path: Path, cv: int, seed: int, n_jobs: int) -> dict:
+    """Cross-validates one candidate on the cached matrix (runs in a worker process)."""
+    matrix = np.load(matrix_path, mmap_mode="r")
+    X, y = matrix[:, :-1], matrix[:, -1]
+    scores = {"mae": [], "rmse": [], "r2": []}
+    start = time.perf_counter()
+    for train, test in KFold(n_splits=cv, shuffle=True, random_state=seed).split(X):
+        model = RandomForestRegressor(**params, n_jobs=n_jobs, random_state=seed).fit(X[train], y[train])
+        predicted = model.predict(X[test])
+        scores["mae"].append(mean_absolute_error(y[test], predicted))
+        scores["rmse"].append(float(np.sqrt(mean_squared_error(y[test], predicted))))
+        scores["r2"].append(r2_score(y[test], predicted))
+    return {
+        "params": params,
+        **{f"{metric}_mean": float(np.mean(values)) for metric, values in scores.items()},
+        **{f"{metric}_std": float(np.std(values)) for metric, values in scores.items()},
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+def read_results(path: Path, config: dict) -> dict:
+    """Finished candidates of an earlier run with the same data and CV settings, by candidate key."""
+    results = {}
+    if path.exists():
+        for line in path.read_text().splitlines():
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a line cut short by the interruption
+            if record.get("config") == config:
+                results[candidate_key(record["params"])] = record
+    return results
+
+
+def run_sweep(candidates: list[dict], matrix_path: Path, results_path: Path, config: dict,
+              workers: int, n_jobs: int, resume: bool = False) -> tuple[list[dict], int]:
+    """
+    Evaluates the candidates not already in results_path (with `resume`) in
+    `workers` processes. Returns (results of every candidate, number evaluated now).
+    """
+    done = read_results(results_path, config) if resume else {}
+    if not resume:
+        results_path.write_text("")
+    elif results_path.exists() and results_path.read_text()[-1:] not in ("", "\n"):
+        with open(results_path, "a") as log:
+            log.write("\n")  # end the line cut short by the interruption
+    pending = [params for params in candidates if candidate_key(params) not in done]
+    print(f"{len(candidates)} candidates, {len(candidates) - len(pending)} already evaluated, "
+          f"{len(pending)} to run on {workers} workers x {n_jobs} jobs")
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers) as pool, open(results_path, "a") as log:
+            futures = {
+                pool.submit(evaluate_candidate, params, matrix_path, config["cv"], config["seed"], n_jobs): params
+                for params in pending
+            }
+            for future in as_completed(futures):
+                record = {**future.result(), "config": config}
+                log.write(json.dumps(record) + "\n")
+                log.flush()
+                done[candidate_key(record["params"])] = record
+                print(f"  {candidate_key(record['params'])}  MAE {record['mae_mean']:.5f} "
+                      f"R2 {record['r2_mean']:.4f}  {record['seconds']:.1f} s")
+
+    return [done[candidate_key(params)] for params in candidates], len(pending)
+
+
+def save_pipeline(pipeline: Pipeline, path: Path):
+    """Writes the model atomically, so a running API never loads a partial file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", dir=path.parent)
+    os.close(fd)
+    joblib.dump(pipeline, tmp)
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, path)
+
+
+def train(data: Path, output: Path, sweep_dir: Path, candidates: list[dict], cv: int = 5, seed: int = 42,
+          workers: int | None = None, n_jobs: int | None = None, resume: bool = False) -> dict:
+    """Runs the sweep, refits the best candidate on all rows and saves it. Returns the report."""
+    cpus = os.cpu_count() or 1
+    workers = workers or min(len(candidates), cpus)
+    n_jobs = n_jobs or max(1, cpus // workers)
+    sweep_dir.mkdir(parents=True, exist_ok=True)
+
+    start = time.perf_counter()
+    X, y = load_discount_data(data)
+    stamp = hashlib.sha256(f"{file_version(data)}:{len(X)}".encode()).hexdigest()[:12]
+    matrix_path = cache_matrix(X, y, sweep_dir, stamp)
+    prepare_seconds = time.perf_counter() - start
+
+    config = {"data": stamp, "cv": cv, "seed": seed}
+    results, evaluated = run_sweep(
+        candidates, matrix_path, sweep_dir / "results.jsonl", config, workers, n_jobs, resume
+    )
+    ranked = sorted(results, key=lambda record: record[f"{SELECTION_METRIC}_mean"])
+    best = ranked[0]["params"]
+
+    start = time.perf_counter()
+    pipeline = build_pipeline(best, n_jobs=-1, random_state=seed).fit(X, y)
+    refit_seconds = time.perf_counter() - start
+    # Scoring in the API is single-row or micro-batched: one thread is faster
+    pipeline.set_params(regressor__n_jobs=None)
+    save_pipeline(pipeline, output)
+
+    report = {
+        "data": str(data),
+        "rows": len(X),
+        "config": config,
+        "selection_metric": f"{SELECTION_METRIC}_mean",
+        "workers": workers,
+        "n_jobs_per_worker": n_jobs,
+        "evaluated": evaluated,
+        "prepare_seconds": round(prepare_seconds, 3),
+        "refit_seconds": round(refit_seconds, 3),
+        "best": ranked[0],
+        "candidates": ranked,
+        "model": str(output),
+    }
+    (sweep_dir / "report.json").write_text(json.dumps(report, indent=2))
+    return report
+
+
+def parse_depth(value: str) -> int | None:
+    return None if value.lower() == "none" else int(value)
+
+
+def parse_features(value: str) -> float | str:
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+def main(argv=None) -> dict:
+    parser = argparse.ArgumentParser(description="Train the discount model with a cross-validated sweep.")
+    parser.add_argument("--data", type=Path, default=DATA_PATH, help="Weekly sales CSV")
+    parser.add_argument("--output", type=Path, default=DISCOUNT_MODEL_PATH, help="Where to save the best pipeline")
+    parser.add_argument("--sweep-dir", type=Path, default=SWEEP_DIR, help="Matrix cache, results and report")
+    parser.add_argument("--n-estimators", type=int, nargs="+", default=[DEFAULT_PARAMS["n_estimators"]])
+    parser.add_argument("--max-depth", type=parse_depth, nargs="+", default=[DEFAULT_PARAMS["max_depth"]],
+                        help="Integers or 'none'")
+    parser.add_argument("--min-samples-leaf", type=int, nargs="+", default=[DEFAULT_PARAMS["min_samples_leaf"]])
+    parser.add_argument("--max-features", type=parse_features, nargs="+", default=[DEFAULT_PARAMS["max_features"]],
+                        help="Fractions or 'sqrt'/'log2'")
+    parser.add_argument("--cv", type=int, default=5, help="Cross-validation folds")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, help="Candidate processes (default: one per core, up to the grid size)")
+    parser.add_argument("--n-jobs", type=int, help="Threads per candidate fit (default: cores / workers)")
+    parser.add_argument("--resume", action="store_true", help="Skip candidates already in results.jsonl")
+    args = parser.parse_args(argv)
+
+    candidates = candidate_grid(args.n_estimators, args.max_depth, args.min_samples_leaf, args.max_features)
+    report = train(args.data, args.output, args.sweep_dir, candidates, args.cv, args.seed,
+                   args.workers, args.n_jobs, args.resume)
+    best = report["best"]
+    print(f"Best {candidate_key(best['params'])}: MAE {best['mae_mean']:.5f} ± {best['mae_std']:.5f}, "
+          f"RMSE {best['rmse_mean']:.5f}, R2 {best['r2_mean']:.4f}")
+    print(f"Model saved to {report['model']}, report in {args.sweep_dir / 'report.json'}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
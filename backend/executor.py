@@ -0,0 +1,271 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import pandas as pd
+from starlette.concurrency import run_in_threadpool
+
+from backend.discount_model.compiled import CompiledDiscountModel, compile_discount_model, is_compact_artifact
+from backend.inference import DISCOUNT_FEATURES, encode_revenue
+from backend.metrics import Histogram, StageTimer
+from backend.profiling import is_profiling, profile_thread
+from backend.registry import ModelVersion
+from backend.revenue_model.compiled import compile_revenue_model
+
+# Model versions loaded in the current process: the API process when there are
+# no inference workers, otherwise each worker process keeps its own copies.
+_models = {}  # (task, name) -> (ModelVersion, artifacts)
+_defaults = {}  # task -> the first version loaded or served, used when a task names none
+_load_lock = threading.Lock()
+# Called as on_load(version, stages) after a version is loaded in this process
+on_load = None
+
+
+def load_version(version: ModelVersion) -> list:
+    """
+    Loads the artifacts of `version` into this process, replacing a previous
+    copy of the same name. Returns the (stage, seconds) durations of the loading steps.
+    """
+    timer = StageTimer()
+    paths = version.paths
+    if version.task == "revenue":
+        artifacts = {
+            "model": joblib.load(paths["revenue_model"]),
+            "scaler": joblib.load(paths["revenue_scaler"]),
+            "category": joblib.load(paths["revenue_category"]),
+            "location": joblib.load(paths["revenue_location"]),
+            "platform": joblib.load(paths["revenue_platform"]),
+        }
+        timer.mark("revenue_load")
+        artifacts["compiled"] = compile_revenue_model(
+            artifacts["model"], artifacts["scaler"], artifacts["category"], artifacts["location"],
+            artifacts["platform"],
+        ) if version.compiled else None
+        timer.mark("revenue_compile")
+    elif version.task == "discount" and is_compact_artifact(paths["discount_model"]):
+        # Compact export (discount_model/compact.py): already compiled, no pipeline
+        artifacts = {"model": None, "compiled": CompiledDiscountModel.load(paths["discount_model"])}
+        timer.mark("discount_load")
+    elif version.task == "discount":
+        artifacts = {"model": joblib.load(paths["discount_model"])}
+        timer.mark("discount_load")
+        artifacts["compiled"] = compile_discount_model(artifacts["model"]) if version.compiled else None
+        timer.mark("discount_compile")
+    else:
+        raise ValueError(f"Unknown inference task: {version.task}")
+
+    _models[(version.task, version.name)] = (version, artifacts)
+    _defaults.setdefault(version.task, version)
+    if on_load is not None:
+        on_load(version, timer.stages)
+    return timer.stages
+
+
+def is_loaded(version: ModelVersion) -> bool:
+    """Whether these files of `version` are loaded in this process."""
+    entry = _models.get((version.task, version.name))
+    return entry is not None and entry[0].stamp == version.stamp
+
+
+def load_models(versions: list[ModelVersion]) -> list:
+    """Loads every version (worker initializer). Returns the stage durations of all of them."""
+    return [stage for version in versions for stage in load_version(version)]
+
+
+def _artifacts(task: str, version: ModelVersion | None) -> dict:
+    """Artifacts of `version` (default: the first loaded), loading them on first use in this process."""
+    version = version or _defaults[task]
+    entry = _models.get((task, version.name))
+    if entry is None or entry[0].stamp != version.stamp:
+        with _load_lock:
+            entry = _models.get((task, version.name))
+            if entry is None or entry[0].stamp != version.stamp:
+                load_version(version)
+                entry = _models[(task, version.name)]
+    return entry[1]
+
+
+def model_artifacts(version: ModelVersion) -> dict:
+    """
+    The loaded artifacts of `version` in this process: 'model' and 'compiled',
+    plus 'scaler', 'category', 'location' and 'platform' for revenue.
+    """
+    return _artifacts(version.task, version)
+
+
+@profile_thread
+def run_task_timed(task: str, records: list[dict], version: ModelVersion | None = None) -> tuple[list[float], list]:
+    """
+    Scores `records` with `version` of the model, as loaded in this process.
+    `task` is 'revenue' or 'discount'. Returns the predictions and the
+    (stage, seconds) durations of encoding, scaling and predicting.
+    """
+    if task not in ("revenue", "discount"):
+        raise ValueError(f"Unknown inference task: {task}")
+    artifacts = _artifacts(task, version)
+    timer = StageTimer()
+    compiled = artifacts["compiled"]
+    if compiled is not None:
+        X = compiled.encode_records(records)
+        timer.mark("encode")
+        values = compiled.predict_encoded(X)
+    elif task == "revenue":
+        X = encode_revenue(pd.DataFrame(records), artifacts["category"], artifacts["location"], artifacts["platform"])
+        timer.mark("encode")
+        X = artifacts["scaler"].transform(X)
+        timer.mark("scale")
+        values = artifacts["model"].predict(X)
+    else:
+        X = pd.DataFrame(records, columns=DISCOUNT_FEATURES)
+        timer.mark("encode")
+        values = artifacts["model"].predict(X)
+    timer.mark("predict")
+    return [float(value) for value in values], timer.stages
+
+
+def run_task(task: str, records: list[dict], version: ModelVersion | None = None) -> list[float]:
+    return run_task_timed(task, records, version)[0]
+
+
+class MicroBatcher:
+    """
+    Merges concurrent single-row requests into one model call.
+
+    The first row that arrives starts a `max_wait` second window; the rows
+    submitted during the window (up to `max_batch_size`) are scored together
+    and each caller gets its own value back. Must be used from one event loop.
+    """
+
+    def __init__(self, run_batch, max_batch_size: int = 64, max_wait: float = 0.002):
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.queue_depth = Histogram()
+        self.batch_size = Histogram()
+        self._pending = []  # (row, future)
+        self._timer = None
+        self._tasks = set()
+
+    async def submit(self, row):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((row, future))
+        self.queue_depth.observe(len(self._pending))
+
+        if len(self._pending) >= self.max_batch_size or self.max_wait <= 0:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        self.batch_size.observe(len(batch))
+        task = asyncio.ensure_future(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch):
+        try:
+            values = await self.run_batch([row for row, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), value in zip(batch, values):
+            if not future.done():
+                future.set_result(value)
+
+    def stats(self) -> dict:
+        return {"queue_depth": self.queue_depth.snapshot(), "batch_size": self.batch_size.snapshot()}
+
+
+class InferenceExecutor:
+    """
+    Runs revenue and discount scoring off the event loop.
+
+    With `workers` > 0 the work goes to a process pool whose workers load
+    `versions` once at start-up (and any other version on its first use), so
+    RandomForest scoring does not hold the API process's GIL. With 0 workers
+    it runs in Starlette's threadpool and each version is loaded in this
+    process on its first use (or ahead of it with `load_models`). With a pool,
+    single rows go through a MicroBatcher per task; rows of different
+    versions in one batch are scored with their own version.
+    `on_stages(task, stages)` receives the stage durations of every model call.
+    """
+
+    def __init__(self, versions: list[ModelVersion], workers: int = 0,
+                 max_batch_size: int = 64, max_wait: float = 0.002, on_stages=None):
+        self.workers = workers
+        self.on_stages = on_stages
+        self.pool = None
+        for version in versions:
+            _defaults.setdefault(version.task, version)
+        if workers > 0:
+            self.pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=load_models,
+                initargs=(versions,),
+            )
+        self.batchers = {
+            task: MicroBatcher(
+                lambda rows, task=task: self._run_versions(task, rows), max_batch_size, max_wait
+            )
+            for task in ("revenue", "discount")
+        }
+
+    async def run(self, task: str, records: list[dict], version: ModelVersion | None = None) -> list[float]:
+        """Scores a whole batch of rows with `version` (default: the first version loaded)."""
+        if self.pool is None:
+            values, stages = await run_in_threadpool(run_task_timed, task, records, version)
+        else:
+            values, stages = await asyncio.get_running_loop().run_in_executor(
+                self.pool, run_task_timed, task, records, version
+            )
+        if self.on_stages is not None:
+            self.on_stages(task, stages)
+        return values
+
+    async def _run_versions(self, task: str, rows: list[tuple]) -> list[float]:
+        """Scores micro-batched (version, record) rows, one model call per version."""
+        groups = {}
+        for i, (version, _) in enumerate(rows):
+            key = None if version is None else (version.name, version.stamp)
+            groups.setdefault(key, (version, []))[1].append(i)
+
+        results = await asyncio.gather(*(
+            self.run(task, [rows[i][1] for i in indices], version) for version, indices in groups.values()
+        ))
+        values = [0.0] * len(rows)
+        for (_, indices), group_values in zip(groups.values(), results):
+            for i, value in zip(indices, group_values):
+                values[i] = value
+        return values
+
+    async def predict_one(self, task: str, record: dict, version: ModelVersion | None = None) -> float:
+        """
+        Scores one row, batched with the rows of concurrent requests when there
+        is a process pool. Without one there is no per-call IPC to amortize, so
+        the row goes straight to the threadpool instead of waiting for a batch.
+        """
+        if self.pool is None or is_profiling():
+            # Profiled rows are scored alone so that the profile only contains this request's work
+            return (await self.run(task, [record], version))[0]
+        return await self.batchers[task].submit((version, record))
+
+    def stats(self) -> dict:
+        return {"workers": self.workers, **{task: batcher.stats() for task, batcher in self.batchers.items()}}
+
+    def shutdown(self):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
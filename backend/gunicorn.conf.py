@@ -0,0 +1,24 @@
+import gc
+import os
+
+# gunicorn -c backend/gunicorn.conf.py backend.api:app
+#
+# With preload_app the app is imported in the master, which loads the models,
+# compiled discount trees, metadata and price artifacts, and the workers are forked
+# from it, so that memory is shared copy-on-write instead of loaded per worker.
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() in ("1", "true", "yes")
+
+
+def when_ready(server):
+    """Runs in the master before the workers are forked."""
+    if not preload_app:
+        return
+
+    from backend.api import preload
+    preload()
+    # Keep the garbage collector from writing to (and so un-sharing) the pages
+    # of every object that exists at fork time
+    gc.freeze()
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+REVENUE_FEATURES = ["Price", "Category_By_Price", "Location_By_Price", "Platform_By_Price", "Day"]
+DISCOUNT_FEATURES = ["product_name", "category", "price", "units_sold", "location", "platform"]
+
+
+def encode_with_unknown(values: pd.Series, mapping: dict) -> pd.Series:
+    """
+    Maps every value through `mapping`.
+    Values that are not in the mapping get the value for 'Unknown'.
+    """
+    encoded = values.map(mapping)
+    if isinstance(encoded.dtype, pd.CategoricalDtype):
+        # Mapping a categorical column maps its categories; fillna needs plain floats
+        encoded = encoded.astype(float)
+    unknown = mapping.get("Unknown")
+    return encoded if unknown is None else encoded.fillna(unknown)
+
+
+def encode_revenue(
+    df: pd.DataFrame, category_dict: dict, location_dict: dict, platform_dict: dict
+) -> pd.DataFrame:
+    """
+    Builds the revenue model input from a frame with the RevenuePayload columns.
+    """
+    return pd.DataFrame(
+        {
+            "Price": df["Price"].to_numpy(dtype=float),
+            "Category_By_Price": encode_with_unknown(df["Category"], category_dict).to_numpy(),
+            "Location_By_Price": encode_with_unknown(df["Location"], location_dict).to_numpy(),
+            "Platform_By_Price": encode_with_unknown(df["Platform"], platform_dict).to_numpy(),
+            "Day": df["Day"].to_numpy(dtype=float),
+        },
+        columns=REVENUE_FEATURES,
+    )
+
+
+def score_revenue(
+    df: pd.DataFrame, model, scaler, category_dict: dict, location_dict: dict, platform_dict: dict,
+    compiled=None,
+) -> np.ndarray:
+    """
+    Scores every row with the folded linear model when there is one,
+    otherwise with a single scaler.transform and model.predict call.
+    """
+    if compiled is not None:
+        return compiled.predict(df)
+    input_df = encode_revenue(df, category_dict, location_dict, platform_dict)
+    return model.predict(scaler.transform(input_df))
+
+
+def score_discount(records: list[dict] | pd.DataFrame, model, compiled=None) -> np.ndarray:
+    """
+    Scores DiscountPayload dicts, or a frame with their columns, with the
+    compiled model when there is one, otherwise with a single call to the
+    discount pipeline.
+    """
+    if isinstance(records, pd.DataFrame):
+        return compiled.predict(records) if compiled is not None else model.predict(records[DISCOUNT_FEATURES])
+    if compiled is not None:
+        return compiled.predict_records(records)
+    return model.predict(pd.DataFrame(records, columns=DISCOUNT_FEATURES))
+
@@ -0,0 +1,138 @@
+import hashlib
+import json
+import os
+import threading
+from dataclasses import dataclass
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+
+import pandas as pd
+
+from backend.data import load_sales
+
+# Columns read from the sales dataset
+METADATA_COLUMNS = ["Product_Name", "Category", "Location", "Platform", "Price", "Units_Sold"]
+
+
+def build_metadata(df: pd.DataFrame) -> dict:
+    """
+    Builds the /metadata payload from the sales DataFrame with grouped
+    aggregations instead of filtering the frame once per product.
+    """
+    if df.empty:
+        raise ValueError("The products DataFrame is empty.")
+
+    product_list = df["Product_Name"].unique().tolist()
+    stats = df.groupby("Product_Name", sort=False, observed=True).agg(
+        avg_price=("Price", "mean"),
+        avg_units_sold=("Units_Sold", "mean"),
+    )
+
+    # Most frequent category per product. Ties resolve to the alphabetically
+    # first category, which is what Series.mode().iloc[0] returns.
+    category_counts = (
+        df.groupby(["Product_Name", "Category"], sort=False, observed=True)
+        .size()
+        .reset_index(name="count")
+        .sort_values(["count", "Category"], ascending=[False, True], kind="stable")
+        .drop_duplicates("Product_Name")
+        .set_index("Product_Name")["Category"]
+    )
+
+    product_info = {
+        name: {
+            "category": category_counts[name],
+            "avg_price": float(stats.at[name, "avg_price"]),
+            "avg_units_sold": float(stats.at[name, "avg_units_sold"]),
+        }
+        for name in product_list
+    }
+
+    return {
+        "products": product_list,
+        "product_info": product_info,
+        "categories": sorted(df["Category"].unique().tolist()),
+        "locations": sorted(df["Location"].unique().tolist()),
+        "platforms": sorted(df["Platform"].unique().tolist()),
+    }
+
+
+@dataclass(frozen=True)
+class MetadataSnapshot:
+    """A serialized /metadata response together with its validators."""
+
+    body: bytes
+    etag: str
+    last_modified: str
+    mtime: float
+    signature: tuple
+
+    def not_modified(self, headers) -> bool:
+        """
+        Evaluates If-None-Match / If-Modified-Since request headers.
+        If-None-Match takes precedence, as required by RFC 9110.
+        """
+        if_none_match = headers.get("if-none-match")
+        if if_none_match is not None:
+            tags = [tag.strip() for tag in if_none_match.split(",")]
+            return "*" in tags or any(
+                tag.removeprefix("W/") == self.etag for tag in tags
+            )
+
+        if_modified_since = headers.get("if-modified-since")
+        if if_modified_since is not None:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return int(self.mtime) <= since
+
+        return False
+
+
+class MetadataIndex:
+    """
+    Keeps the /metadata response for the dataset at `data_path` in memory.
+
+    The snapshot is rebuilt when the file's mtime or size changes. A new
+    snapshot is fully built before it replaces the old one, so readers always
+    see a complete response.
+    """
+
+    def __init__(self, data_path: Path):
+        self.data_path = Path(data_path)
+        self._lock = threading.Lock()
+        self._snapshot = None
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._snapshot is not None
+
+    def _signature(self) -> tuple:
+        stat = os.stat(self.data_path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _build(self, signature: tuple) -> MetadataSnapshot:
+        df = load_sales(self.data_path, columns=METADATA_COLUMNS)
+        body = json.dumps(build_metadata(df), separators=(",", ":")).encode("utf-8")
+        mtime = signature[0] / 1e9
+        return MetadataSnapshot(
+            body=body,
+            etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+            last_modified=formatdate(mtime, usegmt=True),
+            mtime=mtime,
+            signature=signature,
+        )
+
+    def get(self) -> MetadataSnapshot:
+        """Returns the current snapshot, rebuilding it if the dataset changed."""
+        signature = self._signature()
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.signature == signature:
+            return snapshot
+
+        with self._lock:
+            # Another thread may have rebuilt it while we waited for the lock
+            if self._snapshot is None or self._snapshot.signature != signature:
+                self._snapshot = self._build(signature)
+            return self._snapshot
@@ -0,0 +1,202 @@
+import bisect
+import threading
+import time
+
+# Powers of two, for sizes and queue depths
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+# Seconds, from half a millisecond to ten seconds
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Cumulative bucket counts of observed values, Prometheus style."""
+
+    def __init__(self, buckets=SIZE_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)  # last one is +Inf
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self._counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._sum += value
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+        cumulative, buckets = 0, {}
+        for bound, count in zip([*map(str, self.buckets), "+Inf"], counts):
+            cumulative += count
+            buckets[bound] = cumulative
+        return {"buckets": buckets, "count": cumulative, "sum": total}
+
+
+class Counter:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+
+class Gauge:
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value: float):
+        self.value = value
+
+
+class Family:
+    """A metric with labels; `labels(...)` returns (and keeps) the child for those label values."""
+
+    def __init__(self, name: str, kind: str, help: str, labelnames: tuple, factory):
+        self.name = name
+        self.kind = kind
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.children = {}
+        self._factory = factory
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        child = self.children.get(values)
+        if child is None:
+            with self._lock:
+                child = self.children.setdefault(values, self._factory())
+        return child
+
+
+def _format_labels(names, values, extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class MetricsRegistry:
+    """
+    Counters, gauges and histograms rendered in the Prometheus text format.
+
+    Recording is a dict lookup plus a locked add, with no allocation once a
+    label combination has been seen. Collectors are called at scrape time
+    for values that live elsewhere (cache counters, executor histograms) and
+    return (name, kind, help, [(labels dict, value or Histogram)]).
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.families = {}
+        self.collectors = []
+
+    def _family(self, name, kind, help, labelnames, factory) -> Family:
+        if name not in self.families:
+            self.families[name] = Family(name, kind, help, labelnames, factory)
+        return self.families[name]
+
+    def counter(self, name: str, help: str, labelnames=()) -> Family:
+        return self._family(name, "counter", help, labelnames, Counter)
+
+    def gauge(self, name: str, help: str, labelnames=()) -> Family:
+        return self._family(name, "gauge", help, labelnames, Gauge)
+
+    def histogram(self, name: str, help: str, labelnames=(), buckets=LATENCY_BUCKETS) -> Family:
+        return self._family(name, "histogram", help, labelnames, lambda: Histogram(buckets))
+
+    def add_collector(self, collector):
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for family in self.families.values():
+            samples = [(dict(zip(family.labelnames, values)), child) for values, child in list(family.children.items())]
+            self._render(lines, family.name, family.kind, family.help, samples)
+        for collector in self.collectors:
+            for name, kind, help, samples in collector():
+                self._render(lines, name, kind, help, samples)
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _render(lines: list, name: str, kind: str, help: str, samples: list):
+        lines.append(f"# HELP {name} {help}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            names, values = list(labels), list(labels.values())
+            if isinstance(value, Histogram):
+                snapshot = value.snapshot()
+                for bound, count in snapshot["buckets"].items():
+                    le = f'le="{bound}"'
+                    lines.append(f"{name}_bucket{_format_labels(names, values, le)} {count}")
+                lines.append(f"{name}_sum{_format_labels(names, values)} {snapshot['sum']}")
+                lines.append(f"{name}_count{_format_labels(names, values)} {snapshot['count']}")
+            else:
+                number = value.value if isinstance(value, (Counter, Gauge)) else value
+                lines.append(f"{name}{_format_labels(names, values)} {number}")
+
+
+class StageTimer:
+    """
+    Records how long each stage of a request takes, e.g.
+
+        timer = StageTimer()
+        X = encode(rows); timer.mark("encode")
+        y = model.predict(X); timer.mark("predict")
+
+    `stages` is a list of (stage, seconds); it is plain data so it can be
+    returned from a worker process. `start` defaults to now.
+    """
+
+    __slots__ = ("stages", "_last")
+
+    def __init__(self, start: float | None = None):
+        self.stages = []
+        self._last = time.perf_counter() if start is None else start
+
+    def mark(self, stage: str):
+        now = time.perf_counter()
+        self.stages.append((stage, now - self._last))
+        self._last = now
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware counting requests and timing them per FastAPI route template
+    (e.g. /predict/price/horizon, not the full URL). The start time is left in
+    scope["state"]["request_start"] for handlers that time their own stages.
+    """
+
+    def __init__(self, app, registry: MetricsRegistry):
+        self.app = app
+        self.requests = registry.counter(
+            "http_requests_total", "HTTP requests by method, route and status.", ("method", "route", "status")
+        )
+        self.latency = registry.histogram(
+            "http_request_duration_seconds", "HTTP request latency by method and route.", ("method", "route")
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        scope.setdefault("state", {})["request_start"] = start
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            path = route.path if route is not None else "unmatched"
+            self.requests.labels(scope["method"], path, status).inc()
+            self.latency.labels(scope["method"], path).observe(time.perf_counter() - start)
@@ -0,0 +1,10 @@
+from typing import Any
+
+from pydantic import BaseModel
+
+
+# A row of a batch request that could not be scored.
+# `index` is the position of the row in the submitted array / NDJSON stream.
+class BatchRowError(BaseModel):
+    index: int
+    detail: list[Any]
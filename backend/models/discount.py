@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from .batch import BatchRowError
 
 
 # Define the data model for the discount prediction endpoint.
@@ -13,3 +14,11 @@ class DiscountPayload(BaseModel):
 
 class DiscountPredictionResult(BaseModel):
     predicted_discount: float
+
+class DiscountBatchItem(BaseModel):
+    index: int
+    predicted_discount: float
+
+class DiscountBatchResult(BaseModel):
+    predictions: list[DiscountBatchItem]
+    errors: list[BatchRowError]
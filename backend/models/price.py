@@ -0,0 +1,21 @@
+from pydantic import BaseModel, Field
+
+from .batch import BatchRowError
+
+
+class PricePayload(BaseModel):
+    product: str = Field(..., description="Product name (e.g., 'Vitamin C')")
+    year: int = Field(..., description="Target year of the forecast")
+    # Limit Month between 1 and 12
+    month: int = Field(..., ge=1, le=12, description="Month must be between 1 and 12")
+
+class PriceBatchItem(BaseModel):
+    index: int
+    product: str
+    year: int
+    month: int
+    predicted_price: float
+
+class PriceBatchResult(BaseModel):
+    predictions: list[PriceBatchItem]
+    errors: list[BatchRowError]
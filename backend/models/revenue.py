@@ -1,4 +1,5 @@
 from pydantic import BaseModel, Field
+from .batch import BatchRowError
 
 
 class RevenuePayload(BaseModel):
@@ -15,3 +16,11 @@ class RevenuePayload(BaseModel):
 
 class RevenuePredictionResult(BaseModel):
     predicted_revenue: float
+
+class RevenueBatchItem(BaseModel):
+    index: int
+    predicted_revenue: float
+
+class RevenueBatchResult(BaseModel):
+    predictions: list[RevenueBatchItem]
+    errors: list[BatchRowError]
@@ -0,0 +1,22 @@
+from datetime import date
+
+from pydantic import BaseModel, Field
+
+
+# One weekly sales row, with the same columns as Supplement_Sales_Weekly_Expanded.csv
+class SalesRecord(BaseModel):
+    Date: date
+    Product_Name: str
+    Category: str
+    Units_Sold: int = Field(..., ge=0)
+    Price: float = Field(..., gt=0)
+    Revenue: float
+    Discount: float = Field(..., ge=0, le=1)
+    Units_Returned: int = Field(..., ge=0)
+    Location: str
+    Platform: str
+
+class AppendResult(BaseModel):
+    appended: int
+    affected_products: list[str]
+    version: str
@@ -0,0 +1,11 @@
+from pydantic import BaseModel, Field
+
+
+# Loads a model file as a named version (e.g. "lasso", "v2") of the revenue or discount model
+class LoadVersionRequest(BaseModel):
+    name: str = Field(..., min_length=1, max_length=64, pattern=r"^[A-Za-z0-9_.\-]+$")
+    path: str = Field(..., description="Model file (.joblib), absolute or relative to the project root")
+    activate: bool = Field(False, description="Make it the default version once it is warm")
+
+class ActivateVersionRequest(BaseModel):
+    name: str
@@ -0,0 +1,54 @@
+import argparse
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from backend.data import load_sales
+from backend.price_prediction_model.artifacts import (
+    artifacts_from_state, artifacts_lock, latest_version, load_price_artifacts, save_price_artifacts,
+)
+from backend.price_prediction_model.generate_models import DATA_PATH, PRICE_ARTIFACTS_DIR
+from backend.price_prediction_model.state import PRICE_COLUMNS, PriceTrainingState, append_sales_csv
+
+
+def append_sales(new_rows: pd.DataFrame, data_path: Path, artifacts_dir: Path, write_data: bool = True):
+    """
+    Añade nuevas filas de ventas: actualiza de forma incremental los agregados
+    mensuales, los rezagos y las estadísticas de los productos afectados, y
+    guarda una nueva versión de los artefactos.
+    Devuelve (versión, productos afectados).
+    """
+    # Mismo cerrojo que /data/append de la API: las altas concurrentes se aplican en orden
+    with artifacts_lock(artifacts_dir):
+        if latest_version(artifacts_dir):
+            state = load_price_artifacts(artifacts_dir, with_training=True).training
+        else:
+            state = PriceTrainingState.from_sales(load_sales(data_path, columns=PRICE_COLUMNS))
+
+        state, affected = state.append(new_rows)
+        size = append_sales_csv(new_rows, data_path) if write_data else None
+        try:
+            version = save_price_artifacts(artifacts_from_state(state, "pending"), artifacts_dir, source=data_path)
+        except BaseException:
+            # Sin artefactos nuevos se quitan las filas del CSV, para poder reintentar
+            if size is not None:
+                os.truncate(data_path, size)
+            raise
+    return version, affected
+
+
+# --- Proceso principal ---
+# Uso: python -m backend.price_prediction_model.append nuevas_ventas.csv
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Añade ventas semanales y actualiza los modelos de precio.")
+    parser.add_argument("rows", type=Path, help="CSV con las nuevas filas (mismas columnas que el dataset)")
+    parser.add_argument("--data", type=Path, default=DATA_PATH, help="CSV de ventas semanales")
+    parser.add_argument("--output", type=Path, default=PRICE_ARTIFACTS_DIR, help="Directorio de artefactos")
+    parser.add_argument("--no-data", action="store_true", help="No añadir las filas al CSV de ventas")
+    args = parser.parse_args()
+
+    new_rows = pd.read_csv(args.rows)
+    version, affected = append_sales(new_rows, args.data, args.output, write_data=not args.no_data)
+    print(f"{len(new_rows)} filas añadidas. Productos actualizados: {', '.join(affected) or 'ninguno'}")
+    print(f"Artefactos guardados en: {args.output / version} (versión {version})")
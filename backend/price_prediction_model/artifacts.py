@@ -0,0 +1,241 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # Windows: writers are only serialized within a process
+
+from backend.utils import FEATURE_COLS
+from .feature_store import PriceFeatureStore
+from .forecast import PriceForecaster
+from .state import PriceTrainingState
+from .table import PriceForecastTable
+
+# Bump when the layout of the artifact directory changes
+ARTIFACT_FORMAT = 2
+ARRAY_FILES = ("state.npy", "last_period.npy", "coef.npy", "intercept.npy")
+# Monthly aggregates and regression statistics, only needed to append new data
+TRAINING_FILE = "training.npz"
+LATEST_FILE = "LATEST"
+LOCK_FILE = ".lock"
+
+
+class ArtifactError(RuntimeError):
+    """Raised when a price artifact directory is missing or inconsistent."""
+
+
+@dataclass
+class PriceArtifacts:
+    """Everything the price endpoints need, without the training DataFrames."""
+
+    version: str
+    store: PriceFeatureStore
+    coef: np.ndarray
+    intercept: np.ndarray
+    catalog: list[str]
+    training: PriceTrainingState | None = None
+    # Optional precomputed forecasts, see `PriceForecastTable`
+    table: PriceForecastTable | None = None
+    forecaster: PriceForecaster = field(init=False)
+
+    def __post_init__(self):
+        self.forecaster = PriceForecaster(self.store, self.coef, self.intercept)
+
+    def predict(self, product: str, years, months) -> np.ndarray:
+        if self.table is None:
+            return self.predict_live(product, years, months)
+        i = self.store.index[product]
+        values, inside = self.table.lookup(np.full(len(years), i), years, months)
+        if not inside.all():
+            values[~inside] = self.predict_live(product, np.asarray(years)[~inside], np.asarray(months)[~inside])
+        return values
+
+    def predict_live(self, product: str, years, months) -> np.ndarray:
+        """`predict` computed from the features, without the forecast table."""
+        i = self.store.index[product]
+        return self.store.feature_matrix(product, years, months) @ self.coef[i] + self.intercept[i]
+
+    def predict_rows(self, products, years, months) -> np.ndarray:
+        """Scores targets of many products at once; unknown products get NaN."""
+        rows = np.fromiter((self.store.index.get(product, -1) for product in products), dtype=np.intp,
+                           count=len(products))
+        years, months = np.asarray(years), np.asarray(months)
+        if self.table is None:
+            predictions, live = np.full(len(rows), np.nan), rows >= 0
+        else:
+            predictions, inside = self.table.lookup(rows, years, months)
+            live = ~inside & (rows >= 0)
+        rows = rows[live]
+        features = self.store.feature_rows(rows, years[live], months[live])
+        predictions[live] = np.einsum("ij,ij->i", features, self.coef[rows]) + self.intercept[rows]
+        return predictions
+
+def artifacts_from_state(state: PriceTrainingState, version: str) -> PriceArtifacts:
+    return PriceArtifacts(
+        version=version,
+        store=state.store,
+        coef=state.coef,
+        intercept=state.intercept,
+        catalog=state.catalog,
+        training=state,
+    )
+
+
+def build_price_artifacts(df: pd.DataFrame, version: str = "in-memory") -> PriceArtifacts:
+    """Trains the per-product price models from the raw sales DataFrame."""
+    return artifacts_from_state(PriceTrainingState.from_sales(df), version)
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def save_price_artifacts(artifacts: PriceArtifacts, root: Path, source: Path | None = None) -> str:
+    """
+    Writes the artifacts to `root/<version>/` and points `root/LATEST` at it.
+
+    The version is derived from the content hashes, so rebuilding from the same
+    data yields the same version. The directory is written to a temporary
+    location first and renamed into place.
+    """
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    tmp_dir = Path(tempfile.mkdtemp(prefix=".build-", dir=root))
+
+    try:
+        arrays = {
+            "state.npy": artifacts.store.state,
+            "last_period.npy": artifacts.store.last_period,
+            "coef.npy": artifacts.coef,
+            "intercept.npy": artifacts.intercept,
+        }
+        for name, array in arrays.items():
+            np.save(tmp_dir / name, np.ascontiguousarray(array))
+
+        meta = {
+            "format": ARTIFACT_FORMAT,
+            "products": artifacts.store.products,
+            "catalog": artifacts.catalog,
+            "min_year": artifacts.store.min_year,
+            "feature_cols": FEATURE_COLS,
+        }
+        (tmp_dir / "meta.json").write_text(json.dumps(meta, indent=2, ensure_ascii=False))
+        names = [*ARRAY_FILES, "meta.json"]
+        if artifacts.training is not None:
+            np.savez(tmp_dir / TRAINING_FILE, **artifacts.training.to_arrays())
+            names.append(TRAINING_FILE)
+
+        files = {name: _sha256(tmp_dir / name) for name in names}
+        version = hashlib.sha256("".join(files[name] for name in sorted(files)).encode()).hexdigest()[:12]
+        manifest = {
+            "version": version,
+            "format": ARTIFACT_FORMAT,
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "source": {"path": str(source), "sha256": _sha256(source)} if source else None,
+            "files": files,
+        }
+        (tmp_dir / "manifest.json").write_text(json.dumps(manifest, indent=2))
+
+        target = root / version
+        if target.exists():
+            shutil.rmtree(tmp_dir)
+        else:
+            os.replace(tmp_dir, target)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    latest_tmp = root / f".{LATEST_FILE}.tmp"
+    latest_tmp.write_text(version)
+    os.replace(latest_tmp, root / LATEST_FILE)
+    return version
+
+
+@contextmanager
+def artifacts_lock(root: Path):
+    """
+    Exclusive lock on the artifact directory, held by whoever derives a new
+    version from the latest one (the API's /data/append in any worker, the
+    append script), so that concurrent appends are applied one after another.
+    """
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    with open(root / LOCK_FILE, "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def latest_version(root: Path) -> str | None:
+    latest = Path(root) / LATEST_FILE
+    return latest.read_text().strip() if latest.exists() else None
+
+
+def load_price_artifacts(root: Path, version: str | None = None, verify: bool = True,
+                         with_training: bool = False) -> PriceArtifacts:
+    """
+    Loads a saved artifact version (the latest one by default).
+    Arrays are memory-mapped read-only. The training state, whose size grows
+    with the dataset, is only read, and with `verify` checked against the
+    manifest, when `with_training` is set.
+    """
+    version = version or latest_version(root)
+    if version is None:
+        raise ArtifactError(f"No price artifacts found in {root}")
+
+    directory = Path(root) / version
+    manifest_path = directory / "manifest.json"
+    if not manifest_path.exists():
+        raise ArtifactError(f"Price artifact version '{version}' not found in {root}")
+    manifest = json.loads(manifest_path.read_text())
+    if manifest.get("format") != ARTIFACT_FORMAT:
+        raise ArtifactError(f"Unsupported price artifact format: {manifest.get('format')}")
+
+    if verify:
+        names = [*ARRAY_FILES, "meta.json", *([TRAINING_FILE] if with_training else [])]
+        for name in names:
+            expected = manifest["files"].get(name)
+            if expected is not None and _sha256(directory / name) != expected:
+                raise ArtifactError(f"Checksum mismatch for {directory / name}")
+
+    meta = json.loads((directory / "meta.json").read_text())
+    arrays = {name: np.load(directory / name, mmap_mode="r") for name in ARRAY_FILES}
+    store = PriceFeatureStore(
+        meta["products"], arrays["state.npy"], arrays["last_period.npy"], meta["min_year"]
+    )
+    training = None
+    if with_training:
+        if TRAINING_FILE not in manifest["files"]:
+            raise ArtifactError(f"Price artifact version '{version}' has no training state")
+        with np.load(directory / TRAINING_FILE) as training_arrays:
+            training = PriceTrainingState.from_arrays(
+                training_arrays, store, arrays["coef.npy"], arrays["intercept.npy"], meta["catalog"]
+            )
+
+    return PriceArtifacts(
+        version=manifest["version"],
+        store=store,
+        coef=arrays["coef.npy"],
+        intercept=arrays["intercept.npy"],
+        catalog=meta["catalog"],
+        training=training,
+    )
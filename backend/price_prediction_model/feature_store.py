@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+
+# Number of monthly Price_Avg values kept per product (enough for Price_Lag_12 and Price_MA_12)
+HISTORY_LENGTH = 12
+
+# Column layout of PriceFeatureStore.state
+HISTORY_COLS = slice(0, HISTORY_LENGTH)
+LAG_1, LAG_3, LAG_12, MA_6, MA_12 = range(HISTORY_LENGTH, HISTORY_LENGTH + 5)
+
+
+class PriceFeatureStore:
+    """
+    Per-product state needed to build the price model features.
+
+    `state` is a (n_products, 17) float64 array: the last 12 Price_Avg values
+    (oldest first) followed by Price_Lag_1, Price_Lag_3, Price_Lag_12,
+    Price_MA_6 and Price_MA_12. Products with fewer than 12 months of
+    features are left-padded with NaN.
+    """
+
+    def __init__(self, products: list[str], state: np.ndarray, last_period: np.ndarray, min_year: int):
+        self.products = list(products)
+        self.index = {product: i for i, product in enumerate(self.products)}
+        self.state = state
+        self.last_period = last_period
+        self.min_year = int(min_year)
+
+    @classmethod
+    def from_features(cls, df_features: pd.DataFrame, min_year: int) -> "PriceFeatureStore":
+        """
+        Builds the store from the output of `create_features`, which is already
+        sorted by product and date.
+        """
+        tail = df_features.groupby("Product_Name", sort=False, observed=True).tail(HISTORY_LENGTH)
+        products = tail["Product_Name"].unique().tolist()
+
+        state = np.full((len(products), HISTORY_LENGTH + 5), np.nan)
+        last_period = np.zeros((len(products), 2), dtype=np.int64)
+        for i, (_, group) in enumerate(tail.groupby("Product_Name", sort=False, observed=True)):
+            prices = group["Price_Avg"].to_numpy(dtype=float)
+            state[i, HISTORY_LENGTH - len(prices):HISTORY_LENGTH] = prices
+            last_period[i] = group[["Year", "Month"]].to_numpy()[-1]
+
+        _derive_lags(state)
+        return cls(products, state, last_period, min_year)
+
+    def with_products(self, updates: dict) -> "PriceFeatureStore":
+        """
+        Returns a new store where every product in `updates`, given as
+        {product: (prices, (year, month))} with its Price_Avg values in
+        chronological order, gets a fresh state row. Unknown products are appended.
+        """
+        products = self.products + [product for product in updates if product not in self.index]
+        index = {product: i for i, product in enumerate(products)}
+        state = np.full((len(products), HISTORY_LENGTH + 5), np.nan)
+        state[:len(self.products)] = self.state
+        last_period = np.zeros((len(products), 2), dtype=np.int64)
+        last_period[:len(self.products)] = self.last_period
+
+        rows = [index[product] for product in updates]
+        for i, (prices, period) in zip(rows, updates.values()):
+            prices = np.asarray(prices, dtype=float)[-HISTORY_LENGTH:]
+            state[i] = np.nan
+            state[i, HISTORY_LENGTH - len(prices):HISTORY_LENGTH] = prices
+            last_period[i] = period
+        _derive_lags(state, rows)
+
+        return PriceFeatureStore(products, state, last_period, self.min_year)
+
+    def __contains__(self, product: str) -> bool:
+        return product in self.index
+
+    def history(self, product: str) -> np.ndarray:
+        return self.state[self.index[product], HISTORY_COLS]
+
+    def feature_matrix(self, product: str, years, months) -> np.ndarray:
+        """
+        Returns the (n, 12) feature matrix for several (year, month) targets of
+        one product, with columns in `FEATURE_COLS` order.
+        """
+        return self.feature_rows(np.full(len(years), self.index[product]), years, months)
+
+    def feature_rows(self, rows, years, months) -> np.ndarray:
+        """Like `feature_matrix`, with a state row (product index) per target."""
+        years = np.asarray(years, dtype=float)
+        months = np.asarray(months, dtype=float)
+        years_from_start = years - self.min_year
+        time_index = years_from_start * 12 + months
+
+        features = np.empty((len(years), 12))
+        features[:, 0] = years
+        features[:, 1] = months
+        features[:, 2] = np.sin(2 * np.pi * months / 12)
+        features[:, 3] = np.cos(2 * np.pi * months / 12)
+        features[:, 4] = years_from_start
+        features[:, 5] = time_index
+        features[:, 6] = time_index ** 2
+        features[:, 7:] = self.state[rows, LAG_1:]
+        return features
+
+    def feature_vector(self, product: str, year: int, month: int) -> np.ndarray:
+        return self.feature_matrix(product, [year], [month])[0]
+
+
+def _derive_lags(state: np.ndarray, rows=slice(None)):
+    """Fills the lag and moving-average columns of `state` from its history columns."""
+    history = state[rows, HISTORY_COLS]
+    state[rows, LAG_1] = history[:, -1]
+    state[rows, LAG_3] = history[:, -3]
+    state[rows, LAG_12] = history[:, -12]
+    state[rows, MA_6] = history[:, -6:].mean(axis=1)
+    state[rows, MA_12] = history[:, -12:].mean(axis=1)
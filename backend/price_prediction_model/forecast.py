@@ -0,0 +1,68 @@
+from functools import lru_cache
+
+import numpy as np
+
+from .feature_store import HISTORY_LENGTH, PriceFeatureStore
+
+# Longest trajectory served by /predict/price/horizon (100 years of months)
+MAX_HORIZON = 1200
+
+
+class PriceForecaster:
+    """
+    Multi-step price forecasts for the per-product linear models.
+    Row i of `coef` / `intercept` holds the model of `store.products[i]`.
+
+    Every predicted Price_Avg is fed back into the lag and moving-average
+    features of the next month, so month t+k is forecast from the months
+    before it instead of from the last observed lags. Trajectories are cached
+    by (product, horizon).
+    """
+
+    def __init__(self, store: PriceFeatureStore, coef: np.ndarray, intercept: np.ndarray, cache_size: int = 1024):
+        self.store = store
+        self.coef = coef
+        self.intercept = intercept
+        self.trajectory = lru_cache(maxsize=cache_size)(self._trajectory)
+
+    def horizon(self, product: str, year: int, month: int) -> int:
+        """Number of months between the last observed month of `product` and the target."""
+        last_year, last_month = self.store.last_period[self.store.index[product]]
+        return (year - int(last_year)) * 12 + (month - int(last_month))
+
+    def _trajectory(self, product: str, horizon: int) -> tuple:
+        """
+        Returns (years, months, prices) for the `horizon` months that follow
+        the last observed month of `product`.
+        """
+        i = self.store.index[product]
+        coef, intercept = self.coef[i], self.intercept[i]
+        last_year, last_month = self.store.last_period[i]
+
+        # Calendar features do not depend on the predictions: score them in one go
+        periods = int(last_year) * 12 + int(last_month) - 1 + np.arange(1, horizon + 1)
+        years, months = periods // 12, periods % 12 + 1
+        calendar = self.store.feature_matrix(product, years, months)[:, :7] @ coef[:7] + intercept
+
+        # Lag terms: Price_Lag_1, Price_Lag_3, Price_Lag_12, Price_MA_6, Price_MA_12
+        lag_1, lag_3, lag_12, ma_6, ma_12 = coef[7:]
+        prices = np.empty(HISTORY_LENGTH + horizon)
+        prices[:HISTORY_LENGTH] = self.store.history(product)
+        sum_6 = prices[HISTORY_LENGTH - 6:HISTORY_LENGTH].sum()
+        sum_12 = prices[:HISTORY_LENGTH].sum()
+
+        for step in range(horizon):
+            t = HISTORY_LENGTH + step
+            prices[t] = (
+                calendar[step]
+                + lag_1 * prices[t - 1]
+                + lag_3 * prices[t - 3]
+                + lag_12 * prices[t - 12]
+                + ma_6 * sum_6 / 6
+                + ma_12 * sum_12 / 12
+            )
+            # Slide the moving-average windows forward by one month
+            sum_6 += prices[t] - prices[t - 6]
+            sum_12 += prices[t] - prices[t - 12]
+
+        return years, months, prices[HISTORY_LENGTH:]
@@ -0,0 +1,39 @@
+import argparse
+import os
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+from backend.data import load_sales
+from backend.price_prediction_model.artifacts import build_price_artifacts, save_price_artifacts
+from backend.price_prediction_model.state import PRICE_COLUMNS
+
+# --- Configuración de rutas (debe coincidir con tu .env) ---
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+load_dotenv(dotenv_path=PROJECT_ROOT / ".env")
+
+DATA_PATH = PROJECT_ROOT / os.getenv("DATA_PATH", "./resources/data/Supplement_Sales_Weekly_Expanded.csv")
+PRICE_ARTIFACTS_DIR = PROJECT_ROOT / os.getenv("PRICE_ARTIFACTS_DIR", "./resources/price")
+
+
+def generate_price_models(data_path: Path, output_dir: Path) -> str:
+    """
+    Entrena los modelos de precio por producto y guarda los artefactos
+    versionados (coeficientes, estado de rezagos y manifiesto) en `output_dir`.
+    """
+    df = load_sales(data_path, columns=PRICE_COLUMNS)
+    artifacts = build_price_artifacts(df)
+    return save_price_artifacts(artifacts, output_dir, source=data_path)
+
+
+# --- Proceso principal ---
+# Uso: python -m backend.price_prediction_model.generate_models [--data ruta.csv] [--output dir]
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera los artefactos de los modelos de precio.")
+    parser.add_argument("--data", type=Path, default=DATA_PATH, help="CSV de ventas semanales")
+    parser.add_argument("--output", type=Path, default=PRICE_ARTIFACTS_DIR, help="Directorio de artefactos")
+    args = parser.parse_args()
+
+    print("Iniciando el entrenamiento de los modelos de precio...")
+    version = generate_price_models(args.data, args.output)
+    print(f"Artefactos guardados en: {args.output / version} (versión {version})")
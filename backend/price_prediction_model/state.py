@@ -0,0 +1,245 @@
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from backend.utils import prepare_data, create_features
+from .feature_store import PriceFeatureStore
+from .training import STAT_ARRAYS, RegressionStats
+
+# Columns of the sales dataset the price models use
+PRICE_COLUMNS = ["Product_Name", "Date", "Price"]
+
+
+@dataclass(frozen=True)
+class MonthlySeries:
+    """
+    Monthly price aggregates of one product, sorted by period.
+    A period is `year * 12 + month - 1`; months whose prices are all missing
+    keep a count of 0, so their Price_Avg is NaN as in `create_features`.
+    """
+
+    period: np.ndarray
+    price_sum: np.ndarray
+    price_count: np.ndarray
+
+    @property
+    def price_avg(self) -> np.ndarray:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.price_count > 0, self.price_sum / self.price_count, np.nan)
+
+    def merge(self, other: "MonthlySeries") -> "MonthlySeries":
+        period = np.union1d(self.period, other.period)
+        price_sum = np.zeros(len(period))
+        price_count = np.zeros(len(period))
+        for series in (self, other):
+            position = np.searchsorted(period, series.period)
+            price_sum[position] += series.price_sum
+            price_count[position] += series.price_count
+        return MonthlySeries(period, price_sum, price_count)
+
+
+def monthly_aggregates(df_prepared: pd.DataFrame) -> dict[str, MonthlySeries]:
+    """Sum and count of the Price column per (product, year, month)."""
+    grouped = (
+        df_prepared.groupby(["Product_Name", "Year", "Month"], sort=True, observed=True)["Price"]
+        .agg(["sum", "count"])
+        .reset_index()
+    )
+    grouped["Period"] = grouped["Year"].astype(np.int64) * 12 + grouped["Month"] - 1
+    return {
+        product: MonthlySeries(
+            group["Period"].to_numpy(dtype=np.int64),
+            group["sum"].to_numpy(dtype=float),
+            group["count"].to_numpy(dtype=float),
+        )
+        for product, group in grouped.groupby("Product_Name", sort=False, observed=True)
+    }
+
+
+def product_features(series: MonthlySeries | None, min_year: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    The `create_features` rows of one product, built from its monthly series.
+    Returns (X, y, period) for the rows that survive `dropna`, with X in
+    FEATURE_COLS order.
+    """
+    if series is None:
+        return np.empty((0, 12)), np.empty(0), np.empty(0, dtype=np.int64)
+
+    prices = series.price_avg
+    years = series.period // 12
+    months = series.period % 12 + 1
+    time_index = (years - min_year) * 12 + months
+
+    X = np.full((len(prices), 12), np.nan)
+    X[:, 0] = years
+    X[:, 1] = months
+    X[:, 2] = np.sin(2 * np.pi * months / 12)
+    X[:, 3] = np.cos(2 * np.pi * months / 12)
+    X[:, 4] = years - min_year
+    X[:, 5] = time_index
+    X[:, 6] = time_index ** 2
+    for column, lag in ((7, 1), (8, 3), (9, 12)):
+        X[lag:, column] = prices[:-lag]
+    for column, window in ((10, 6), (11, 12)):
+        if len(prices) >= window:
+            X[window - 1:, column] = np.lib.stride_tricks.sliding_window_view(prices, window).mean(axis=1)
+
+    keep = ~np.isnan(X).any(axis=1) & ~np.isnan(prices)
+    return X[keep], prices[keep], series.period[keep]
+
+
+class PriceTrainingState:
+    """
+    Everything needed to update the price models when new weekly sales arrive:
+    the monthly aggregates of every product, the regression sufficient
+    statistics and the serving state (feature store and coefficients).
+
+    `append` returns a new state and leaves this one untouched, so a running
+    app can keep serving the old models until it swaps in the new ones.
+    """
+
+    def __init__(self, monthly: dict, stats: RegressionStats, store: PriceFeatureStore,
+                 coef: np.ndarray, intercept: np.ndarray, catalog: list[str], min_year: int):
+        self.monthly = monthly
+        self.stats = stats
+        self.store = store
+        self.coef = coef
+        self.intercept = intercept
+        self.catalog = catalog
+        self.min_year = int(min_year)
+
+    @classmethod
+    def from_sales(cls, df: pd.DataFrame) -> "PriceTrainingState":
+        """Builds the state from the raw sales DataFrame."""
+        df_prepared = prepare_data(df)
+        df_features = create_features(df_prepared)
+        min_year = int(df_prepared["Year"].min())
+
+        stats = RegressionStats.from_features(df_features)
+        coef, intercept = stats.solve()
+        store = PriceFeatureStore.from_features(df_features, min_year=min_year)
+        assert store.products == stats.products
+
+        return cls(
+            monthly=monthly_aggregates(df_prepared),
+            stats=stats,
+            store=store,
+            coef=coef,
+            intercept=intercept,
+            catalog=df_prepared["Product_Name"].unique().tolist(),
+            min_year=min_year,
+        )
+
+    def append(self, df_new: pd.DataFrame) -> tuple["PriceTrainingState", list[str]]:
+        """
+        Adds new sales rows. Only the (product, year, month) aggregates the rows
+        fall into are updated; for each affected product the feature rows from
+        the first changed month onwards are removed from its statistics and
+        added back with the new lags and moving averages, then only those
+        products are re-solved.
+
+        Returns the new state and the products whose models changed.
+        """
+        df_prepared = prepare_data(df_new)
+        if df_prepared["Year"].min() < self.min_year:
+            raise ValueError(
+                f"Rows before {self.min_year} change the time index of every product; rebuild the models instead."
+            )
+
+        monthly = dict(self.monthly)
+        stats = self.stats.copy()
+        stats_index = {product: i for i, product in enumerate(stats.products)}
+        store_updates = {}
+        for product, added in monthly_aggregates(df_prepared).items():
+            old = monthly.get(product)
+            merged = added if old is None else old.merge(added)
+            monthly[product] = merged
+
+            X_new, y_new, period_new = product_features(merged, self.min_year)
+            if not len(y_new):
+                # Not enough history to train a model for this product yet
+                continue
+
+            first = added.period.min()
+            if product in stats_index:
+                i = stats_index[product]
+                X_old, y_old, period_old = product_features(old, self.min_year)
+                stats.update(i, X_old[period_old >= first], y_old[period_old >= first], sign=-1.0)
+                stats.update(i, X_new[period_new >= first], y_new[period_new >= first])
+            else:
+                stats_index[product] = stats.add_product(product, X_new, y_new)
+
+            last_year, last_month = divmod(int(period_new[-1]), 12)
+            store_updates[product] = (y_new, (last_year, last_month + 1))
+
+        store = self.store.with_products(store_updates)
+        assert store.products == stats.products
+
+        rows = [store.index[product] for product in store_updates]
+        coef = np.zeros((len(store.products), self.coef.shape[1]))
+        intercept = np.zeros(len(store.products))
+        coef[:len(self.coef)] = self.coef
+        intercept[:len(self.intercept)] = self.intercept
+        if rows:
+            coef[rows], intercept[rows] = stats.solve(rows)
+
+        catalog = self.catalog + [
+            product for product in df_prepared["Product_Name"].unique().tolist() if product not in self.catalog
+        ]
+        state = PriceTrainingState(monthly, stats, store, coef, intercept, catalog, self.min_year)
+        return state, list(store_updates)
+
+    def to_arrays(self) -> dict:
+        """Flat arrays for persisting the training-only part of the state."""
+        products = list(self.monthly)
+        codes = {product: i for i, product in enumerate(self.catalog)}
+        lengths = [len(self.monthly[product].period) for product in products]
+        arrays = {
+            "monthly_product": np.repeat([codes[product] for product in products], lengths),
+            "monthly_period": np.concatenate([self.monthly[product].period for product in products]),
+            "monthly_sum": np.concatenate([self.monthly[product].price_sum for product in products]),
+            "monthly_count": np.concatenate([self.monthly[product].price_count for product in products]),
+        }
+        arrays.update({f"stats_{name}": getattr(self.stats, name) for name in STAT_ARRAYS})
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays, store: PriceFeatureStore, coef: np.ndarray, intercept: np.ndarray,
+                    catalog: list[str]) -> "PriceTrainingState":
+        codes = arrays["monthly_product"]
+        boundaries = np.flatnonzero(np.diff(codes)) + 1
+        monthly = {
+            catalog[int(chunk[0])]: MonthlySeries(period, price_sum, price_count)
+            for chunk, period, price_sum, price_count in zip(
+                np.split(codes, boundaries),
+                np.split(arrays["monthly_period"], boundaries),
+                np.split(arrays["monthly_sum"], boundaries),
+                np.split(arrays["monthly_count"], boundaries),
+            )
+            if len(chunk)
+        }
+        stats = RegressionStats(
+            products=list(store.products),
+            **{name: np.array(arrays[f"stats_{name}"]) for name in STAT_ARRAYS},
+        )
+        return cls(monthly, stats, store, coef, intercept, catalog, store.min_year)
+
+
+def append_sales_csv(df_new: pd.DataFrame, data_path: Path) -> int:
+    """
+    Appends rows to the sales CSV, keeping its column order. Returns the
+    previous size of the file, to undo the append with `os.truncate`.
+    """
+    data_path = Path(data_path)
+    columns = pd.read_csv(data_path, nrows=0).columns
+    with open(data_path, "rb+") as f:
+        f.seek(0, 2)
+        size = f.tell()
+        if size > 0:
+            f.seek(-1, 2)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+    df_new.reindex(columns=columns).to_csv(data_path, mode="a", header=False, index=False)
+    return size
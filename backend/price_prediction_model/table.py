@@ -0,0 +1,81 @@
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class PriceForecastTable:
+    """
+    Precomputed `PriceArtifacts.predict` values of every product for every
+    month of the years `first_year`..`last_year`, in a dense
+    (n_products, n_years, 12) float64 array indexed like the feature store.
+
+    Lookups of targets inside the grid are a single indexing operation;
+    `lookup` reports which targets are outside it, so the caller can score
+    those live. `hits` and `misses` count looked-up targets.
+    """
+
+    def __init__(self, values: np.ndarray, first_year: int):
+        self.values = values
+        self.first_year = first_year
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def last_year(self) -> int:
+        return self.first_year + self.values.shape[1] - 1
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes
+
+    @classmethod
+    def build(cls, artifacts, first_year: int, last_year: int, max_bytes: int | None = None) -> "PriceForecastTable | None":
+        """
+        Scores the grid with the live models of `artifacts`. If the table
+        would exceed `max_bytes`, only the first years that fit are kept;
+        returns None if not even one year fits.
+        """
+        n_products = len(artifacts.store.products)
+        year_bytes = n_products * 12 * np.dtype(np.float64).itemsize
+        n_years = last_year - first_year + 1
+        if max_bytes is not None and n_years * year_bytes > max_bytes:
+            n_years = max_bytes // year_bytes if year_bytes else n_years
+            logger.warning(
+                "Price table limited to %d of %d years by the %d byte budget.",
+                n_years, last_year - first_year + 1, max_bytes,
+            )
+        if n_years < 1 or n_products == 0:
+            return None
+
+        periods = np.arange(n_years * 12)
+        years, months = first_year + periods // 12, periods % 12 + 1
+        values = np.empty((n_products, n_years, 12))
+        for i, product in enumerate(artifacts.store.products):
+            values[i] = artifacts.predict_live(product, years, months).reshape(n_years, 12)
+        return cls(values, first_year)
+
+    def covers(self, year: int, month: int) -> bool:
+        return self.first_year <= year <= self.last_year and 1 <= month <= 12
+
+    def value(self, row: int, year: int, month: int) -> float:
+        """The value of one target, which must be covered."""
+        self.hits += 1
+        return float(self.values[row, year - self.first_year, month - 1])
+
+    def lookup(self, rows, years, months) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Values of the (product row, year, month) targets and a mask of those
+        inside the grid; targets outside it are NaN.
+        """
+        rows = np.asarray(rows, dtype=np.intp)
+        year_index = np.asarray(years, dtype=np.int64) - self.first_year
+        months = np.asarray(months, dtype=np.int64)
+        inside = (rows >= 0) & (year_index >= 0) & (year_index < self.values.shape[1]) & (months >= 1) & (months <= 12)
+        values = np.full(len(rows), np.nan)
+        values[inside] = self.values[rows[inside], year_index[inside], months[inside] - 1]
+        hits = int(inside.sum())
+        self.hits += hits
+        self.misses += len(rows) - hits
+        return values, inside
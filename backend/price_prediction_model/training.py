@@ -0,0 +1,143 @@
+from dataclasses import dataclass, replace
+
+import numpy as np
+import pandas as pd
+
+from backend.utils import FEATURE_COLS
+
+# Relative cutoff for the singular values of the (standardized) normal equations.
+# Year, Years_From_Start and Time_Index are exactly collinear, so the system is
+# always rank deficient; like LinearRegression we return the minimum-norm solution.
+RCOND = 1e-10
+
+STAT_ARRAYS = ("count", "x_shift", "y_shift", "sum_x", "sum_y", "sum_xx", "sum_xy")
+
+
+@dataclass
+class RegressionStats:
+    """
+    Per-product sufficient statistics of the price regressions.
+
+    Sums are taken over rows shifted by `x_shift` / `y_shift` (the product
+    means when the statistics were first built), which keeps the centered
+    normal equations accurate even though Year and Time_Index_Squared are large.
+    Row i of every array belongs to `products[i]`.
+    """
+
+    products: list[str]
+    count: np.ndarray  # (P,)
+    x_shift: np.ndarray  # (P, F)
+    y_shift: np.ndarray  # (P,)
+    sum_x: np.ndarray  # (P, F)
+    sum_y: np.ndarray  # (P,)
+    sum_xx: np.ndarray  # (P, F, F)
+    sum_xy: np.ndarray  # (P, F)
+
+    @classmethod
+    def from_features(cls, df_features: pd.DataFrame) -> "RegressionStats":
+        """
+        Builds the statistics of every product at once. Every per-product sum
+        is one weighted `np.bincount` over the product codes of the rows, so
+        memory stays proportional to the number of rows however unevenly they
+        are spread over the products.
+        """
+        codes, products = pd.factorize(df_features["Product_Name"], sort=False)
+        X = df_features[FEATURE_COLS].to_numpy(dtype=float)
+        y = df_features["Price_Avg"].to_numpy(dtype=float)
+        n_products, n_features = len(products), X.shape[1]
+
+        def group_sum(values: np.ndarray) -> np.ndarray:
+            return np.bincount(codes, weights=values, minlength=n_products)
+
+        count = np.bincount(codes, minlength=n_products)
+        n = np.maximum(count, 1)
+        x_shift = np.column_stack([group_sum(X[:, f]) for f in range(n_features)]) / n[:, None]
+        y_shift = group_sum(y) / n
+        Xs = X - x_shift[codes]
+        ys = y - y_shift[codes]
+
+        sum_xx = np.empty((n_products, n_features, n_features))
+        for f in range(n_features):
+            for g in range(f, n_features):
+                sum_xx[:, f, g] = sum_xx[:, g, f] = group_sum(Xs[:, f] * Xs[:, g])
+
+        return cls(
+            products=products.tolist(),
+            count=count.astype(float),
+            x_shift=x_shift,
+            y_shift=y_shift,
+            sum_x=np.column_stack([group_sum(Xs[:, f]) for f in range(n_features)]),
+            sum_y=group_sum(ys),
+            sum_xx=sum_xx,
+            sum_xy=np.column_stack([group_sum(Xs[:, f] * ys) for f in range(n_features)]),
+        )
+
+    def copy(self) -> "RegressionStats":
+        return replace(
+            self,
+            products=list(self.products),
+            **{name: getattr(self, name).copy() for name in STAT_ARRAYS},
+        )
+
+    def add_product(self, product: str, X: np.ndarray, y: np.ndarray) -> int:
+        """
+        Adds a product that had no statistics yet, shifted by the mean of its rows.
+        Returns its row index.
+        """
+        x_shift = X.mean(axis=0) if len(X) else np.zeros(X.shape[1])
+        y_shift = y.mean() if len(y) else 0.0
+        self.products.append(product)
+        self.count = np.append(self.count, 0.0)
+        self.x_shift = np.vstack([self.x_shift, x_shift])
+        self.y_shift = np.append(self.y_shift, y_shift)
+        self.sum_x = np.vstack([self.sum_x, np.zeros_like(x_shift)])
+        self.sum_y = np.append(self.sum_y, 0.0)
+        self.sum_xx = np.concatenate([self.sum_xx, np.zeros((1, len(x_shift), len(x_shift)))])
+        self.sum_xy = np.vstack([self.sum_xy, np.zeros_like(x_shift)])
+
+        i = len(self.products) - 1
+        self.update(i, X, y)
+        return i
+
+    def update(self, i: int, X: np.ndarray, y: np.ndarray, sign: float = 1.0):
+        """Adds (sign=1) or removes (sign=-1) the rows X, y from product i."""
+        Xs = X - self.x_shift[i]
+        ys = y - self.y_shift[i]
+        self.count[i] += sign * len(X)
+        self.sum_x[i] += sign * Xs.sum(axis=0)
+        self.sum_y[i] += sign * ys.sum()
+        self.sum_xx[i] += sign * (Xs.T @ Xs)
+        self.sum_xy[i] += sign * (Xs.T @ ys)
+
+    def solve(self, rows=None, rcond: float = RCOND) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Solves every product's least-squares problem (or only `rows`) in one
+        batched pseudo-inverse. Returns (coef, intercept) with shapes (P, F) and (P,).
+        """
+        rows = slice(None) if rows is None else np.asarray(rows, dtype=int)
+        n = np.maximum(self.count[rows], 1)
+        mean_x = self.sum_x[rows] / n[:, None]
+        mean_y = self.sum_y[rows] / n
+
+        cov = self.sum_xx[rows] - n[:, None, None] * mean_x[:, :, None] * mean_x[:, None, :]
+        cov_xy = self.sum_xy[rows] - n[:, None] * mean_x * mean_y[:, None]
+
+        # Standardize so that the cutoff does not depend on the feature scales
+        scale = np.sqrt(np.clip(np.diagonal(cov, axis1=1, axis2=2), 0, None))
+        scale[scale == 0] = 1.0
+        corr = cov / (scale[:, :, None] * scale[:, None, :])
+        coef = np.einsum("pij,pj->pi", np.linalg.pinv(corr, rcond=rcond, hermitian=True), cov_xy / scale) / scale
+
+        intercept = self.y_shift[rows] + mean_y - np.einsum("pf,pf->p", self.x_shift[rows] + mean_x, coef)
+        return coef, intercept
+
+
+def train_models_batched(df_features: pd.DataFrame) -> tuple[list[str], np.ndarray, np.ndarray]:
+    """
+    Trains the per-product price regressions in one batched solve.
+    Returns (products, coef, intercept); row i belongs to products[i] and
+    predicting is `features @ coef[i] + intercept[i]`.
+    """
+    stats = RegressionStats.from_features(df_features)
+    coef, intercept = stats.solve()
+    return stats.products, coef, intercept
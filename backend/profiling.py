@@ -0,0 +1,205 @@
+import contextvars
+import cProfile
+import functools
+import hmac
+import io
+import json
+import pstats
+import random
+import threading
+import time
+from pathlib import Path
+
+# Profile of the request being handled, seen by the handler and by the
+# threadpool calls it makes (contextvars are copied into worker threads)
+_active = contextvars.ContextVar("request_profile", default=None)
+
+PROFILE_PARAMS = ("1", "true", "save", "text")
+
+
+def is_profiling() -> bool:
+    """True while handling a profiled request."""
+    return _active.get() is not None
+
+
+class RequestProfile:
+    """
+    cProfile of one request. cProfile only sees the thread it is enabled in,
+    so code the request runs in the threadpool (sync endpoints, scoring) is
+    recorded by extra profilers, one per call, merged in `stats()`.
+    """
+
+    def __init__(self):
+        self.thread_id = threading.get_ident()
+        self.profilers = [cProfile.Profile()]
+        self._lock = threading.Lock()
+
+    def thread_profiler(self) -> cProfile.Profile:
+        profiler = cProfile.Profile()
+        with self._lock:
+            self.profilers.append(profiler)
+        return profiler
+
+    def stats(self) -> pstats.Stats:
+        stats = pstats.Stats(self.profilers[0])
+        for profiler in self.profilers[1:]:
+            stats.add(profiler)
+        return stats
+
+
+def profile_thread(func):
+    """
+    Decorator for functions that run in the threadpool: when called for a
+    profiled request, the call is profiled and added to the request's profile.
+    Otherwise it only costs a contextvar lookup.
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        profile = _active.get()
+        if profile is None or profile.thread_id == threading.get_ident():
+            return func(*args, **kwargs)
+        return profile.thread_profiler().runcall(func, *args, **kwargs)
+
+    return wrapper
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that runs selected requests under cProfile.
+
+    A request is profiled when it has the `X-Profile` header or the `profile`
+    query parameter (1/true/save or text) and a valid `X-Admin-Token`, or
+    when it is picked by `sample_rate` (0 to 1). Without `admin_token` the
+    header and query parameter are ignored and only sampling applies. Profiles are written to
+    `directory` as .prof files (pstats / snakeviz format), keeping the newest
+    `keep`; the file name is returned in the `X-Profile-Id` header. With
+    `text`, the response body is replaced by the pstats report, sorted by
+    cumulative time. Only one request is profiled at a time: cProfile hooks
+    the event loop thread, so work of concurrent requests on that thread
+    would show up in the profile too.
+    """
+
+    def __init__(self, app, admin_token: str | None, directory, keep: int = 50,
+                 sample_rate: float = 0.0, top: int = 40):
+        self.app = app
+        self.admin_token = admin_token
+        self.directory = Path(directory)
+        self.keep = keep
+        self.sample_rate = sample_rate
+        self.top = top
+        self._busy = False
+
+    @staticmethod
+    def _requested(scope) -> str | None:
+        headers = dict(scope["headers"])
+        # latin-1 decodes any bytes; values outside PROFILE_PARAMS are ignored anyway
+        value = headers.get(b"x-profile", b"").decode("latin-1").lower()
+        if not value:
+            for pair in scope.get("query_string", b"").decode("latin-1").split("&"):
+                key, _, param = pair.partition("=")
+                if key == "profile":
+                    value = param.lower() or "1"
+        if value not in PROFILE_PARAMS:
+            return None
+        return "text" if value == "text" else "save"
+
+    def _authorized(self, scope) -> bool:
+        # Raw header bytes: compare_digest rejects str with non-ASCII characters
+        token = dict(scope["headers"]).get(b"x-admin-token", b"")
+        return hmac.compare_digest(token, self.admin_token.encode())
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Without an admin token only sampling can profile: the flags are ignored
+        mode = self._requested(scope) if self.admin_token is not None else None
+        if mode is not None:
+            if not self._authorized(scope):
+                await self._error(send, 403, "Invalid admin token.")
+                return
+            if self._busy:
+                await self._error(send, 409, "Another request is being profiled.")
+                return
+        elif self.sample_rate and not self._busy and random.random() < self.sample_rate:
+            mode = "save"
+
+        if mode is None:
+            await self.app(scope, receive, send)
+            return
+
+        self._busy = True
+        try:
+            await self._profile(scope, receive, send, mode)
+        finally:
+            self._busy = False
+
+    async def _profile(self, scope, receive, send, mode: str):
+        profile = RequestProfile()
+        token = _active.set(profile)
+        messages = []
+        status = 500
+
+        async def capture(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            messages.append(message)
+
+        start = time.perf_counter()
+        profiler = profile.profilers[0]
+        profiler.enable()
+        try:
+            await self.app(scope, receive, capture)
+        finally:
+            profiler.disable()
+            _active.reset(token)
+
+        stats = profile.stats()
+        name = self.save(stats, scope, status, time.perf_counter() - start, threads=len(profile.profilers))
+        if mode == "text":
+            report = io.StringIO()
+            stats.stream = report
+            stats.sort_stats("cumulative").print_stats(self.top)
+            await self._send(send, 200, report.getvalue().encode(), b"text/plain; charset=utf-8", [
+                (b"x-profile-id", name.encode()), (b"x-profile-status", str(status).encode()),
+            ])
+            return
+
+        for message in messages:
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", []), (b"x-profile-id", name.encode())]}
+            await send(message)
+
+    def save(self, stats: pstats.Stats, scope, status: int, seconds: float, threads: int = 1) -> str:
+        """Writes the profile and removes the oldest files beyond `keep`. Returns the file name."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        route = scope.get("route")
+        path = route.path if route is not None else scope["path"]
+        slug = path.strip("/").replace("/", "_").replace("{", "").replace("}", "") or "root"
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{time.time_ns() % 10**9:09d}-{scope['method']}-{slug}.prof"
+        stats.dump_stats(self.directory / name)
+        (self.directory / name).with_suffix(".json").write_text(json.dumps({
+            "method": scope["method"], "path": scope["path"], "route": path,
+            "status": status, "seconds": round(seconds, 6), "threads": threads,
+        }))
+
+        files = sorted(self.directory.glob("*.prof"))
+        for old in files[:max(len(files) - self.keep, 0)]:
+            old.unlink(missing_ok=True)
+            old.with_suffix(".json").unlink(missing_ok=True)
+        return name
+
+    @staticmethod
+    async def _send(send, status: int, body: bytes, content_type: bytes, headers=()):
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", content_type), (b"content-length", str(len(body)).encode()), *headers],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def _error(self, send, status: int, detail: str):
+        await self._send(send, status, json.dumps({"detail": detail}).encode(), b"application/json")
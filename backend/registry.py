@@ -0,0 +1,235 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from backend.cache import file_version
+
+# Artifact paths each model needs, as passed to executor.load_version
+REQUIRED_PATHS = {
+    "revenue": ("revenue_model", "revenue_scaler", "revenue_category", "revenue_location", "revenue_platform"),
+    "discount": ("discount_model",),
+}
+
+
+@dataclass(frozen=True)
+class ModelVersion:
+    """
+    One named version of the revenue or discount model: the files to load and
+    whether to compile it. `stamp` identifies the file contents, so a retrained
+    file registered under the same name is a different ModelVersion. It is
+    plain data and is sent to the inference worker processes with each task.
+    """
+
+    task: str
+    name: str
+    paths: dict = field(hash=False)
+    compiled: bool = True
+    stamp: str = ""
+
+    @classmethod
+    def create(cls, task: str, name: str, paths: dict, compiled: bool = True) -> "ModelVersion":
+        """Raises ValueError for an unknown task or missing paths, FileNotFoundError for missing files."""
+        if task not in REQUIRED_PATHS:
+            raise ValueError(f"Unknown model '{task}'.")
+        missing = [key for key in REQUIRED_PATHS[task] if key not in paths]
+        if missing:
+            raise ValueError(f"Missing paths for the {task} model: {missing}")
+        paths = {key: Path(paths[key]) for key in REQUIRED_PATHS[task]}
+        return cls(task, name, paths, compiled, file_version(*paths.values()))
+
+    @property
+    def cache_version(self) -> str:
+        """Version part of the prediction cache keys."""
+        return f"{self.name}:{self.stamp}"
+
+
+class ModelRegistry:
+    """
+    Named versions of the revenue and discount models and the active one of each.
+
+    A version is only served once `load` has warmed it (its artifacts loaded
+    and a sample row scored), so requests never wait for a cold model. The
+    active version is switched with a single assignment: requests already
+    running finish on the version they resolved, new ones get the new one.
+    Reloading a name keeps serving the previous files until the new ones are warm.
+
+    With a `manifest_path`, the versions loaded through `load` and the active
+    names are also written to that JSON file, and `sync` applies what other
+    processes (gunicorn workers) wrote there: their versions are loaded and
+    warmed in this process too, and their activations are followed.
+    """
+
+    def __init__(self, manifest_path: Path | None = None):
+        self.manifest_path = Path(manifest_path) if manifest_path is not None else None
+        self._ready = {task: {} for task in REQUIRED_PATHS}  # task -> {name: ModelVersion}
+        self._active = {}  # task -> name
+        self._status = {}  # (task, name) -> dict with state, stamp, seconds and error
+        self._loading = {}  # (task, name) -> asyncio.Task of load_in_background
+        self._wanted_active = {}  # task -> name activated in the manifest, once it is loaded here
+        self._manifest_mtime = None
+        self._tasks = set()
+        self._lock = threading.Lock()
+
+    def add(self, version: ModelVersion, activate: bool = False):
+        """Registers a version that is already loaded."""
+        with self._lock:
+            self._ready[version.task][version.name] = version
+            if activate or version.task not in self._active or self._wanted_active.get(version.task) == version.name:
+                self._active[version.task] = version.name
+            self._status[(version.task, version.name)] = {"state": "ready", "stamp": version.stamp}
+
+    def get(self, task: str, name: str | None = None) -> ModelVersion:
+        """The named version, or the active one. Raises KeyError if it is not loaded."""
+        versions = self._ready[task]
+        return versions[self._active[task] if name is None else name]
+
+    def activate(self, task: str, name: str) -> ModelVersion:
+        """Makes a loaded version the default of its model. Raises KeyError if it is not loaded."""
+        with self._lock:
+            version = self._ready[task][name]
+            self._active[task] = name
+            self._wanted_active.pop(task, None)
+        self._publish(activate=(task, name))
+        return version
+
+    def is_loading(self, task: str, name: str) -> bool:
+        return self._status.get((task, name), {}).get("state") == "loading"
+
+    async def load(self, version: ModelVersion, warm, activate: bool = False, publish: bool = False) -> ModelVersion:
+        """
+        Warms `version` with `warm(version)` (a coroutine function that loads the
+        artifacts and scores a sample), then registers it and, with `publish`,
+        writes it to the manifest. Failures are kept in the status and
+        re-raised; the previous version keeps serving.
+        """
+        key = (version.task, version.name)
+        self._status[key] = {"state": "loading", "stamp": version.stamp}
+        start = time.perf_counter()
+        try:
+            await warm(version)
+        except Exception as e:
+            self._status[key] = {"state": "failed", "stamp": version.stamp, "error": str(e)}
+            raise
+        self.add(version, activate)
+        self._status[key]["seconds"] = round(time.perf_counter() - start, 4)
+        if publish:
+            self._publish(version, (version.task, version.name) if activate else None)
+        return version
+
+    def load_in_background(self, version: ModelVersion, warm, activate: bool = False,
+                           publish: bool = False) -> asyncio.Task:
+        """Starts `load` as a task of the running event loop; the version is 'loading' from now on."""
+        key = (version.task, version.name)
+        self._status[key] = {"state": "loading", "stamp": version.stamp}
+
+        async def load():
+            try:
+                await self.load(version, warm, activate, publish)
+            except Exception:
+                pass  # reported by describe()
+            finally:
+                self._loading.pop(key, None)
+
+        task = asyncio.ensure_future(load())
+        self._loading[key] = task
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def wait_loaded(self, task: str, name: str):
+        """Waits for a version that is loading in this process, if any."""
+        loading = self._loading.get((task, name))
+        if loading is not None and loading.get_loop() is asyncio.get_running_loop():
+            await asyncio.shield(loading)
+
+    def _read_manifest(self) -> dict:
+        try:
+            return json.loads(self.manifest_path.read_text())
+        except FileNotFoundError:
+            return {"active": {}, "versions": []}
+
+    def _publish(self, version: ModelVersion | None = None, activate: tuple | None = None):
+        """Merges a loaded version and/or an activation into the manifest."""
+        if self.manifest_path is None:
+            return
+        with self._lock:
+            manifest = self._read_manifest()
+            if version is not None:
+                manifest["versions"] = [
+                    entry for entry in manifest["versions"]
+                    if (entry["task"], entry["name"]) != (version.task, version.name)
+                ] + [{
+                    "task": version.task, "name": version.name, "compiled": version.compiled,
+                    "paths": {key: str(path) for key, path in version.paths.items()},
+                }]
+            if activate is not None:
+                manifest["active"][activate[0]] = activate[1]
+
+            self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(prefix=".registry-", dir=self.manifest_path.parent)
+            with os.fdopen(fd, "w") as f:
+                json.dump(manifest, f, indent=2)
+            os.replace(tmp, self.manifest_path)
+
+    def sync(self, warm):
+        """
+        Applies the manifest if another process changed it since the last call
+        (one stat otherwise): loads its versions that are missing here, or
+        whose files changed, in the background, and follows its active names.
+        Must be called from the event loop.
+        """
+        if self.manifest_path is None:
+            return
+        try:
+            stat = os.stat(self.manifest_path)
+        except FileNotFoundError:
+            return
+        # Every write replaces the file, so the inode changes even within one mtime tick
+        mtime = (stat.st_mtime_ns, stat.st_ino)
+        if mtime == self._manifest_mtime:
+            return
+        self._manifest_mtime = mtime
+        manifest = self._read_manifest()
+
+        for entry in manifest["versions"]:
+            key = (entry["task"], entry["name"])
+            try:
+                version = ModelVersion.create(entry["task"], entry["name"], entry["paths"], entry["compiled"])
+            except (OSError, ValueError) as e:
+                self._status[key] = {"state": "failed", "error": str(e)}
+                continue
+            current = self._ready[version.task].get(version.name)
+            if (current is None or current.stamp != version.stamp) and not self.is_loading(*key):
+                self.load_in_background(version, warm)
+
+        with self._lock:
+            for task, name in manifest["active"].items():
+                if name in self._ready.get(task, {}):
+                    self._active[task] = name
+                    self._wanted_active.pop(task, None)
+                else:
+                    self._wanted_active[task] = name
+
+    def describe(self) -> dict:
+        """Active version, loaded versions and load status of every model in this process."""
+        result = {}
+        for task, versions in self._ready.items():
+            names = {name for model, name in self._status if model == task}
+            result[task] = {
+                "active": self._active.get(task),
+                "versions": {
+                    name: {
+                        **self._status[(task, name)],
+                        "serving_stamp": versions[name].stamp if name in versions else None,
+                        "paths": {key: str(path) for key, path in versions[name].paths.items()}
+                        if name in versions else None,
+                    }
+                    for name in sorted(names)
+                },
+            }
+        return result
@@ -0,0 +1,120 @@
+import logging
+from collections.abc import Mapping, Sequence
+
+import numpy as np
+import pandas as pd
+
+from backend.inference import REVENUE_FEATURES, encode_with_unknown
+
+# Payload column of each target-encoded model feature
+ENCODED_COLUMNS = {"Category_By_Price": "Category", "Location_By_Price": "Location", "Platform_By_Price": "Platform"}
+
+logger = logging.getLogger(__name__)
+
+
+class CompiledRevenueModel:
+    """
+    The revenue StandardScaler and linear model (ridge, lasso or elastic net)
+    folded into one weight vector and bias:
+
+        model(scale(x)) = coef . (x - mean) / std + intercept = weights . x + bias
+
+    Rows are encoded into an (n, 5) float64 matrix, with the category, location
+    and platform encodings looked up in plain dicts, and scored with one
+    matrix-vector product. Predictions match `model.predict(scaler.transform(X))`
+    up to floating-point rounding.
+    """
+
+    def __init__(self, weights: np.ndarray, bias: float, encodings: dict):
+        self.weights = weights
+        self.bias = bias
+        self.encodings = encodings  # {feature: (mapping, value for unknown categories or None)}
+
+    @classmethod
+    def from_artifacts(cls, model, scaler, category_dict: dict, location_dict: dict,
+                       platform_dict: dict) -> "CompiledRevenueModel":
+        """Raises ValueError if the model is not linear in the scaled features."""
+        from sklearn.preprocessing import StandardScaler
+
+        if not isinstance(scaler, StandardScaler):
+            raise ValueError("Expected a StandardScaler.")
+        names = getattr(scaler, "feature_names_in_", None)
+        if names is not None and list(names) != REVENUE_FEATURES:
+            raise ValueError(f"Scaler features {list(names)} differ from {REVENUE_FEATURES}.")
+        coef = np.asarray(getattr(model, "coef_", None), dtype=np.float64)
+        if coef.shape != (len(REVENUE_FEATURES),):
+            raise ValueError("Expected a single-output linear model with one coefficient per feature.")
+
+        mean = scaler.mean_ if scaler.mean_ is not None else np.zeros(len(coef))
+        scale = scaler.scale_ if scaler.scale_ is not None else np.ones(len(coef))
+        weights = coef / scale
+        bias = float(np.asarray(model.intercept_).reshape(-1)[0] - weights @ mean)
+
+        encodings = {
+            feature: ({key: float(value) for key, value in mapping.items()}, mapping.get("Unknown"))
+            for feature, mapping in zip(ENCODED_COLUMNS, (category_dict, location_dict, platform_dict))
+        }
+        compiled = cls(weights, bias, encodings)
+
+        # The fold is only exact for models whose predict is coef . x + intercept
+        probe = np.random.default_rng(0).normal(mean, scale, size=(16, len(coef)))
+        expected = model.predict(scaler.transform(pd.DataFrame(probe, columns=REVENUE_FEATURES)))
+        if not np.allclose(compiled.predict_encoded(probe), expected, rtol=1e-9, atol=1e-6):
+            raise ValueError(f"{type(model).__name__} is not a linear model of the scaled features.")
+        return compiled
+
+    def _encode_column(self, feature: str, values) -> np.ndarray:
+        mapping, unknown = self.encodings[feature]
+        default = np.nan if unknown is None else unknown
+        if isinstance(values, pd.Series) and isinstance(values.dtype, pd.CategoricalDtype):
+            # One lookup per category; code -1 (missing) takes the last entry
+            table = np.array([mapping.get(category, default) for category in values.cat.categories] + [default])
+            encoded = table[values.cat.codes.to_numpy()]
+        elif isinstance(values, pd.Series):
+            encoded = encode_with_unknown(values, mapping).to_numpy(dtype=np.float64)
+        else:
+            encoded = np.fromiter((mapping.get(value, default) for value in values), dtype=np.float64, count=len(values))
+        if unknown is None and np.isnan(encoded).any():
+            raise ValueError(f"Unknown {ENCODED_COLUMNS[feature]} and no 'Unknown' encoding.")
+        return encoded
+
+    def encode(self, columns: Mapping[str, Sequence]) -> np.ndarray:
+        """
+        Builds the (n, 5) model input, in REVENUE_FEATURES order, from columns
+        with the RevenuePayload names (a dict of lists or a DataFrame).
+        """
+        n = len(columns["Price"])
+        X = np.empty((n, len(REVENUE_FEATURES)), dtype=np.float64)
+        for j, feature in enumerate(REVENUE_FEATURES):
+            if feature in ENCODED_COLUMNS:
+                X[:, j] = self._encode_column(feature, columns[ENCODED_COLUMNS[feature]])
+            else:
+                X[:, j] = np.asarray(columns[feature], dtype=np.float64)
+        return X
+
+    def predict_encoded(self, X: np.ndarray) -> np.ndarray:
+        return X @ self.weights + self.bias
+
+    def predict(self, columns: Mapping[str, Sequence]) -> np.ndarray:
+        return self.predict_encoded(self.encode(columns))
+
+    def encode_records(self, records: Sequence[Mapping]) -> np.ndarray:
+        columns = {
+            column: [record[column] for record in records]
+            for column in ["Price", "Day", *ENCODED_COLUMNS.values()]
+        }
+        return self.encode(columns)
+
+    def predict_records(self, records: Sequence[Mapping]) -> np.ndarray:
+        """Scores a list of payload dicts."""
+        return self.predict_encoded(self.encode_records(records))
+
+
+def compile_revenue_model(model, scaler, category_dict: dict, location_dict: dict,
+                          platform_dict: dict) -> CompiledRevenueModel | None:
+    """Folds the model, or returns None (scoring then uses scaler + model) if it cannot."""
+    try:
+        return CompiledRevenueModel.from_artifacts(model, scaler, category_dict, location_dict, platform_dict)
+    except (ValueError, AttributeError, TypeError) as e:
+        logger.warning("Revenue model not compiled, using the scaler and model: %s", e)
+        return None
@@ -0,0 +1,247 @@
+"""
+Offline scoring of sales files with the revenue, discount and price models.
+
+    python -m backend.score sales.csv predictions.csv
+    python -m backend.score sales.parquet predictions.parquet --models revenue price --chunk-size 200000
+    python -m backend.score big.csv out.csv --workers 4                 # chunks scored in 4 processes
+
+The input has the columns of the sales dataset (Date, Product_Name,
+Category, Units_Sold, Price, Location, Platform). It is read and scored in
+chunks of `--chunk-size` rows, and each chunk is appended to the output:
+the columns the models read plus predicted_revenue, predicted_discount
+and/or predicted_price (NaN for products without a price model), so
+memory stays bounded by a few chunks whatever the file size. CSV and Parquet
+are chosen by file extension (Parquet needs pyarrow). With `--workers`,
+chunks are scored in a process pool, at most two per worker in flight, and
+written in input order.
+"""
+import argparse
+import os
+import resource
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+from dotenv import load_dotenv
+
+from backend import executor
+from backend.inference import score_discount, score_revenue
+from backend.price_prediction_model.artifacts import PriceArtifacts, load_price_artifacts
+from backend.registry import ModelVersion
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+load_dotenv(dotenv_path=PROJECT_ROOT / ".env")
+
+TASKS = ("revenue", "discount", "price")
+# Sales columns read for each model
+INPUT_COLUMNS = {
+    "revenue": ["Date", "Price", "Category", "Location", "Platform"],
+    "discount": ["Product_Name", "Category", "Price", "Units_Sold", "Location", "Platform"],
+    "price": ["Date", "Product_Name"],
+}
+CATEGORICAL_COLUMNS = ["Product_Name", "Category", "Location", "Platform"]
+DEFAULT_CHUNK_SIZE = 100_000
+
+
+def setting_path(name: str, default: str) -> Path:
+    path = Path(os.getenv(name) or default)
+    return path if path.is_absolute() else PROJECT_ROOT / path
+
+
+def model_versions(tasks) -> dict:
+    """The revenue and discount versions configured for the API (same environment variables)."""
+    versions = {}
+    if "revenue" in tasks:
+        versions["revenue"] = ModelVersion.create("revenue", "score", {
+            "revenue_model": setting_path("REVENUE_MODEL_PATH", "./resources/revenue/model_ridge.joblib"),
+            "revenue_scaler": setting_path("REVENUE_SCALER_PATH", "./resources/revenue/standard_scaler.joblib"),
+            "revenue_category": setting_path("REVENUE_CATEGORY_PATH", "./resources/revenue/category_by_price_dict.joblib"),
+            "revenue_location": setting_path("REVENUE_LOCATION_PATH", "./resources/revenue/location_by_price_dict.joblib"),
+            "revenue_platform": setting_path("REVENUE_PLATFORM_PATH", "./resources/revenue/platform_by_price_dict.joblib"),
+        })
+    if "discount" in tasks:
+        versions["discount"] = ModelVersion.create("discount", "score", {
+            "discount_model": setting_path("DISCOUNT_MODEL_PATH", "./resources/discount/discount_model.joblib"),
+        })
+    return versions
+
+
+class ChunkScorer:
+    """
+    Scores chunks of sales rows with vectorized encoding: the folded revenue
+    model, the compiled discount model and the price models of all products
+    in one pass. Built once per process (in each worker with `--workers`).
+    """
+
+    def __init__(self, tasks, versions: dict, price_dir: Path | None = None):
+        self.tasks = list(tasks)
+        self.versions = versions
+        for version in versions.values():
+            executor.load_version(version)
+        self.price: PriceArtifacts | None = None
+        if "price" in self.tasks:
+            self.price = load_price_artifacts(price_dir or setting_path("PRICE_ARTIFACTS_DIR", "./resources/price"))
+
+    def score(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        predictions = {}
+        dates = pd.to_datetime(chunk["Date"]) if "Date" in chunk else None
+        if "revenue" in self.tasks:
+            artifacts = executor.model_artifacts(self.versions["revenue"])
+            payload = pd.DataFrame({
+                "Price": chunk["Price"], "Day": dates.dt.day.astype(float),
+                "Category": chunk["Category"], "Location": chunk["Location"], "Platform": chunk["Platform"],
+            })
+            predictions["predicted_revenue"] = score_revenue(
+                payload, artifacts["model"], artifacts["scaler"], artifacts["category"], artifacts["location"],
+                artifacts["platform"], artifacts["compiled"],
+            )
+        if "discount" in self.tasks:
+            artifacts = executor.model_artifacts(self.versions["discount"])
+            payload = pd.DataFrame({
+                "product_name": chunk["Product_Name"], "category": chunk["Category"], "price": chunk["Price"],
+                "units_sold": chunk["Units_Sold"], "location": chunk["Location"], "platform": chunk["Platform"],
+            })
+            predictions["predicted_discount"] = score_discount(payload, artifacts["model"], artifacts["compiled"])
+        if "price" in self.tasks:
+            predictions["predicted_price"] = self.price.predict_rows(
+                chunk["Product_Name"].to_numpy(), dates.dt.year.to_numpy(), dates.dt.month.to_numpy()
+            )
+        return chunk.assign(**predictions)
+
+
+_scorer = None
+
+
+def init_worker(tasks, versions: dict, price_dir: Path | None):
+    global _scorer
+    _scorer = ChunkScorer(tasks, versions, price_dir)
+
+
+def score_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    return _scorer.score(chunk)
+
+
+def is_parquet(path: Path) -> bool:
+    return Path(path).suffix.lower() in (".parquet", ".pq")
+
+
+def read_chunks(path: Path, columns: list[str], chunk_size: int):
+    """Yields DataFrames of up to `chunk_size` rows with only `columns` read, in file order."""
+    if is_parquet(path):
+        if pyarrow is None:
+            raise RuntimeError("Reading Parquet files requires pyarrow.")
+        parquet = pyarrow.parquet.ParquetFile(path)
+        for batch in parquet.iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
+    else:
+        dtype = {column: "category" for column in CATEGORICAL_COLUMNS if column in columns}
+        yield from pd.read_csv(path, usecols=columns, dtype=dtype, chunksize=chunk_size)
+
+
+class ChunkWriter:
+    """Appends scored chunks to a CSV or Parquet file, written to a temporary file and renamed at the end."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.tmp = self.path.with_name(f".{self.path.name}.partial")
+        self.parquet = is_parquet(self.path)
+        if self.parquet and pyarrow is None:
+            raise RuntimeError("Writing Parquet files requires pyarrow.")
+        self.writer = None
+        self.rows = 0
+
+    def write(self, chunk: pd.DataFrame):
+        if self.parquet:
+            # Categories differ between chunks; the file schema takes plain strings
+            table = pyarrow.Table.from_pandas(
+                chunk.astype({column: str for column in chunk.select_dtypes("category")}), preserve_index=False
+            )
+            if self.writer is None:
+                self.writer = pyarrow.parquet.ParquetWriter(self.tmp, table.schema)
+            self.writer.write_table(table)
+        else:
+            chunk.to_csv(self.tmp, mode="w" if self.rows == 0 else "a", header=self.rows == 0, index=False)
+        self.rows += len(chunk)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        if self.rows == 0 and not self.parquet:
+            self.tmp.write_text("")
+        os.replace(self.tmp, self.path)
+
+
+def peak_rss_mb(who=resource.RUSAGE_SELF) -> float:
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak = resource.getrusage(who).ru_maxrss
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+
+
+def score_file(input_path: Path, output_path: Path, tasks=TASKS, chunk_size: int = DEFAULT_CHUNK_SIZE,
+               workers: int = 0, price_dir: Path | None = None) -> dict:
+    """Scores `input_path` chunk by chunk into `output_path`. Returns rows, seconds, rows/s and peak RSS."""
+    tasks = [task for task in TASKS if task in tasks]
+    columns = sorted({column for task in tasks for column in INPUT_COLUMNS[task]})
+    versions = model_versions(tasks)
+    start = time.perf_counter()
+    writer = ChunkWriter(output_path)
+    chunks = read_chunks(input_path, columns, chunk_size)
+    try:
+        if workers > 0:
+            with ProcessPoolExecutor(workers, initializer=init_worker, initargs=(tasks, versions, price_dir)) as pool:
+                pending = deque()
+                for chunk in chunks:
+                    pending.append(pool.submit(score_chunk, chunk))
+                    # Keeps at most two chunks per worker in memory
+                    if len(pending) >= 2 * workers:
+                        writer.write(pending.popleft().result())
+                while pending:
+                    writer.write(pending.popleft().result())
+        else:
+            scorer = ChunkScorer(tasks, versions, price_dir)
+            for chunk in chunks:
+                writer.write(scorer.score(chunk))
+        writer.close()
+    except BaseException:
+        writer.tmp.unlink(missing_ok=True)
+        raise
+    seconds = time.perf_counter() - start
+
+    return {
+        "rows": writer.rows,
+        "seconds": round(seconds, 3),
+        "rows_per_second": round(writer.rows / seconds, 1) if seconds > 0 else None,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "peak_worker_rss_mb": round(peak_rss_mb(resource.RUSAGE_CHILDREN), 1) if workers > 0 else None,
+        "output": str(output_path),
+    }
+
+
+def main(argv=None) -> dict:
+    parser = argparse.ArgumentParser(description="Score a sales CSV or Parquet file in chunks.")
+    parser.add_argument("input", type=Path, help="Sales file (.csv or .parquet)")
+    parser.add_argument("output", type=Path, help="Predictions file (.csv or .parquet)")
+    parser.add_argument("--models", nargs="+", choices=TASKS, default=list(TASKS), help="Models to apply")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Rows per chunk")
+    parser.add_argument("--workers", type=int, default=0, help="Scoring processes (0 = this process)")
+    parser.add_argument("--price-dir", type=Path, help="Price artifacts (default: PRICE_ARTIFACTS_DIR)")
+    args = parser.parse_args(argv)
+
+    summary = score_file(args.input, args.output, args.models, args.chunk_size, args.workers, args.price_dir)
+    workers = f", workers {summary['peak_worker_rss_mb']} MB" if summary["peak_worker_rss_mb"] is not None else ""
+    print(f"{summary['rows']} rows in {summary['seconds']:.2f} s ({summary['rows_per_second']:,.0f} rows/s), "
+          f"peak RSS {summary['peak_rss_mb']} MB{workers} -> {summary['output']}")
+    return summary
+
+
+if __name__ == "__main__":
+    main()
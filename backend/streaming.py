@@ -0,0 +1,154 @@
+import asyncio
+import json
+import tempfile
+
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+
+from backend.batch import BatchFormatError, iter_ndjson_chunks, validate_batch
+
+
+class OutputSpool:
+    """
+    Response bytes scored but not yet sent. They stay in memory up to
+    `max_memory` bytes and then go to a temporary file, so a client that only
+    reads the response after sending its whole upload (requests, httpx) does
+    not stall the scoring, and memory does not grow with the request.
+    """
+
+    def __init__(self, max_memory: int = 1 << 20, read_size: int = 1 << 16):
+        self.file = tempfile.SpooledTemporaryFile(max_size=max_memory)
+        self.read_size = read_size
+        self.written = 0
+        self.read = 0
+        self.closed = False
+        self._changed = asyncio.Event()
+
+    def write(self, data: bytes):
+        self.file.seek(self.written)
+        self.file.write(data)
+        self.written += len(data)
+        self._changed.set()
+
+    def finish(self):
+        self.closed = True
+        self._changed.set()
+
+    async def chunks(self):
+        """Yields the bytes as they are written, until `finish`."""
+        while True:
+            if self.read < self.written:
+                self.file.seek(self.read)
+                data = self.file.read(min(self.read_size, self.written - self.read))
+                self.read += len(data)
+                yield data
+            elif self.closed:
+                return
+            else:
+                self._changed.clear()
+                await self._changed.wait()
+
+    def close(self):
+        self.file.close()
+
+
+class PredictionStream:
+    """
+    Scores an NDJSON upload chunk by chunk into NDJSON lines, one prediction or
+    error object per input row, in input order.
+
+    The upload is read `chunk_rows` rows at a time and each chunk is scored
+    with `score_chunk(indices, payloads)`, which returns (predictions, errors)
+    with the row indices. At most `max_in_flight` chunks are being scored or
+    waiting for their turn to be written; when scoring falls behind, the
+    upload is not read further (TCP backpressure on the client). Scored lines
+    go through an OutputSpool, so a slow reader costs disk, not memory.
+    """
+
+    def __init__(self, stream, payload_model, score_chunk, chunk_rows: int = 1000,
+                 max_in_flight: int = 4, spool_memory: int = 1 << 20, on_chunk=None):
+        self.stream = stream
+        self.payload_model = payload_model
+        self.score_chunk = score_chunk
+        self.chunk_rows = chunk_rows
+        self.on_chunk = on_chunk
+        self.spool = OutputSpool(spool_memory)
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._scored = asyncio.Queue()  # scoring tasks in input order, then None
+        self.in_flight = 0
+        self.max_in_flight_seen = 0
+        self.rows = 0
+
+    async def _score(self, start: int, rows: list) -> bytes:
+        indices, payloads, errors = validate_batch(rows, self.payload_model, start)
+        predictions, score_errors = await self.score_chunk(indices, payloads) if payloads else ([], [])
+        lines = sorted(predictions + errors + score_errors, key=lambda line: line["index"])
+        return "".join(json.dumps(line) + "\n" for line in lines).encode()
+
+    async def _read(self):
+        try:
+            async for rows in iter_ndjson_chunks(self.stream, self.chunk_rows):
+                await self._slots.acquire()
+                self.in_flight += 1
+                self.max_in_flight_seen = max(self.max_in_flight_seen, self.in_flight)
+                self._scored.put_nowait(asyncio.ensure_future(self._score(self.rows, rows)))
+                self.rows += len(rows)
+        except BatchFormatError as e:
+            self._scored.put_nowait(e)
+        except ClientDisconnect:
+            pass
+        finally:
+            self._scored.put_nowait(None)
+
+    async def _write(self):
+        try:
+            while (item := await self._scored.get()) is not None:
+                if isinstance(item, BatchFormatError):
+                    self.spool.write((json.dumps({"error": str(item)}) + "\n").encode())
+                    continue
+                try:
+                    self.spool.write(await item)
+                except Exception as e:
+                    self.spool.write((json.dumps({"error": f"Scoring failed: {e}"}) + "\n").encode())
+                    return
+                finally:
+                    self.in_flight -= 1
+                    self._slots.release()
+                if self.on_chunk is not None:
+                    self.on_chunk()
+        finally:
+            self.spool.finish()
+
+    async def lines(self):
+        """The response body. Closing it (client gone) stops reading and scoring."""
+        reader = asyncio.ensure_future(self._read())
+        writer = asyncio.ensure_future(self._write())
+        try:
+            async for data in self.spool.chunks():
+                yield data
+        finally:
+            reader.cancel()
+            writer.cancel()
+            while not self._scored.empty():
+                item = self._scored.get_nowait()
+                if isinstance(item, asyncio.Future):
+                    item.cancel()
+            self.spool.close()
+
+
+class UploadStreamingResponse(StreamingResponse):
+    """
+    A StreamingResponse whose body is produced while the request body is still
+    being read. On servers older than ASGI spec 2.4 (uvicorn) the stock one
+    waits for the client's disconnect on `receive`, which would swallow the
+    upload. Here the body reads the request itself, where a disconnect raises
+    ClientDisconnect; a failed send ends the response.
+    """
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+        if self.background is not None:
+            await self.background()
@@ -1,4 +1,6 @@
 import os
+import json
+import pytest
 from pathlib import Path
 from dotenv import load_dotenv
 from fastapi.testclient import TestClient
@@ -186,4 +188,280 @@ def test_predict_price_validation_error_missing_param():
     """
     params = {"product": "Omega-3", "year": 2024}  # Missing 'month'
     response = client.get(PRICE_PREDICT_ENDPOINT, params=params)
-    assert response.status_code == 422
\ No newline at end of file
+    assert response.status_code == 422
+
+def test_get_metadata_not_modified():
+    """
+    Test that /metadata returns 304 when the client sends back its ETag.
+    """
+    response = client.get("/metadata")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert response.headers["last-modified"]
+
+    response = client.get("/metadata", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+
+    response = client.get("/metadata", headers={"If-None-Match": '"stale"'})
+    assert response.status_code == 200
+
+
+def test_predict_revenue_batch_matches_single_predictions():
+    """
+    Test that the revenue batch endpoint scores every valid row like the single endpoint
+    and reports invalid rows without failing the whole request.
+    """
+    rows = [
+        {"Price": 50.5, "Day": 15, "Category": "Vitamin", "Location": "USA", "Platform": "Amazon"},
+        {"Price": 100.0, "Day": 15, "Category": "Vitamin", "Location": "USA", "Platform": "Amazon"},
+        {"Price": 25, "Day": 10, "Category": "NonExistentCategory", "Location": "UK", "Platform": "iHerb"},
+    ]
+    response = client.post(f"{REVENUE_PREDICT_ENDPOINT}/batch", json=rows)
+    assert response.status_code == 200
+    data = response.json()
+
+    assert [prediction["index"] for prediction in data["predictions"]] == [0, 2]
+    assert [error["index"] for error in data["errors"]] == [1]
+    for prediction in data["predictions"]:
+        single = client.post(REVENUE_PREDICT_ENDPOINT, json=rows[prediction["index"]]).json()
+        assert prediction["predicted_revenue"] == pytest.approx(single["predicted_revenue"])
+
+
+def test_predict_discount_batch_ndjson():
+    """
+    Test the discount batch endpoint with an NDJSON body containing a malformed line.
+    """
+    row = {
+        "product_name": "B-Complex",
+        "category": "Vitamin",
+        "price": 25.99,
+        "units_sold": 150,
+        "location": "USA",
+        "platform": "Amazon"
+    }
+    body = "\n".join([json.dumps(row), "{not json", json.dumps(row)])
+    response = client.post(
+        f"{DISCOUNT_PREDICT_ENDPOINT}/batch",
+        content=body,
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == 200
+    data = response.json()
+
+    single = client.post(DISCOUNT_PREDICT_ENDPOINT, json=row).json()
+    assert [prediction["index"] for prediction in data["predictions"]] == [0, 2]
+    assert data["predictions"][0]["predicted_discount"] == pytest.approx(single["predicted_discount"])
+    assert data["errors"][0]["index"] == 1
+
+
+def test_predict_price_batch():
+    """
+    Test the price batch endpoint, including an unknown product and an invalid month.
+    """
+    rows = [
+        {"product": "Vitamin C", "year": 2024, "month": 12},
+        {"product": "NonExistentProduct", "year": 2024, "month": 12},
+        {"product": "Vitamin C", "year": 2024, "month": 13},
+    ]
+    response = client.post(f"{PRICE_PREDICT_ENDPOINT}/batch", json=rows)
+    assert response.status_code == 200
+    data = response.json()
+
+    single = client.get(PRICE_PREDICT_ENDPOINT, params=rows[0]).json()
+    assert data["predictions"] == [{"index": 0, **single}]
+    assert [error["index"] for error in data["errors"]] == [1, 2]
+
+
+def test_predict_batch_rejects_non_array_body():
+    """
+    Test that a body which is not a JSON array is rejected with 422.
+    """
+    response = client.post(f"{REVENUE_PREDICT_ENDPOINT}/batch", json={"Price": 10})
+    assert response.status_code == 422
+
+
+def test_predict_batch_rejects_invalid_utf8():
+    """
+    Test that a batch body which is not valid UTF-8 is rejected with 422, and
+    that such a line of an NDJSON batch is reported as a row error.
+    """
+    response = client.post(
+        f"{REVENUE_PREDICT_ENDPOINT}/batch", content=b'[{"Price": "\xff"}]',
+        headers={"Content-Type": "application/json"},
+    )
+    assert response.status_code == 422
+    assert "UTF-8" in response.json()["detail"]
+
+    row = json.dumps({"Price": 42.0, "Day": 9.0, "Category": "Protein", "Location": "UK", "Platform": "iHerb"})
+    response = client.post(
+        f"{REVENUE_PREDICT_ENDPOINT}/batch", content=row.encode() + b'\n{"Price": "\xff"}\n',
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert [prediction["index"] for prediction in data["predictions"]] == [0]
+    assert data["errors"][0]["index"] == 1
+    assert data["errors"][0]["detail"][0]["type"] == "json_invalid"
+
+
+def test_predict_price_horizon():
+    """
+    Test that the horizon endpoint returns one forecast per month up to the target,
+    starting with the same value as the single-step price endpoint.
+    """
+    params = {"product": "Vitamin C", "year": 2026, "month": 3}
+    response = client.get(f"{PRICE_PREDICT_ENDPOINT}/horizon", params=params)
+    assert response.status_code == 200
+    data = response.json()
+
+    last = data["last_observed"]
+    assert (last["year"], last["month"]) == (2025, 3)
+    trajectory = data["trajectory"]
+    assert len(trajectory) == 12
+    assert (trajectory[0]["year"], trajectory[0]["month"]) == (2025, 4)
+    assert (trajectory[-1]["year"], trajectory[-1]["month"]) == (2026, 3)
+
+    single = client.get(PRICE_PREDICT_ENDPOINT, params={"product": "Vitamin C", "year": 2025, "month": 4}).json()
+    assert trajectory[0]["predicted_price"] == single["predicted_price"]
+
+
+def test_predict_price_horizon_rejects_past_target():
+    """
+    Test that a target at or before the last observed month returns an error message.
+    """
+    params = {"product": "Vitamin C", "year": 2024, "month": 1}
+    response = client.get(f"{PRICE_PREDICT_ENDPOINT}/horizon", params=params)
+    assert response.status_code == 200
+    assert "error" in response.json()
+
+
+def test_predict_revenue_is_cached():
+    """
+    Test that a repeated revenue request is served from the prediction cache.
+    """
+    payload = {"Price": 42.5, "Day": 3, "Category": "Vitamin", "Location": "USA", "Platform": "Amazon"}
+    first = client.post(REVENUE_PREDICT_ENDPOINT, json=payload).json()
+    hits = client.get("/cache/stats").json()["hits"]
+
+    second = client.post(REVENUE_PREDICT_ENDPOINT, json=dict(reversed(list(payload.items())))).json()
+    assert second == first
+    assert client.get("/cache/stats").json()["hits"] == hits + 1
+
+
+def test_append_data_hot_swaps_price_models(tmp_path, monkeypatch):
+    """
+    Test that /data/append updates the price models of the running app
+    and appends the rows to the dataset.
+    """
+    import shutil
+    import pandas as pd
+    import backend.api as api
+
+    original_rows = len(pd.read_csv(api.DATA_PATH))
+    data_path = tmp_path / "sales.csv"
+    shutil.copy(api.DATA_PATH, data_path)
+    monkeypatch.setattr(api, "DATA_PATH", data_path)
+    monkeypatch.setattr(api, "PRICE_ARTIFACTS_DIR", tmp_path / "price")
+    monkeypatch.setattr(api, "PRICE_ARTIFACTS_VERSION", None)
+    monkeypatch.setattr(api, "_price_artifacts", None)
+    monkeypatch.setattr(api, "_price_latest_stamp", None)
+    monkeypatch.setattr(api, "ADMIN_TOKEN", "secret")
+    admin = {"X-Admin-Token": "secret"}
+
+    params = {"product": "Vitamin C", "year": 2025, "month": 6}
+    before = client.get(PRICE_PREDICT_ENDPOINT, params=params).json()
+
+    rows = [
+        {
+            "Date": f"2025-04-{day:02d}", "Product_Name": "Vitamin C", "Category": "Vitamin",
+            "Units_Sold": 150, "Price": 59.99, "Revenue": 8998.5, "Discount": 0.1,
+            "Units_Returned": 1, "Location": "USA", "Platform": "Amazon",
+        }
+        for day in (7, 14, 21, 28)
+    ]
+    assert client.post("/data/append", json=rows).status_code == 403
+    response = client.post("/data/append", json=rows, headers=admin)
+    assert response.status_code == 200
+    assert response.json()["affected_products"] == ["Vitamin C"]
+    assert len(pd.read_csv(data_path)) == original_rows + 4
+
+    after = client.get(PRICE_PREDICT_ENDPOINT, params=params).json()
+    assert after["predicted_price"] != before["predicted_price"]
+    horizon = client.get(f"{PRICE_PREDICT_ENDPOINT}/horizon", params=params).json()
+    assert horizon["last_observed"]["month"] == 4
+
+    assert response.json()["version"] == (tmp_path / "price" / "LATEST").read_text()
+
+    rows[0]["Price"] = -1
+    assert client.post("/data/append", json=rows, headers=admin).status_code == 422
+
+
+def test_append_data_keeps_csv_and_artifacts_in_step(tmp_path, monkeypatch):
+    """
+    Test that appended rows are removed from the dataset again when the new
+    version cannot be saved, and that appends are refused for a pinned version.
+    """
+    import shutil
+    import pandas as pd
+    import backend.api as api
+
+    data_path = tmp_path / "sales.csv"
+    shutil.copy(api.DATA_PATH, data_path)
+    monkeypatch.setattr(api, "DATA_PATH", data_path)
+    monkeypatch.setattr(api, "PRICE_ARTIFACTS_DIR", tmp_path / "price")
+    monkeypatch.setattr(api, "PRICE_ARTIFACTS_VERSION", None)
+    monkeypatch.setattr(api, "_price_artifacts", None)
+    monkeypatch.setattr(api, "_price_latest_stamp", None)
+    monkeypatch.setattr(api, "ADMIN_TOKEN", "secret")
+    original = data_path.read_bytes()
+
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+
+    rows = pd.read_csv(data_path).tail(2).assign(Date="2025-04-07")
+    monkeypatch.setattr(api, "save_price_artifacts", fail)
+    with pytest.raises(OSError):
+        api.append_price_data(rows)
+    assert data_path.read_bytes() == original
+    assert not (tmp_path / "price" / "LATEST").exists()
+
+    monkeypatch.setattr(api, "PRICE_ARTIFACTS_VERSION", "pinned")
+    response = client.post("/data/append", json=[], headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 409
+
+
+def test_price_models_follow_versions_saved_by_other_workers(tmp_path, monkeypatch):
+    """
+    Test that the price endpoints reload the models, and drop cached prices,
+    when another process saves a new artifact version to PRICE_ARTIFACTS_DIR.
+    """
+    import pandas as pd
+    import backend.api as api
+    from backend.price_prediction_model.artifacts import build_price_artifacts, save_price_artifacts
+
+    price_dir = tmp_path / "price"
+    sales = pd.read_csv(api.DATA_PATH)
+    first = save_price_artifacts(build_price_artifacts(sales), price_dir)
+    monkeypatch.setattr(api, "PRICE_ARTIFACTS_DIR", price_dir)
+    monkeypatch.setattr(api, "PRICE_ARTIFACTS_VERSION", None)
+    monkeypatch.setattr(api, "_price_artifacts", None)
+    monkeypatch.setattr(api, "_price_latest_stamp", None)
+
+    params = {"product": "Vitamin C", "year": 2025, "month": 6}
+    before = client.get(PRICE_PREDICT_ENDPOINT, params=params).json()
+    assert api._price_artifacts.version == first
+    assert client.get(PRICE_PREDICT_ENDPOINT, params=params).json() == before
+
+    new_rows = pd.DataFrame([
+        {
+            "Date": f"2025-04-{day:02d}", "Product_Name": "Vitamin C", "Category": "Vitamin",
+            "Units_Sold": 150, "Price": 59.99, "Revenue": 8998.5, "Discount": 0.1,
+            "Units_Returned": 1, "Location": "USA", "Platform": "Amazon",
+        }
+        for day in (7, 14, 21, 28)
+    ])
+    second = save_price_artifacts(build_price_artifacts(pd.concat([sales, new_rows])), price_dir)
+    after = client.get(PRICE_PREDICT_ENDPOINT, params=params).json()
+    assert api._price_artifacts.version == second != first
+    assert after["predicted_price"] != before["predicted_price"]
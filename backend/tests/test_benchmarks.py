@@ -0,0 +1,46 @@
+import json
+
+from benchmarks.compare import compare
+from benchmarks.run import main
+
+
+def test_inprocess_benchmark_writes_results(tmp_path):
+    """
+    Test a tiny in-process benchmark run and the layout of its JSON results.
+    """
+    output = tmp_path / "results.json"
+    main([
+        "--mode", "inprocess", "-n", "6", "-c", "2", "--warmup", "0", "--import-repeat", "0",
+        "--scenario", "revenue", "--scenario", "price_batch", "--output", str(output),
+    ])
+
+    results = json.loads(output.read_text())
+    assert set(results["inprocess"]) == {"revenue", "price_batch"}
+    for result in results["inprocess"].values():
+        assert result["requests"] == 6
+        assert result["errors"] == 0
+        assert result["p50_ms"] <= result["p95_ms"] <= result["p99_ms"]
+
+
+def test_compare_flags_p95_regressions():
+    """
+    Test that compare reports scenarios whose p95 grew beyond the threshold.
+    """
+    base = {"inprocess": {"revenue": {"p95_ms": 10.0}, "price": {"p95_ms": 10.0}}}
+    new = {"inprocess": {"revenue": {"p95_ms": 15.0}, "price": {"p95_ms": 10.5}}}
+
+    _, regressions = compare(base, new, threshold=0.2)
+    assert len(regressions) == 1
+    assert regressions[0].startswith("inprocess/revenue")
+
+
+def test_compare_startup_without_base_value():
+    """
+    Test that startup times with a zero or missing base value are reported as n/a.
+    """
+    base = {"startup": {"import_s_median": 0.0, "server_ready_s": None}}
+    new = {"startup": {"import_s_median": 1.2, "server_ready_s": 2.5}}
+
+    lines, regressions = compare(base, new, threshold=0.2)
+    assert [line.split()[-1] for line in lines] == ["n/a", "n/a"]
+    assert regressions == []
@@ -0,0 +1,57 @@
+from backend.cache import PredictionCache, canonical_key
+from backend.models.revenue import RevenuePayload
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_canonical_key_ignores_field_order():
+    """
+    Test that equal payloads share a key and that the model version is part of it.
+    """
+    payload = {"Price": 30.0, "Day": 5.0, "Category": "Vitamin", "Location": "USA", "Platform": "Amazon"}
+    reordered = dict(reversed(list(payload.items())))
+
+    assert canonical_key("revenue", "v1", payload) == canonical_key("revenue", "v1", reordered)
+    # Validated payloads are canonical: Day=5 and Day=5.0 are the same request
+    assert canonical_key("revenue", "v1", payload) == canonical_key("revenue", "v1", RevenuePayload(**{**payload, "Day": 5}))
+    assert canonical_key("revenue", "v1", payload) != canonical_key("revenue", "v2", payload)
+
+
+def test_cache_evicts_least_recently_used_and_expired_entries():
+    """
+    Test the size bound, the TTL and the hit/miss counters.
+    """
+    clock = FakeClock()
+    cache = PredictionCache(max_size=2, ttl=10, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)  # evicts "b", the least recently used
+
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+    clock.now = 11
+    assert cache.get("a") is None
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 2
+    assert cache.stats()["evictions"] == 2
+
+
+def test_cache_invalidates_one_model():
+    """
+    Test that invalidating a model only drops its entries.
+    """
+    cache = PredictionCache()
+    cache.set(canonical_key("price", "v1", {"product": "Vitamin C"}), 1)
+    cache.set(canonical_key("revenue", "v1", {"Price": 1}), 2)
+
+    cache.invalidate("price")
+    assert cache.get(canonical_key("price", "v1", {"product": "Vitamin C"})) is None
+    assert cache.get(canonical_key("revenue", "v1", {"Price": 1})) == 2
@@ -0,0 +1,78 @@
+import os
+import shutil
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from backend.data import CATEGORICAL_COLUMNS, cache_path, load_sales
+from backend.metadata import build_metadata
+from backend.price_prediction_model.state import PRICE_COLUMNS
+from backend.utils import prepare_data, create_features
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+DATA_PATH = PROJECT_ROOT / "resources" / "data" / "Supplement_Sales_Weekly_Expanded.csv"
+
+
+@pytest.fixture
+def data_path(tmp_path):
+    path = tmp_path / "sales.csv"
+    shutil.copy(DATA_PATH, path)
+    return path
+
+
+def test_load_sales_types_and_values(data_path):
+    """
+    Test that the loaded frame has categorical columns, a parsed Date and the CSV's values.
+    """
+    df = load_sales(data_path)
+    expected = pd.read_csv(DATA_PATH)
+
+    assert cache_path(data_path).exists()
+    assert list(df.columns) == list(expected.columns)
+    for column in CATEGORICAL_COLUMNS:
+        assert isinstance(df[column].dtype, pd.CategoricalDtype)
+        assert df[column].astype(str).tolist() == expected[column].tolist()
+    assert pd.api.types.is_datetime64_any_dtype(df["Date"])
+    pd.testing.assert_series_equal(df["Price"], expected["Price"])
+
+
+def test_load_sales_reads_only_requested_columns(data_path):
+    """
+    Test that column projection returns only the requested columns.
+    """
+    df = load_sales(data_path, columns=PRICE_COLUMNS)
+    assert list(df.columns) == PRICE_COLUMNS
+
+
+def test_cache_is_rebuilt_only_when_content_changes(data_path):
+    """
+    Test that touching the CSV keeps the cache and editing it rebuilds the cache.
+    """
+    load_sales(data_path)
+    parquet = cache_path(data_path)
+    built_at = os.stat(parquet).st_mtime_ns
+
+    stat = os.stat(data_path)
+    os.utime(data_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    load_sales(data_path)
+    assert os.stat(parquet).st_mtime_ns == built_at
+
+    df = pd.read_csv(data_path)
+    df.loc[0, "Product_Name"] = "New Product"
+    df.to_csv(data_path, index=False)
+    assert load_sales(data_path)["Product_Name"].iloc[0] == "New Product"
+
+
+def test_consumers_match_plain_csv(data_path):
+    """
+    Test that the metadata and the price features are the same with the typed frame.
+    """
+    df_csv = pd.read_csv(DATA_PATH)
+    df = load_sales(data_path)
+
+    assert build_metadata(df) == build_metadata(df_csv)
+    pd.testing.assert_frame_equal(
+        create_features(prepare_data(df[PRICE_COLUMNS])),
+        create_features(prepare_data(df_csv[PRICE_COLUMNS])),
+    )
@@ -0,0 +1,103 @@
+import json
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend import executor
+from backend.discount_model.compact import main
+from backend.discount_model.compiled import CompiledDiscountModel, is_compact_artifact
+from backend.inference import DISCOUNT_FEATURES
+from backend.registry import ModelVersion
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+DATA_PATH = PROJECT_ROOT / "resources" / "data" / "Supplement_Sales_Weekly_Expanded.csv"
+DISCOUNT_MODEL_PATH = PROJECT_ROOT / "resources" / "discount" / "discount_model.joblib"
+
+pytestmark = pytest.mark.skipif(not DISCOUNT_MODEL_PATH.exists(), reason="discount model not built")
+
+
+@pytest.fixture(scope="module")
+def pipeline():
+    return joblib.load(DISCOUNT_MODEL_PATH)
+
+
+@pytest.fixture(scope="module")
+def records():
+    df = pd.read_csv(DATA_PATH, nrows=300)
+    df.columns = df.columns.str.lower()
+    df = df[DISCOUNT_FEATURES].copy()
+    df.loc[3, "location"] = "Unknown Location"
+    return df.to_dict("records")
+
+
+def test_compact_export_matches_pipeline(pipeline, records, tmp_path):
+    """
+    Test that the saved compact model scores like the pipeline, memory-mapped or not, in any batch size.
+    """
+    expected = pipeline.predict(pd.DataFrame(records, columns=DISCOUNT_FEATURES))
+    path = tmp_path / "model.forest"
+    main(["export", "--output", str(path)])
+    assert is_compact_artifact(path)
+    assert not is_compact_artifact(DISCOUNT_MODEL_PATH)
+    assert path.stat().st_size < DISCOUNT_MODEL_PATH.stat().st_size / 2
+
+    for memory_map in (True, False):
+        compact = CompiledDiscountModel.load(path, memory_map=memory_map)
+        assert compact.forest is None
+        assert compact.children.dtype == np.int32 and compact.threshold.dtype == np.float32
+        np.testing.assert_allclose(compact.predict_records(records), expected, rtol=0, atol=1e-7)
+        np.testing.assert_allclose(compact.predict_records(records[:1]), expected[:1], rtol=0, atol=1e-7)
+
+
+def test_prune_limits_tree_depth(pipeline, records):
+    """
+    Test that pruning at the full depth changes nothing and depth 0 predicts the training mean.
+    """
+    compiled = CompiledDiscountModel.from_pipeline(pipeline)
+    full = compiled.prune(compiled.max_depth)
+    assert len(full.children) == len(compiled.children)
+    np.testing.assert_array_equal(full.predict_records(records[:20]), compiled.predict_records(records[:20]))
+
+    stump = compiled.prune(0)
+    assert len(stump.children) == len(compiled.roots)
+    np.testing.assert_allclose(stump.predict_records(records[:3]), compiled.value[compiled.roots].mean())
+
+    pruned = compiled.prune(8)
+    assert pruned.max_depth == 8
+    assert pruned.node_depths().max() == 8
+    assert len(pruned.children) < len(compiled.children)
+
+
+def test_executor_serves_compact_artifact(pipeline, records, tmp_path):
+    """
+    Test that a discount version pointing to a compact file is loaded without the pipeline.
+    """
+    path = CompiledDiscountModel.from_pipeline(pipeline).compact().save(tmp_path / "model.forest")
+    version = ModelVersion.create("discount", "compact_test", {"discount_model": path})
+    executor.load_version(version)
+    values = executor.run_task("discount", records[:5], version)
+    expected = pipeline.predict(pd.DataFrame(records[:5], columns=DISCOUNT_FEATURES))
+    np.testing.assert_allclose(values, expected, rtol=0, atol=1e-7)
+
+
+@pytest.mark.skipif(not DATA_PATH.exists(), reason="sales dataset not available")
+def test_report_compares_candidates(tmp_path):
+    """
+    Test that the report measures every candidate on the held-out rows.
+    """
+    data = tmp_path / "sales.csv"
+    pd.read_csv(DATA_PATH, nrows=400).to_csv(data, index=False)
+    summary = main(["report", "--data", str(data), "--output-dir", str(tmp_path / "compact"),
+                    "--depths", "4", "--n-estimators", "5"])
+
+    names = [candidate["name"] for candidate in summary["candidates"]]
+    assert names == ["random_forest", "compact", "compact_depth4", "hist_gradient_boosting"]
+    baseline, compact = summary["candidates"][:2]
+    assert compact["bytes"] < baseline["bytes"]
+    assert compact["max_diff"] < 1e-6
+    assert summary["candidates"][2]["max_depth"] == 4
+    assert summary["test_rows"] == 80
+    assert json.loads((tmp_path / "compact" / "report.json").read_text()) == summary
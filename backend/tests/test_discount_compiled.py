@@ -0,0 +1,57 @@
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression
+from sklearn.pipeline import Pipeline
+
+from backend.discount_model.compiled import WALK_MAX_ROWS, CompiledDiscountModel, compile_discount_model
+from backend.inference import DISCOUNT_FEATURES, score_discount
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+DATA_PATH = PROJECT_ROOT / "resources" / "data" / "Supplement_Sales_Weekly_Expanded.csv"
+DISCOUNT_MODEL_PATH = PROJECT_ROOT / "resources" / "discount" / "discount_model.joblib"
+
+pytestmark = pytest.mark.skipif(not DISCOUNT_MODEL_PATH.exists(), reason="discount model not built")
+
+
+@pytest.fixture(scope="module")
+def pipeline():
+    return joblib.load(DISCOUNT_MODEL_PATH)
+
+
+@pytest.fixture(scope="module")
+def rows():
+    df = pd.read_csv(DATA_PATH, nrows=200)
+    df.columns = df.columns.str.lower()
+    df = df[DISCOUNT_FEATURES].copy()
+    df.loc[[0, 5], "product_name"] = "Unknown Product"
+    df.loc[7, "platform"] = "Unknown Platform"
+    return df
+
+
+def test_compiled_model_matches_pipeline(pipeline, rows):
+    """
+    Test that the compiled model matches the pipeline, unknown categories included.
+    """
+    compiled = CompiledDiscountModel.from_pipeline(pipeline)
+    expected = pipeline.predict(rows)
+
+    # Large batches go through the forest, small ones through the flat arrays
+    np.testing.assert_allclose(compiled.predict(rows), expected, rtol=0, atol=1e-9)
+    small = rows.iloc[:WALK_MAX_ROWS]
+    np.testing.assert_allclose(compiled.predict(small), expected[:WALK_MAX_ROWS], rtol=0, atol=1e-9)
+
+    records = small.to_dict("records")
+    np.testing.assert_allclose(score_discount(records, pipeline, compiled), expected[:WALK_MAX_ROWS], rtol=0, atol=1e-9)
+    np.testing.assert_allclose(score_discount(records, pipeline), expected[:WALK_MAX_ROWS], rtol=0, atol=1e-9)
+
+
+def test_unsupported_pipeline_falls_back(pipeline):
+    """
+    Test that a pipeline with another layout is not compiled.
+    """
+    other = Pipeline([("preprocessor", pipeline.steps[0][1]), ("regressor", LinearRegression())])
+    assert compile_discount_model(other) is None
@@ -0,0 +1,64 @@
+import json
+from pathlib import Path
+
+import joblib
+import pandas as pd
+import pytest
+
+from backend.discount_model.compiled import compile_discount_model
+from backend.discount_model.train import FEATURES, main
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+DATA_PATH = PROJECT_ROOT / "resources" / "data" / "Supplement_Sales_Weekly_Expanded.csv"
+
+pytestmark = pytest.mark.skipif(not DATA_PATH.exists(), reason="sales dataset not available")
+
+
+@pytest.fixture
+def data(tmp_path):
+    path = tmp_path / "data" / "sales.csv"
+    path.parent.mkdir()
+    pd.read_csv(DATA_PATH, nrows=400).to_csv(path, index=False)
+    return path
+
+
+def test_sweep_saves_best_pipeline_and_report(data, tmp_path):
+    """
+    Test that the sweep evaluates every candidate and saves a pipeline the API can compile.
+    """
+    output, sweep = tmp_path / "model.joblib", tmp_path / "sweep"
+    argv = ["--data", str(data), "--output", str(output), "--sweep-dir", str(sweep),
+            "--n-estimators", "5", "10", "--max-depth", "none", "4", "--cv", "2", "--workers", "2"]
+    report = main(argv)
+
+    assert report["evaluated"] == 4
+    assert len(report["candidates"]) == 4
+    assert report["best"]["mae_mean"] == min(c["mae_mean"] for c in report["candidates"])
+    assert json.loads((sweep / "report.json").read_text())["best"] == report["best"]
+
+    pipeline = joblib.load(output)
+    assert pipeline.named_steps["regressor"].get_params() | report["best"]["params"] == \
+        pipeline.named_steps["regressor"].get_params()
+    assert pipeline.named_steps["regressor"].n_jobs is None
+    assert compile_discount_model(pipeline) is not None
+    assert len(pipeline.predict(pd.read_csv(data, nrows=3).rename(columns=str.lower)[FEATURES])) == 3
+
+
+def test_resume_skips_finished_candidates(data, tmp_path):
+    """
+    Test that --resume only evaluates new candidates and ignores a truncated last line.
+    """
+    output, sweep = tmp_path / "model.joblib", tmp_path / "sweep"
+    base = ["--data", str(data), "--output", str(output), "--sweep-dir", str(sweep), "--cv", "2", "--workers", "1"]
+    main([*base, "--n-estimators", "5", "10"])
+    with open(sweep / "results.jsonl", "a") as f:
+        f.write('{"params": {"n_estimators": 2')
+
+    report = main([*base, "--n-estimators", "5", "10", "20", "--resume"])
+    assert report["evaluated"] == 1
+    assert len(report["candidates"]) == 3
+    assert len(list(sweep.glob("matrix-*.npy"))) == 1
+    assert main([*base, "--n-estimators", "5", "10", "20", "--resume"])["evaluated"] == 0
+
+    # Without --resume the sweep starts over
+    assert main([*base, "--n-estimators", "5"])["evaluated"] == 1
@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+
+import backend.api as api
+from backend.executor import InferenceExecutor, MicroBatcher, run_task
+
+REVENUE_ROWS = [
+    {"Price": 10.0 + i, "Day": 1.0 + i, "Category": "Vitamin", "Location": "USA", "Platform": "Amazon"}
+    for i in range(5)
+]
+
+
+def test_micro_batcher_merges_concurrent_rows():
+    """
+    Test that rows submitted within the wait window are scored in one call.
+    """
+    calls = []
+
+    async def run_batch(rows):
+        calls.append(list(rows))
+        return [row * 2 for row in rows]
+
+    async def main():
+        batcher = MicroBatcher(run_batch, max_batch_size=3, max_wait=0.05)
+        return await asyncio.gather(*(batcher.submit(i) for i in range(5))), batcher
+
+    values, batcher = asyncio.run(main())
+    assert values == [0, 2, 4, 6, 8]
+    assert calls == [[0, 1, 2], [3, 4]]
+    assert batcher.stats()["batch_size"]["count"] == 2
+    # Depths seen on submit: 1, 2, 3 (full batch), then 1, 2
+    assert batcher.stats()["queue_depth"]["buckets"]["2"] == 4
+
+
+def test_micro_batcher_propagates_errors():
+    """
+    Test that a failing model call fails every request of the batch.
+    """
+    async def run_batch(rows):
+        raise RuntimeError("boom")
+
+    async def main():
+        batcher = MicroBatcher(run_batch, max_wait=0.01)
+        return await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+
+    assert [str(error) for error in asyncio.run(main())] == ["boom", "boom"]
+
+
+def test_process_pool_matches_in_process_scoring():
+    """
+    Test that worker processes load the models once and return the in-process predictions.
+    """
+    executor = InferenceExecutor(api.initial_versions, workers=1, max_wait=0.01)
+
+    async def main():
+        singles = await asyncio.gather(*(executor.predict_one("revenue", row) for row in REVENUE_ROWS))
+        return singles, await executor.run("revenue", REVENUE_ROWS)
+
+    try:
+        singles, batch = asyncio.run(main())
+    finally:
+        executor.shutdown()
+
+    expected = run_task("revenue", REVENUE_ROWS)
+    assert singles == pytest.approx(expected)
+    assert batch == pytest.approx(expected)
+    assert executor.stats()["revenue"]["batch_size"]["count"] == 1
+
+
+def test_micro_batch_rows_use_their_own_version():
+    """
+    Test that concurrent rows asking for different model versions are scored by their version.
+    """
+    ridge = api.registry.get("revenue")
+    lasso = api.revenue_model_version("lasso", api.REVENUE_MODEL_PATH.parent / "model_lasso.joblib")
+    executor = InferenceExecutor(api.initial_versions, workers=1, max_wait=0.01)
+
+    async def main():
+        return await asyncio.gather(*(
+            executor.predict_one("revenue", row, version)
+            for row in REVENUE_ROWS for version in (ridge, lasso)
+        ))
+
+    try:
+        values = asyncio.run(main())
+    finally:
+        executor.shutdown()
+    assert values[0::2] == pytest.approx(run_task("revenue", REVENUE_ROWS, ridge))
+    assert values[1::2] == pytest.approx(run_task("revenue", REVENUE_ROWS, lasso))
+    assert values[0::2] != pytest.approx(values[1::2])
+    assert executor.stats()["revenue"]["batch_size"]["count"] == 1
+
+
+def test_single_rows_skip_micro_batching_without_pool():
+    """
+    Test that without worker processes single rows are scored directly, with no batching window.
+    """
+    executor = InferenceExecutor(api.initial_versions, max_wait=10)
+
+    async def main():
+        return await asyncio.gather(*(executor.predict_one("revenue", row) for row in REVENUE_ROWS))
+
+    values = asyncio.run(main())
+    assert values == pytest.approx(run_task("revenue", REVENUE_ROWS))
+    assert executor.stats()["revenue"]["batch_size"]["count"] == 0
@@ -0,0 +1,81 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.utils import FEATURE_COLS, prepare_data, create_features, train_models
+from backend.price_prediction_model.feature_store import PriceFeatureStore
+from backend.price_prediction_model.forecast import PriceForecaster
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+DATA_PATH = PROJECT_ROOT / "resources" / "data" / "Supplement_Sales_Weekly_Expanded.csv"
+
+
+@pytest.fixture(scope="module")
+def price_data():
+    df_prepared = prepare_data(pd.read_csv(DATA_PATH))
+    df_features = create_features(df_prepared)
+    return df_prepared, df_features, train_models(df_features)
+
+
+def legacy_features(df_prepared, df_features, product, year, month):
+    """The DataFrame-based feature row that /predict/price used to build."""
+    prices = df_features[df_features["Product_Name"] == product]["Price_Avg"]
+    min_year = df_prepared["Year"].min()
+    return pd.DataFrame([{
+        "Year": year,
+        "Month": month,
+        "Month_sin": np.sin(2 * np.pi * month / 12),
+        "Month_cos": np.cos(2 * np.pi * month / 12),
+        "Years_From_Start": year - min_year,
+        "Time_Index": (year - min_year) * 12 + month,
+        "Time_Index_Squared": ((year - min_year) * 12 + month) ** 2,
+        "Price_Lag_1": prices.iloc[-1],
+        "Price_Lag_3": prices.iloc[-3],
+        "Price_Lag_12": prices.iloc[-12],
+        "Price_MA_6": prices.rolling(6).mean().iloc[-1],
+        "Price_MA_12": prices.rolling(12).mean().iloc[-1],
+    }])
+
+
+def test_feature_store_matches_dataframe_features(price_data):
+    """
+    Test that the store builds the same features and predictions as filtering df_features.
+    """
+    df_prepared, df_features, models = price_data
+    store = PriceFeatureStore.from_features(df_features, min_year=df_prepared["Year"].min())
+
+    assert store.products == list(models)
+    for product, model in models.items():
+        for year, month in [(2024, 12), (2025, 4), (2030, 1)]:
+            expected = legacy_features(df_prepared, df_features, product, year, month)
+            features = store.feature_vector(product, year, month)
+
+            np.testing.assert_allclose(features, expected[FEATURE_COLS].to_numpy()[0], rtol=1e-12)
+            assert features @ model.coef_ + model.intercept_ == pytest.approx(model.predict(expected)[0])
+
+
+def test_forecaster_feeds_predictions_back_into_lags(price_data):
+    """
+    Test the recursive forecast against a step-by-step reference that rebuilds
+    the features from the extended price series.
+    """
+    df_prepared, df_features, models = price_data
+    store = PriceFeatureStore.from_features(df_features, min_year=df_prepared["Year"].min())
+    coef = np.vstack([models[product].coef_ for product in store.products])
+    intercept = np.array([models[product].intercept_ for product in store.products])
+    forecaster = PriceForecaster(store, coef, intercept)
+    product = "Vitamin C"
+    model = models[product]
+
+    years, months, prices = forecaster.trajectory(product, 24)
+    assert forecaster.trajectory(product, 24) is forecaster.trajectory(product, 24)
+
+    series = list(store.history(product))
+    for year, month, price in zip(years, months, prices):
+        features = store.feature_vector(product, year, month)
+        features[7:] = [series[-1], series[-3], series[-12], np.mean(series[-6:]), np.mean(series[-12:])]
+        expected = features @ model.coef_ + model.intercept_
+        assert price == pytest.approx(expected, rel=1e-9)
+        series.append(expected)
@@ -0,0 +1,72 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from backend.utils import prepare_data, create_features
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+DATA_PATH = PROJECT_ROOT / "resources" / "data" / "Supplement_Sales_Weekly_Expanded.csv"
+
+
+def golden_create_features(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    The original create_features implementation, kept as the golden reference
+    for the groupby-native rewrite.
+    """
+    df = df.copy()
+    df_features = (
+        df.groupby(["Product_Name", "Year", "Month"])["Price"]
+        .mean()
+        .reset_index()
+        .rename(columns={"Price": "Price_Avg"})
+    )
+
+    df_features["Years_From_Start"] = df_features["Year"] - df_features["Year"].min()
+    df_features["Time_Index"] = (df_features["Years_From_Start"] * 12) + df_features["Month"]
+    df_features["Time_Index_Squared"] = df_features["Time_Index"] ** 2
+    df_features["Month_sin"] = np.sin(2 * np.pi * df_features["Month"] / 12)
+    df_features["Month_cos"] = np.cos(2 * np.pi * df_features["Month"] / 12)
+
+    df_features = df_features.sort_values(["Product_Name", "Year", "Month"])
+    df_features["Price_Lag_1"] = df_features.groupby("Product_Name")["Price_Avg"].shift(1)
+    df_features["Price_Lag_3"] = df_features.groupby("Product_Name")["Price_Avg"].shift(3)
+    df_features["Price_Lag_12"] = df_features.groupby("Product_Name")["Price_Avg"].shift(12)
+    df_features["Price_MA_6"] = (
+        df_features.groupby("Product_Name")["Price_Avg"].transform(lambda x: x.rolling(6).mean())
+    )
+    df_features["Price_MA_12"] = (
+        df_features.groupby("Product_Name")["Price_Avg"].transform(lambda x: x.rolling(12).mean())
+    )
+
+    return df_features.dropna().reset_index(drop=True)
+
+
+def test_create_features_matches_golden_on_dataset():
+    """
+    Test that create_features returns exactly the golden output for the project dataset.
+    """
+    df = prepare_data(pd.read_csv(DATA_PATH))
+    pd.testing.assert_frame_equal(create_features(df), golden_create_features(df), check_exact=True)
+
+
+def test_create_features_matches_golden_with_gaps_and_missing_values():
+    """
+    Test unsorted input with missing months, NaN prices, rows without a product
+    and a product with too little history.
+    """
+    rng = np.random.default_rng(0)
+    dates = pd.date_range("2019-01-07", periods=160, freq="W-MON")
+    frames = []
+    for name, step in [("Zinc", 1), ("Ashwagandha", 2), ("Biotin", 1), ("Short", 40)]:
+        frame = pd.DataFrame({"Date": dates[::step], "Product_Name": name})
+        frame["Price"] = rng.uniform(10, 60, len(frame))
+        frames.append(frame)
+    df = pd.concat(frames, ignore_index=True).sample(frac=1, random_state=0)
+    df.loc[df.index[:5], "Price"] = np.nan
+    df.loc[df.index[5:8], "Product_Name"] = None
+    df = prepare_data(df)
+
+    expected = golden_create_features(df)
+    assert not expected.empty
+    pd.testing.assert_frame_equal(create_features(df), expected, check_exact=True)
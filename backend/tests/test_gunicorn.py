@@ -0,0 +1,57 @@
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+import pytest
+from dotenv import dotenv_values
+
+psutil = pytest.importorskip("psutil")
+pytest.importorskip("gunicorn")
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="USS is read from /proc")
+def test_preloaded_workers_share_model_memory():
+    """
+    Test that with preload_app most of each worker's RSS is shared with the master:
+    the memory unique to a worker (USS) stays a small fraction of its RSS.
+    """
+    port = free_port()
+    # Other test modules rewrite the .env settings in os.environ; let the app read .env itself
+    env = {key: value for key, value in os.environ.items() if key not in dotenv_values(PROJECT_ROOT / ".env")}
+    env = {**env, "WEB_CONCURRENCY": "2", "GUNICORN_BIND": f"127.0.0.1:{port}", "GUNICORN_PRELOAD": "true"}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "backend/gunicorn.conf.py", "backend.api:app"],
+        cwd=PROJECT_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        for _ in range(200):
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{port}/metadata", timeout=1)
+                break
+            except OSError:
+                time.sleep(0.1)
+        else:
+            pytest.fail("gunicorn did not start")
+        for _ in range(10):
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/predict/price?product=Vitamin%20C&year=2025&month=6")
+
+        workers = psutil.Process(server.pid).children()
+        assert len(workers) == 2
+        for worker in workers:
+            memory = worker.memory_full_info()
+            assert memory.uss < 0.25 * memory.rss
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
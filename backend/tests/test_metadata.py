@@ -0,0 +1,61 @@
+import os
+import shutil
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from backend.metadata import MetadataIndex, build_metadata
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+DATA_PATH = PROJECT_ROOT / "resources" / "data" / "Supplement_Sales_Weekly_Expanded.csv"
+
+
+def legacy_product_info(df: pd.DataFrame) -> dict:
+    """The per-product filtering that /metadata used before the index."""
+    return {
+        name: {
+            "category": df[df["Product_Name"] == name]["Category"].mode().iloc[0],
+            "avg_price": df[df["Product_Name"] == name]["Price"].mean(),
+            "avg_units_sold": df[df["Product_Name"] == name]["Units_Sold"].mean(),
+        }
+        for name in df["Product_Name"].unique().tolist()
+    }
+
+
+def test_build_metadata_matches_legacy_computation():
+    """
+    Test that the grouped aggregation returns the same values as filtering per product.
+    """
+    df = pd.read_csv(DATA_PATH)
+    metadata = build_metadata(df)
+    expected = legacy_product_info(df)
+
+    assert metadata["products"] == list(expected)
+    for name, info in expected.items():
+        assert metadata["product_info"][name]["category"] == info["category"]
+        assert metadata["product_info"][name]["avg_price"] == pytest.approx(info["avg_price"])
+        assert metadata["product_info"][name]["avg_units_sold"] == pytest.approx(info["avg_units_sold"])
+
+
+def test_metadata_index_rebuilds_when_dataset_changes(tmp_path):
+    """
+    Test that the index serves the cached snapshot until the dataset changes on disk.
+    """
+    data_path = tmp_path / "sales.csv"
+    shutil.copy(DATA_PATH, data_path)
+    index = MetadataIndex(data_path)
+
+    first = index.get()
+    assert index.get() is first
+
+    df = pd.read_csv(data_path)
+    df.loc[0, "Product_Name"] = "New Product"
+    df.to_csv(data_path, index=False)
+    stat = os.stat(data_path)
+    os.utime(data_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    second = index.get()
+    assert second is not first
+    assert second.etag != first.etag
+    assert b"New Product" in second.body
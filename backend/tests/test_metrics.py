@@ -0,0 +1,82 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.metrics import MetricsMiddleware, MetricsRegistry, StageTimer
+
+
+def test_registry_renders_prometheus_text():
+    """
+    Test that counters, gauges, histograms and collectors render in the text format.
+    """
+    registry = MetricsRegistry()
+    registry.counter("jobs_total", "Jobs.", ("kind",)).labels("a").inc(2)
+    registry.gauge("temperature", "Temperature.").labels().set(21.5)
+    registry.histogram("latency_seconds", "Latency.", ("stage",), buckets=(0.1, 1.0)).labels("encode").observe(0.5)
+    registry.add_collector(lambda: [("hits_total", "counter", "Hits.", [({}, 7)])])
+
+    text = registry.render()
+    assert "# TYPE jobs_total counter" in text
+    assert 'jobs_total{kind="a"} 2.0' in text
+    assert "temperature 21.5" in text
+    assert 'latency_seconds_bucket{stage="encode",le="0.1"} 0' in text
+    assert 'latency_seconds_bucket{stage="encode",le="1.0"} 1' in text
+    assert 'latency_seconds_bucket{stage="encode",le="+Inf"} 1' in text
+    assert 'latency_seconds_count{stage="encode"} 1' in text
+    assert "hits_total 7" in text
+
+
+def test_stage_timer_records_stages_in_order():
+    """
+    Test that each mark records the time since the previous one.
+    """
+    timer = StageTimer(start=0.0)
+    timer.mark("parse")
+    timer.mark("predict")
+    assert [stage for stage, _ in timer.stages] == ["parse", "predict"]
+    assert all(seconds >= 0 for _, seconds in timer.stages)
+
+
+def test_middleware_labels_by_route_template():
+    """
+    Test that requests are counted per route template and status, not per URL.
+    """
+    registry = MetricsRegistry()
+    app = FastAPI()
+
+    @app.get("/items/{name}")
+    def item(name: str):
+        return {"name": name}
+
+    app.add_middleware(MetricsMiddleware, registry=registry)
+    client = TestClient(app)
+    client.get("/items/a")
+    client.get("/items/b")
+    client.get("/missing")
+
+    text = registry.render()
+    assert 'http_requests_total{method="GET",route="/items/{name}",status="200"} 2.0' in text
+    assert 'http_requests_total{method="GET",route="unmatched",status="404"} 1.0' in text
+    assert 'http_request_duration_seconds_count{method="GET",route="/items/{name}"} 2' in text
+
+
+def test_api_metrics_endpoint():
+    """
+    Test that /metrics exposes request, stage, startup and cache metrics after a prediction.
+    """
+    from backend.api import app
+
+    client = TestClient(app)
+    payload = {"Price": 33.0, "Day": 4.0, "Category": "Vitamin", "Location": "USA", "Platform": "Amazon"}
+    assert client.post("/predict/revenue", json=payload).status_code == 200
+    assert client.post("/predict/revenue", json=payload).status_code == 200
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    assert 'http_requests_total{method="POST",route="/predict/revenue",status="200"}' in text
+    assert 'prediction_stage_duration_seconds_count{model="revenue",stage="parse_validate"}' in text
+    assert 'prediction_stage_duration_seconds_count{model="revenue",stage="model_predict"}' in text
+    assert 'startup_duration_seconds{stage="revenue_load"}' in text
+    assert "prediction_cache_hit_ratio" in text
+    assert 'inference_batch_size_count{model="revenue"}' in text
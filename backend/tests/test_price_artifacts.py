@@ -0,0 +1,64 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.price_prediction_model.artifacts import (
+    ArtifactError, build_price_artifacts, latest_version, load_price_artifacts, save_price_artifacts,
+)
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+DATA_PATH = PROJECT_ROOT / "resources" / "data" / "Supplement_Sales_Weekly_Expanded.csv"
+
+
+@pytest.fixture(scope="module")
+def artifacts():
+    return build_price_artifacts(pd.read_csv(DATA_PATH))
+
+
+def test_saved_artifacts_round_trip(artifacts, tmp_path):
+    """
+    Test that saved artifacts load memory-mapped and predict like the in-memory models.
+    """
+    version = save_price_artifacts(artifacts, tmp_path, source=DATA_PATH)
+    assert latest_version(tmp_path) == version
+    assert (tmp_path / version / "manifest.json").exists()
+
+    loaded = load_price_artifacts(tmp_path)
+    assert loaded.version == version
+    assert isinstance(loaded.coef, np.memmap)
+    assert loaded.catalog == artifacts.catalog
+    for product in artifacts.store.products:
+        np.testing.assert_array_equal(
+            loaded.predict(product, [2024, 2025], [12, 6]),
+            artifacts.predict(product, [2024, 2025], [12, 6]),
+        )
+
+    # Same content, same version
+    assert save_price_artifacts(artifacts, tmp_path) == version
+
+
+def test_load_rejects_modified_artifacts(artifacts, tmp_path):
+    """
+    Test that a file that no longer matches the manifest hash is rejected.
+    """
+    version = save_price_artifacts(artifacts, tmp_path)
+    np.save(tmp_path / version / "coef.npy", np.zeros_like(artifacts.coef))
+
+    with pytest.raises(ArtifactError):
+        load_price_artifacts(tmp_path)
+    with pytest.raises(ArtifactError):
+        load_price_artifacts(tmp_path, version="missing")
+
+
+def test_training_state_is_only_verified_when_loaded(artifacts, tmp_path):
+    """
+    Test that the training state is not hashed by a plain load, and is checked when it is loaded.
+    """
+    version = save_price_artifacts(artifacts, tmp_path)
+    (tmp_path / version / "training.npz").write_bytes(b"corrupt")
+
+    assert load_price_artifacts(tmp_path).version == version
+    with pytest.raises(ArtifactError):
+        load_price_artifacts(tmp_path, with_training=True)
@@ -0,0 +1,113 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.price_prediction_model.artifacts import (
+    artifacts_from_state, load_price_artifacts, save_price_artifacts,
+)
+from backend.price_prediction_model.state import PriceTrainingState
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+DATA_PATH = PROJECT_ROOT / "resources" / "data" / "Supplement_Sales_Weekly_Expanded.csv"
+
+
+@pytest.fixture(scope="module")
+def sales():
+    return pd.read_csv(DATA_PATH)
+
+
+def assert_same_models(state, expected):
+    """Compares two states product by product (new products are appended, not sorted)."""
+    assert sorted(state.store.products) == sorted(expected.store.products)
+    for j, product in enumerate(expected.store.products):
+        i = state.store.index[product]
+        np.testing.assert_allclose(state.store.state[i], expected.store.state[j], rtol=1e-12)
+        np.testing.assert_array_equal(state.store.last_period[i], expected.store.last_period[j])
+
+        X = state.store.feature_matrix(product, [2025, 2026, 2030], [4, 1, 12])
+        np.testing.assert_allclose(
+            X @ state.coef[i] + state.intercept[i],
+            X @ expected.coef[j] + expected.intercept[j],
+            rtol=1e-8,
+        )
+
+
+def test_append_matches_full_rebuild(sales):
+    """
+    Test that appending the last weeks incrementally gives the same models as
+    training on the whole dataset, including a month that was already partially loaded.
+    """
+    base = sales[sales["Date"] < "2025-02-10"]
+    new = sales[sales["Date"] >= "2025-02-10"]
+
+    state, affected = PriceTrainingState.from_sales(base).append(new)
+
+    assert sorted(affected) == sorted(new["Product_Name"].unique())
+    assert_same_models(state, PriceTrainingState.from_sales(sales))
+
+
+def test_append_new_product(sales):
+    """
+    Test that a product gets a model once it has enough history.
+    """
+    new_product = sales[sales["Product_Name"] == "Zinc"].assign(Product_Name="Glucosamine")
+
+    state, affected = PriceTrainingState.from_sales(sales).append(new_product)
+
+    assert affected == ["Glucosamine"]
+    assert state.catalog[-1] == "Glucosamine"
+    assert_same_models(state, PriceTrainingState.from_sales(pd.concat([sales, new_product])))
+
+
+def test_append_rejects_rows_before_first_year(sales):
+    with pytest.raises(ValueError):
+        PriceTrainingState.from_sales(sales).append(sales.head(1).assign(Date="2019-06-03"))
+
+
+def test_training_state_persists_with_artifacts(sales, tmp_path):
+    """
+    Test that the training state saved with the artifacts can be appended to after loading.
+    """
+    base = sales[sales["Date"] < "2025-01-01"]
+    new = sales[sales["Date"] >= "2025-01-01"]
+    version = save_price_artifacts(artifacts_from_state(PriceTrainingState.from_sales(base), "base"), tmp_path)
+
+    loaded = load_price_artifacts(tmp_path, version, with_training=True)
+    state, _ = loaded.training.append(new)
+
+    assert_same_models(state, PriceTrainingState.from_sales(sales))
+
+
+def test_concurrent_appends_from_processes_keep_every_row(sales, tmp_path):
+    """
+    Test that two processes appending at the same time are serialized by the
+    artifact lock: the latest version holds the rows of both, like the CSV.
+    """
+    base = sales[sales["Date"] < "2025-01-01"]
+    new = sales[sales["Date"] >= "2025-01-01"]
+    products = sorted(new["Product_Name"].unique())
+    data_path = tmp_path / "sales.csv"
+    base.to_csv(data_path, index=False)
+    save_price_artifacts(artifacts_from_state(PriceTrainingState.from_sales(base), "base"), tmp_path / "price")
+
+    script = (
+        "import sys, pandas as pd; from pathlib import Path; "
+        "from backend.price_prediction_model.append import append_sales; "
+        "append_sales(pd.read_csv(sys.argv[1]), Path(sys.argv[2]), Path(sys.argv[3]))"
+    )
+    processes = []
+    for i, half in enumerate((products[::2], products[1::2])):
+        rows_path = tmp_path / f"rows_{i}.csv"
+        new[new["Product_Name"].isin(half)].to_csv(rows_path, index=False)
+        processes.append(subprocess.Popen(
+            [sys.executable, "-c", script, str(rows_path), str(data_path), str(tmp_path / "price")], cwd=PROJECT_ROOT,
+        ))
+    assert [process.wait(timeout=120) for process in processes] == [0, 0]
+
+    assert len(pd.read_csv(data_path)) == len(sales)
+    latest = load_price_artifacts(tmp_path / "price", with_training=True)
+    assert_same_models(latest.training, PriceTrainingState.from_sales(pd.read_csv(data_path)))
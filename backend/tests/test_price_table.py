@@ -0,0 +1,69 @@
+from dataclasses import replace
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+import backend.api as api
+from backend.price_prediction_model.artifacts import build_price_artifacts
+from backend.price_prediction_model.table import PriceForecastTable
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+DATA_PATH = PROJECT_ROOT / "resources" / "data" / "Supplement_Sales_Weekly_Expanded.csv"
+
+
+@pytest.fixture(scope="module")
+def artifacts():
+    return build_price_artifacts(pd.read_csv(DATA_PATH))
+
+
+def test_table_matches_live_predictions(artifacts):
+    """
+    Test that predictions from the table match the live models inside the grid and fall back to them outside it.
+    """
+    table = PriceForecastTable.build(artifacts, 2024, 2030)
+    tabled = replace(artifacts, table=table)
+    assert table.values.shape == (len(artifacts.store.products), 7, 12)
+
+    product = artifacts.store.products[2]
+    years, months = [2023, 2024, 2027, 2030, 2031], [12, 1, 6, 12, 1]
+    np.testing.assert_allclose(tabled.predict(product, years, months), artifacts.predict(product, years, months))
+    assert (table.hits, table.misses) == (3, 2)
+
+    products = [product, "Unknown", artifacts.store.products[0], product]
+    rows = tabled.predict_rows(products, [2025, 2025, 2040, 2029], [3, 3, 1, 13])
+    np.testing.assert_allclose(rows, artifacts.predict_rows(products, [2025, 2025, 2040, 2029], [3, 3, 1, 13]))
+    assert np.isnan(rows[1])
+    assert table.value(artifacts.store.index[product], 2025, 3) == rows[0]
+
+
+def test_table_respects_memory_budget(artifacts):
+    """
+    Test that the table keeps only the first years that fit in the budget, or is not built at all.
+    """
+    year_bytes = len(artifacts.store.products) * 12 * 8
+    table = PriceForecastTable.build(artifacts, 2023, 2100, max_bytes=3 * year_bytes + 1)
+    assert (table.first_year, table.last_year, table.nbytes) == (2023, 2025, 3 * year_bytes)
+    assert table.covers(2025, 12) and not table.covers(2026, 1)
+    assert PriceForecastTable.build(artifacts, 2023, 2100, max_bytes=year_bytes - 1) is None
+
+
+def test_price_endpoint_reads_table(monkeypatch, artifacts):
+    """
+    Test that the price endpoint answers grid targets from the table, and others live through the cache.
+    """
+    monkeypatch.setattr(api, "PRICE_TABLE_YEARS", "2024-2026")
+    monkeypatch.setattr(api, "_price_artifacts", api.with_forecast_table(replace(artifacts, version="table-test")))
+    monkeypatch.setattr(api, "_price_latest_stamp", api.price_latest_stamp())
+    table = api._price_artifacts.table
+    client = TestClient(api.app)
+    product = artifacts.store.products[1]
+
+    for year in (2025, 2050):
+        body = client.get(api.PRICE_PREDICTION_ENDPOINT, params={"product": product, "year": year, "month": 4}).json()
+        assert body["predicted_price"] == round(float(artifacts.predict(product, [year], [4])[0]), 2)
+    assert (table.hits, table.misses) == (1, 1)
+    samples = {name: values for name, _, _, values in api.collect_runtime_metrics()}
+    assert samples["price_table_bytes"] == [({}, table.nbytes)]
@@ -0,0 +1,57 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.utils import FEATURE_COLS, prepare_data, create_features, train_models
+from backend.price_prediction_model.feature_store import PriceFeatureStore
+from backend.price_prediction_model.training import STAT_ARRAYS, RegressionStats, train_models_batched
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+DATA_PATH = PROJECT_ROOT / "resources" / "data" / "Supplement_Sales_Weekly_Expanded.csv"
+
+
+@pytest.fixture(scope="module")
+def price_data():
+    df_prepared = prepare_data(pd.read_csv(DATA_PATH))
+    return df_prepared, create_features(df_prepared)
+
+
+def test_batched_training_matches_linear_regression(price_data):
+    """
+    Test that the batched solve predicts like one LinearRegression per product,
+    both on the training rows and on future months.
+    """
+    df_prepared, df_features = price_data
+    models = train_models(df_features)
+    products, coef, intercept = train_models_batched(df_features)
+    store = PriceFeatureStore.from_features(df_features, min_year=df_prepared["Year"].min())
+
+    assert products == list(models)
+    for i, product in enumerate(products):
+        X = df_features.loc[df_features["Product_Name"] == product, FEATURE_COLS]
+        np.testing.assert_allclose(X.to_numpy() @ coef[i] + intercept[i], models[product].predict(X), atol=1e-8)
+
+        future = store.feature_matrix(product, [2025, 2026, 2030], [4, 1, 12])
+        expected = models[product].predict(pd.DataFrame(future, columns=FEATURE_COLS))
+        np.testing.assert_allclose(future @ coef[i] + intercept[i], expected, atol=1e-6)
+
+
+def test_stats_match_per_product_updates(price_data):
+    """
+    Test that the grouped statistics equal those accumulated product by product,
+    also when the products have very different numbers of rows.
+    """
+    _, df_features = price_data
+    first = df_features["Product_Name"].iloc[0]
+    skewed = pd.concat([df_features] + [df_features[df_features["Product_Name"] == first]] * 20)
+    stats = RegressionStats.from_features(skewed)
+
+    expected = RegressionStats.from_features(skewed.iloc[:0])
+    for product, group in skewed.groupby("Product_Name", sort=False):
+        expected.add_product(product, group[FEATURE_COLS].to_numpy(dtype=float), group["Price_Avg"].to_numpy(dtype=float))
+
+    assert stats.products == expected.products
+    for name in STAT_ARRAYS:
+        np.testing.assert_allclose(getattr(stats, name), getattr(expected, name), rtol=1e-9, atol=1e-6)
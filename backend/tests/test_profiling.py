@@ -0,0 +1,99 @@
+import json
+import pstats
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.profiling import ProfilingMiddleware, is_profiling, profile_thread
+
+
+def busy_work():
+    return sum(i * i for i in range(1000))
+
+
+def make_client(tmp_path, **kwargs) -> TestClient:
+    app = FastAPI()
+
+    @app.get("/items/{name}")
+    @profile_thread
+    def item(name: str):
+        return {"name": name, "value": busy_work(), "profiling": is_profiling()}
+
+    app.add_middleware(ProfilingMiddleware, directory=tmp_path, **{"admin_token": "secret", **kwargs})
+    return TestClient(app)
+
+
+def test_unflagged_requests_are_not_profiled(tmp_path):
+    """
+    Test that requests without the flag run normally and write nothing.
+    """
+    client = make_client(tmp_path)
+    response = client.get("/items/a")
+    assert response.json()["profiling"] is False
+    assert "x-profile-id" not in response.headers
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_profile_requires_admin_token(tmp_path):
+    """
+    Test that the profiling flag is rejected without the admin token.
+    """
+    client = make_client(tmp_path)
+    assert client.get("/items/a", headers={"X-Profile": "1"}).status_code == 403
+    assert client.get("/items/a?profile=1", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    latin1 = {"X-Profile": "1", "X-Admin-Token": "é".encode("latin-1")}
+    assert client.get("/items/a", headers=latin1).status_code == 403
+    assert client.get("/items/a", headers={"X-Profile": b"\xff"}).status_code == 200
+
+
+def test_profile_flags_are_ignored_without_admin_token(tmp_path):
+    """
+    Test that without a configured admin token an unauthenticated ?profile=text gets the normal response.
+    """
+    client = make_client(tmp_path, admin_token=None)
+    response = client.get("/items/a?profile=text", headers={"X-Profile": "1"})
+    assert response.status_code == 200
+    assert response.json()["profiling"] is False
+    assert "x-profile-id" not in response.headers
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_profile_is_saved_with_thread_frames(tmp_path):
+    """
+    Test that a flagged request keeps its response, and that the saved profile
+    includes the sync endpoint that ran in the threadpool.
+    """
+    client = make_client(tmp_path)
+    response = client.get("/items/a", headers={"X-Profile": "1", "X-Admin-Token": "secret"})
+    assert response.status_code == 200
+    assert response.json()["profiling"] is True
+
+    name = response.headers["x-profile-id"]
+    functions = {func for _, _, func in pstats.Stats(str(tmp_path / name)).stats}
+    assert "busy_work" in functions
+    info = json.loads((tmp_path / name).with_suffix(".json").read_text())
+    assert info["route"] == "/items/{name}"
+    assert info["status"] == 200
+    assert info["threads"] == 2
+
+
+def test_profile_text_report(tmp_path):
+    """
+    Test that ?profile=text returns the pstats report instead of the response.
+    """
+    client = make_client(tmp_path)
+    response = client.get("/items/a?profile=text", headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert response.headers["x-profile-status"] == "200"
+    assert "Ordered by: cumulative time" in response.text
+
+
+def test_sampled_profiles_rotate(tmp_path):
+    """
+    Test that sampled requests are profiled and only the newest files are kept.
+    """
+    client = make_client(tmp_path, sample_rate=1.0, keep=2)
+    names = [client.get(f"/items/{i}").headers["x-profile-id"] for i in range(4)]
+    assert sorted(p.name for p in tmp_path.glob("*.prof")) == sorted(names[-2:])
+    assert len(list(tmp_path.glob("*.json"))) == 2
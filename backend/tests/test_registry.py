@@ -0,0 +1,184 @@
+import asyncio
+import json
+import os
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import backend.api as api
+from backend.registry import ModelRegistry, ModelVersion
+
+REVENUE_DIR = api.REVENUE_MODEL_PATH.parent
+PAYLOAD = {"Price": 42.0, "Day": 9.0, "Category": "Protein", "Location": "UK", "Platform": "iHerb"}
+
+
+def discount_version(name: str) -> ModelVersion:
+    return ModelVersion.create("discount", name, {"discount_model": api.DISCOUNT_MODEL_PATH})
+
+
+def test_registry_serves_only_warm_versions():
+    """
+    Test that a version is only served after warming, and that a failed reload keeps the previous one.
+    """
+    registry = ModelRegistry()
+    registry.add(discount_version("v1"))
+    warmed = []
+
+    async def warm(version):
+        warmed.append(version.name)
+
+    async def broken(version):
+        raise RuntimeError("bad file")
+
+    async def main():
+        task = registry.load_in_background(discount_version("v2"), warm)
+        assert registry.is_loading("discount", "v2")
+        with pytest.raises(KeyError):
+            registry.get("discount", "v2")
+        await task
+        with pytest.raises(RuntimeError):
+            await registry.load(discount_version("v1"), broken, activate=True)
+
+    asyncio.run(main())
+    assert warmed == ["v2"]
+    assert registry.get("discount").name == "v1"
+    assert registry.get("discount", "v2").name == "v2"
+    status = registry.describe()["discount"]
+    assert status["active"] == "v1"
+    assert status["versions"]["v1"]["state"] == "failed"
+    assert status["versions"]["v2"]["state"] == "ready"
+
+    registry.activate("discount", "v2")
+    assert registry.get("discount").name == "v2"
+    with pytest.raises(KeyError):
+        registry.activate("discount", "v3")
+
+
+def test_registries_share_versions_through_manifest(tmp_path):
+    """
+    Test that versions loaded and activated in one process's registry reach another one through the manifest.
+    """
+    first, second = ModelRegistry(tmp_path / "registry.json"), ModelRegistry(tmp_path / "registry.json")
+    for registry in (first, second):
+        registry.add(discount_version("v1"))
+    warmed = []
+
+    async def warm(version):
+        warmed.append(version.name)
+
+    async def main():
+        second.sync(warm)
+        await first.load(discount_version("v2"), warm, activate=True, publish=True)
+        assert second.get("discount").name == "v1"
+
+        second.sync(warm)
+        assert second.is_loading("discount", "v2")
+        await second.wait_loaded("discount", "v2")
+        assert second.get("discount").name == "v2"
+        second.sync(warm)
+        assert warmed == ["v2", "v2"]
+
+        second.activate("discount", "v1")
+        first.sync(warm)
+        assert first.get("discount").name == "v1"
+        assert warmed == ["v2", "v2"]
+
+    asyncio.run(main())
+
+
+def test_model_version_requires_files():
+    """
+    Test that versions are validated when they are created.
+    """
+    with pytest.raises(FileNotFoundError):
+        ModelVersion.create("discount", "v9", {"discount_model": REVENUE_DIR / "missing.joblib"})
+    with pytest.raises(ValueError):
+        ModelVersion.create("revenue", "x", {"revenue_model": api.REVENUE_MODEL_PATH})
+    with pytest.raises(ValueError):
+        ModelVersion.create("price", "x", {})
+
+
+def wait_until_ready(client: TestClient, task: str, name: str, timeout: float = 30) -> dict:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = client.get("/models").json()[task]["versions"].get(name, {})
+        if status.get("state") in ("ready", "failed"):
+            return status
+        time.sleep(0.05)
+    raise TimeoutError(name)
+
+
+def test_load_select_and_activate_versions(tmp_path, monkeypatch):
+    """
+    Test that a version loaded through the API can be requested per request and then activated.
+    """
+    monkeypatch.setattr(api, "ADMIN_TOKEN", "secret")
+    monkeypatch.setattr(api.registry, "manifest_path", tmp_path / "model_registry.json")
+    admin = {"X-Admin-Token": "secret"}
+    endpoint = api.REVENUE_PREDICTION_ENDPOINT
+    active = api.registry.get("revenue").name
+
+    with TestClient(api.app) as client:
+        body = {"name": "lasso_test", "path": str(REVENUE_DIR / "model_lasso.joblib")}
+        assert client.post("/models/revenue/versions", json=body).status_code == 403
+        assert client.post("/models/revenue/versions", json={**body, "path": "missing.joblib"},
+                           headers=admin).status_code == 422
+        for outside in ("/etc/passwd", "resources/../backend/api.py"):
+            assert client.post("/models/revenue/versions", json={**body, "path": outside},
+                               headers=admin).status_code == 422
+        assert client.post("/models/revenue/versions", json=body, headers=admin).status_code == 202
+        assert wait_until_ready(client, "revenue", "lasso_test")["state"] == "ready"
+        manifest = json.loads((tmp_path / "model_registry.json").read_text())
+        assert [entry["name"] for entry in manifest["versions"]] == ["lasso_test"]
+        assert client.get("/models").json()["pid"] == os.getpid()
+
+        default = client.post(endpoint, json=PAYLOAD)
+        selected = client.post(f"{endpoint}?model_version=lasso_test", json=PAYLOAD)
+        assert default.headers["x-model-version"] == active
+        assert selected.headers["x-model-version"] == "lasso_test"
+        assert selected.json()["predicted_revenue"] != pytest.approx(default.json()["predicted_revenue"])
+        by_header = client.post(endpoint, json=PAYLOAD, headers={"X-Model-Version": "lasso_test"})
+        assert by_header.json() == selected.json()
+        assert client.post(f"{endpoint}?model_version=nope", json=PAYLOAD).status_code == 404
+
+        batch = client.post(f"{endpoint}/batch?model_version=lasso_test", json=[PAYLOAD])
+        assert batch.json()["predictions"][0]["predicted_revenue"] == pytest.approx(selected.json()["predicted_revenue"])
+
+        try:
+            response = client.put("/models/revenue/active", json={"name": "lasso_test"}, headers=admin)
+            assert response.status_code == 200
+            assert response.json()["active"] == "lasso_test"
+            assert client.post(endpoint, json=PAYLOAD).json() == selected.json()
+            assert client.put("/models/revenue/active", json={"name": "nope"}, headers=admin).status_code == 409
+        finally:
+            api.registry.activate("revenue", active)
+
+
+def test_admin_endpoints_are_disabled_without_token(monkeypatch):
+    """
+    Test that the admin endpoints reject every request when no admin token is configured.
+    """
+    monkeypatch.setattr(api, "ADMIN_TOKEN", None)
+    client = TestClient(api.app)
+    body = {"name": "lasso_test", "path": str(REVENUE_DIR / "model_lasso.joblib")}
+    for headers in ({}, {"X-Admin-Token": ""}):
+        assert client.post("/models/revenue/versions", json=body, headers=headers).status_code == 403
+        assert client.put("/models/revenue/active", json={"name": "ridge"}, headers=headers).status_code == 403
+        assert client.post("/data/append", json=[], headers=headers).status_code == 403
+
+
+def test_admin_token_with_non_ascii_header_is_rejected(monkeypatch):
+    """
+    Test that a non-ASCII admin token header gets 403 instead of a server error, and that a non-ASCII token works.
+    """
+    client = TestClient(api.app)
+    monkeypatch.setattr(api, "ADMIN_TOKEN", "secret")
+    headers = {"X-Admin-Token": "é".encode("latin-1")}
+    assert client.post("/data/append", json=[], headers=headers).status_code == 403
+    body = {"name": "lasso_test", "path": str(REVENUE_DIR / "model_lasso.joblib")}
+    assert client.post("/models/revenue/versions", json=body, headers=headers).status_code == 403
+
+    monkeypatch.setattr(api, "ADMIN_TOKEN", "sécret")
+    response = client.put("/models/revenue/active", json={"name": "nope"}, headers={"X-Admin-Token": "sécret".encode()})
+    assert response.status_code == 409
@@ -0,0 +1,81 @@
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+from backend.data import load_sales
+from backend.inference import score_revenue
+from backend.revenue_model.compiled import CompiledRevenueModel, compile_revenue_model
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+DATA_PATH = PROJECT_ROOT / "resources" / "data" / "Supplement_Sales_Weekly_Expanded.csv"
+REVENUE_DIR = PROJECT_ROOT / "resources" / "revenue"
+
+
+@pytest.fixture(scope="module")
+def artifacts():
+    return {
+        "scaler": joblib.load(REVENUE_DIR / "standard_scaler.joblib"),
+        "category_dict": joblib.load(REVENUE_DIR / "category_by_price_dict.joblib"),
+        "location_dict": joblib.load(REVENUE_DIR / "location_by_price_dict.joblib"),
+        "platform_dict": joblib.load(REVENUE_DIR / "platform_by_price_dict.joblib"),
+    }
+
+
+@pytest.fixture(scope="module")
+def rows():
+    df = pd.read_csv(DATA_PATH, nrows=300)
+    df["Day"] = pd.to_datetime(df["Date"]).dt.day.astype(float)
+    df.loc[[0, 5], "Category"] = "Unknown Category"
+    df.loc[7, "Platform"] = "Unknown Platform"
+    return df[["Price", "Day", "Category", "Location", "Platform"]]
+
+
+@pytest.mark.parametrize("name", ["ridge", "lasso", "elastic"])
+def test_compiled_model_matches_scaler_and_model(name, artifacts, rows):
+    """
+    Test that the folded weights match scaler + model, unknown categories included.
+    """
+    model = joblib.load(REVENUE_DIR / f"model_{name}.joblib")
+    compiled = CompiledRevenueModel.from_artifacts(model, **artifacts)
+    expected = score_revenue(rows, model, **artifacts)
+
+    np.testing.assert_allclose(compiled.predict(rows), expected, rtol=1e-12, atol=1e-8)
+    records = rows.to_dict("records")
+    np.testing.assert_allclose(compiled.predict_records(records), expected, rtol=1e-12, atol=1e-8)
+    np.testing.assert_allclose(compiled.predict_records(records[:1]), expected[:1], rtol=1e-12, atol=1e-8)
+    np.testing.assert_allclose(score_revenue(rows, model, **artifacts, compiled=compiled), expected)
+
+
+def test_compiled_model_reads_categorical_columns(artifacts):
+    """
+    Test that categorical columns (as loaded from the dataset cache) score like plain strings.
+    """
+    model = joblib.load(REVENUE_DIR / "model_ridge.joblib")
+    compiled = CompiledRevenueModel.from_artifacts(model, **artifacts)
+    df = load_sales(DATA_PATH, columns=["Price", "Date", "Category", "Location", "Platform"]).head(500)
+    df["Day"] = df["Date"].dt.day.astype(float)
+    assert isinstance(df["Category"].dtype, pd.CategoricalDtype)
+
+    expected = score_revenue(df.astype({"Category": object, "Location": object, "Platform": object}), model, **artifacts)
+    np.testing.assert_allclose(compiled.predict(df), expected, rtol=1e-12, atol=1e-8)
+    np.testing.assert_allclose(score_revenue(df, model, **artifacts), expected)
+
+
+def test_non_linear_model_is_not_compiled(artifacts, rows):
+    """
+    Test that a model that is not linear in the scaled features is rejected.
+    """
+    X = artifacts["scaler"].transform(pd.DataFrame({
+        "Price": rows["Price"], "Category_By_Price": 35.0, "Location_By_Price": 35.0,
+        "Platform_By_Price": 35.0, "Day": rows["Day"],
+    }))
+    forest = RandomForestRegressor(n_estimators=2, random_state=0).fit(X, rows["Price"])
+    forest.coef_ = np.ones(5)
+    forest.intercept_ = 0.0
+    with pytest.raises(ValueError):
+        CompiledRevenueModel.from_artifacts(forest, **artifacts)
+    assert compile_revenue_model(forest, **artifacts) is None
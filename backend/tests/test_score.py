@@ -0,0 +1,78 @@
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.discount_model.train import load_discount_data
+from backend.inference import score_revenue
+from backend.price_prediction_model.artifacts import load_price_artifacts
+from backend.score import main, score_file
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+DATA_PATH = PROJECT_ROOT / "resources" / "data" / "Supplement_Sales_Weekly_Expanded.csv"
+REVENUE_DIR = PROJECT_ROOT / "resources" / "revenue"
+DISCOUNT_MODEL_PATH = PROJECT_ROOT / "resources" / "discount" / "discount_model.joblib"
+PRICE_DIR = PROJECT_ROOT / "resources" / "price"
+
+pytestmark = pytest.mark.skipif(
+    not (DISCOUNT_MODEL_PATH.exists() and (PRICE_DIR / "LATEST").exists()), reason="models not built"
+)
+
+
+@pytest.fixture(scope="module")
+def sales(tmp_path_factory):
+    path = tmp_path_factory.mktemp("score") / "sales.csv"
+    df = pd.read_csv(DATA_PATH, nrows=500)
+    df.loc[3, "Product_Name"] = "Unknown Product"
+    df.to_csv(path, index=False)
+    return path
+
+
+@pytest.fixture(scope="module")
+def expected(sales):
+    df = pd.read_csv(sales)
+    day = pd.to_datetime(df["Date"]).dt
+    revenue = score_revenue(
+        df.assign(Day=day.day.astype(float)), joblib.load(REVENUE_DIR / "model_ridge.joblib"),
+        joblib.load(REVENUE_DIR / "standard_scaler.joblib"), joblib.load(REVENUE_DIR / "category_by_price_dict.joblib"),
+        joblib.load(REVENUE_DIR / "location_by_price_dict.joblib"),
+        joblib.load(REVENUE_DIR / "platform_by_price_dict.joblib"),
+    )
+    discount = joblib.load(DISCOUNT_MODEL_PATH).predict(load_discount_data(sales)[0])
+    price = load_price_artifacts(PRICE_DIR)
+    prices = [
+        price.predict(product, [year], [month])[0] if product in price.store else np.nan
+        for product, year, month in zip(df["Product_Name"], day.year, day.month)
+    ]
+    return {"predicted_revenue": revenue, "predicted_discount": discount, "predicted_price": prices}
+
+
+@pytest.mark.parametrize("suffix, workers", [(".csv", 0), (".parquet", 0), (".csv", 2)])
+def test_scored_file_matches_models(sales, expected, tmp_path, suffix, workers):
+    """
+    Test that chunked scoring, in process or in a pool, matches the models row by row and keeps the row order.
+    """
+    output = tmp_path / f"predictions{suffix}"
+    summary = score_file(sales, output, chunk_size=120, workers=workers, price_dir=PRICE_DIR)
+
+    assert summary["rows"] == 500
+    assert summary["rows_per_second"] > 0 and summary["peak_rss_mb"] > 0
+    scored = pd.read_parquet(output) if suffix == ".parquet" else pd.read_csv(output)
+    assert scored["Date"].astype(str).tolist() == pd.read_csv(sales)["Date"].tolist()
+    for column, values in expected.items():
+        np.testing.assert_allclose(scored[column], values, rtol=1e-9, atol=1e-9)
+    assert np.isnan(scored["predicted_price"][3])
+    assert not list(tmp_path.glob(".*partial"))
+
+
+def test_cli_scores_selected_models(sales, tmp_path):
+    """
+    Test that --models limits the columns read and the predictions written.
+    """
+    output = tmp_path / "revenue.csv"
+    main([str(sales), str(output), "--models", "revenue", "--chunk-size", "200"])
+    scored = pd.read_csv(output)
+    assert list(scored.columns) == ["Date", "Category", "Price", "Location", "Platform", "predicted_revenue"]
+    assert len(scored) == 500
@@ -0,0 +1,55 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from dotenv import dotenv_values
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+
+READINESS_SCRIPT = """
+import json, sys
+from fastapi.testclient import TestClient
+import backend.api as api
+from backend import executor
+
+imported = {"sklearn": "sklearn" in sys.modules, "models": len(executor._models), "price": api._price_artifacts is not None}
+with TestClient(api.app) as client:
+    response = client.get("/ready")
+    print(json.dumps({"imported": imported, "status": response.status_code, "body": response.json()}))
+"""
+
+
+def check_readiness(warmup: str) -> dict:
+    """Imports the app in a fresh interpreter and reads /ready once the lifespan has started."""
+    # Other test modules rewrite the .env settings in os.environ; let the app read .env itself
+    env = {key: value for key, value in os.environ.items() if key not in dotenv_values(PROJECT_ROOT / ".env")}
+    result = subprocess.run(
+        [sys.executable, "-c", READINESS_SCRIPT], cwd=PROJECT_ROOT, env={**env, "STARTUP_WARMUP": warmup},
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_import_loads_nothing_and_lazy_start_is_not_ready():
+    """
+    Test that importing the app loads no model nor sklearn, and that without warm-up /ready answers 503.
+    """
+    result = check_readiness("off")
+    assert result["imported"] == {"sklearn": False, "models": 0, "price": False}
+    assert result["status"] == 503
+    assert result["body"]["ready"] is False
+    assert not any(component["loaded"] for component in result["body"]["components"].values())
+
+
+def test_blocking_warmup_loads_every_component():
+    """
+    Test that the blocking warm-up loads every model and the metadata before the first request.
+    """
+    result = check_readiness("blocking")
+    assert result["status"] == 200
+    components = result["body"]["components"]
+    assert set(components) == {"revenue", "discount", "price", "metadata"}
+    for component in components.values():
+        assert component["loaded"] and component["state"] == "ready" and component["seconds"] >= 0
@@ -0,0 +1,120 @@
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+from pydantic import BaseModel, Field
+
+import backend.api as api
+from backend.batch import iter_ndjson_chunks
+from backend.streaming import PredictionStream
+
+NDJSON = {"content-type": "application/x-ndjson"}
+REVENUE_ROW = {"Price": 42.0, "Day": 9.0, "Category": "Protein", "Location": "UK", "Platform": "iHerb"}
+
+
+class Row(BaseModel):
+    x: int = Field(..., ge=0)
+
+
+def upload(rows: list[str], piece: int = 7, state: dict | None = None):
+    """The rows as an async byte stream cut at arbitrary points."""
+    data = "".join(row + "\n" for row in rows).encode()
+
+    async def stream():
+        for start in range(0, len(data), piece):
+            yield data[start:start + piece]
+            await asyncio.sleep(0)
+        if state is not None:
+            state["uploaded"] = True
+    return stream()
+
+
+def test_ndjson_chunks_split_lines_across_reads():
+    """
+    Test that rows cut across network reads are reassembled into chunks of the requested size.
+    """
+    async def collect():
+        return [chunk async for chunk in iter_ndjson_chunks(upload(['{"x": 1}', "", '{"x": 22}', "{bad", '{"x": 3}']), 2)]
+
+    chunks = asyncio.run(collect())
+    assert [len(chunk) for chunk in chunks] == [2, 2]
+    assert chunks[0] == [{"x": 1}, {"x": 22}]
+    assert isinstance(chunks[1][0], json.JSONDecodeError)
+
+
+def test_stream_bounds_in_flight_chunks_and_keeps_order():
+    """
+    Test that rows are scored in bounded chunks, answered in input order, and that an
+    unread response does not stop the upload (clients that read only after uploading).
+    """
+    active, peak = [0], [0]
+
+    async def score_chunk(indices, payloads):
+        active[0] += 1
+        peak[0] = max(peak[0], active[0])
+        await asyncio.sleep(0.001 * (len(indices) % 3))
+        active[0] -= 1
+        return [{"index": i, "y": payload.x * 2} for i, payload in zip(indices, payloads)], []
+
+    rows = [json.dumps({"x": i}) for i in range(95)] + ['{"x": -1}']
+    state = {}
+
+    async def run():
+        stream = PredictionStream(upload(rows, state=state), Row, score_chunk, chunk_rows=10, max_in_flight=2,
+                                  spool_memory=256)
+        body = stream.lines()
+        first = await body.__anext__()
+        while not state.get("uploaded"):
+            await asyncio.sleep(0.001)
+        rest = [data async for data in body]
+        assert stream.spool.file._rolled  # the unread lines went to disk
+        return stream, (first + b"".join(rest)).decode().splitlines()
+
+    stream, lines = asyncio.run(run())
+    assert stream.max_in_flight_seen == 2 and peak[0] <= 2
+    results = [json.loads(line) for line in lines]
+    assert [result["index"] for result in results] == list(range(96))
+    assert results[94] == {"index": 94, "y": 188}
+    assert results[95]["detail"][0]["type"] == "greater_than_equal"
+
+
+def test_stream_endpoints_match_batch_endpoints(monkeypatch):
+    """
+    Test that the streaming endpoints score like the batch endpoints, across several chunks.
+    """
+    monkeypatch.setattr(api, "STREAM_CHUNK_ROWS", 7)
+    client = TestClient(api.app)
+    rows = [{**REVENUE_ROW, "Price": 10.0 + i, "Day": 1 + i % 28} for i in range(30)]
+    rows[4]["Day"] = 40
+    body = "".join(json.dumps(row) + "\n" for row in rows)
+
+    endpoint = api.REVENUE_PREDICTION_ENDPOINT
+    streamed = client.post(f"{endpoint}/stream", content=body, headers=NDJSON)
+    batch = client.post(f"{endpoint}/batch", content=body, headers=NDJSON).json()
+    assert streamed.status_code == 200
+    assert streamed.headers["content-type"] == "application/x-ndjson"
+    assert streamed.headers["x-model-version"] == api.registry.get("revenue").name
+    lines = [json.loads(line) for line in streamed.text.splitlines()]
+    assert [line for line in lines if "predicted_revenue" in line] == batch["predictions"]
+    assert [line for line in lines if "detail" in line] == batch["errors"]
+
+    prices = "".join(json.dumps(row) + "\n" for row in [
+        {"product": "Vitamin C", "year": 2025, "month": 3}, {"product": "Nope", "year": 2025, "month": 3},
+    ])
+    lines = [json.loads(line) for line in client.post(f"{api.PRICE_PREDICTION_ENDPOINT}/stream",
+                                                      content=prices, headers=NDJSON).text.splitlines()]
+    assert lines[0]["predicted_price"] > 0
+    assert lines[1]["detail"][0]["type"] == "product_not_found"
+
+
+def test_stream_rejects_other_bodies():
+    """
+    Test that a JSON body is rejected before streaming and an endless line ends the stream with an error.
+    """
+    client = TestClient(api.app)
+    endpoint = f"{api.DISCOUNT_PREDICTION_ENDPOINT}/stream"
+    assert client.post(endpoint, json=[{}]).status_code == 415
+
+    response = client.post(endpoint, content=b"x" * (2 << 20), headers=NDJSON)
+    assert response.status_code == 200
+    assert "longer than" in json.loads(response.text.splitlines()[-1])["error"]
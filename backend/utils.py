@@ -1,6 +1,13 @@
 import pandas as pd
 import numpy as np
-from sklearn.linear_model import LinearRegression
+
+# Columnas usadas por los modelos de precio, en el orden de entrenamiento
+FEATURE_COLS = [
+    "Year", "Month", "Month_sin", "Month_cos",
+    "Years_From_Start", "Time_Index", "Time_Index_Squared",
+    "Price_Lag_1", "Price_Lag_3", "Price_Lag_12",
+    "Price_MA_6", "Price_MA_12"
+]
 
 # ===============================
 # 1. Preparar datos
@@ -24,27 +31,33 @@ def create_features(df: pd.DataFrame) -> pd.DataFrame:
     """
     Crea variables adicionales (seno/coseno estacionales, índice de tiempo,
     rezagos, medias móviles, etc.).
-    """
-    df = df.copy()
 
-    # Índices de tiempo
-    df["Years_From_Start"] = df["Year"] - df["Year"].min()
-    df["Time_Index"] = (df["Years_From_Start"] * 12) + df["Month"]
-    df["Time_Index_Squared"] = df["Time_Index"] ** 2
-
-    # Codificación estacional
-    df["Month_sin"] = np.sin(2 * np.pi * df["Month"] / 12)
-    df["Month_cos"] = np.cos(2 * np.pi * df["Month"] / 12)
-
-    # Media mensual por producto
-    df_features = (
-        df.groupby(["Product_Name", "Year", "Month"])["Price"]
+    Agrega el precio medio mensual por producto con una única agrupación
+    ordenada sobre códigos categóricos; los rezagos y medias móviles se
+    calculan con `shift` / `rolling` agrupados, sin funciones Python por grupo.
+    """
+    # Media mensual por producto (ordenada por producto, año y mes)
+    product = pd.Categorical(df["Product_Name"])
+    if not product.categories.is_monotonic_increasing:
+        # Columnas ya categóricas: ordenar como si fueran texto
+        product = product.reorder_categories(product.categories.sort_values())
+    price_avg = (
+        df["Price"]
+        .groupby([product.codes, df["Year"].to_numpy(), df["Month"].to_numpy()], sort=True)
         .mean()
-        .reset_index()
-        .rename(columns={"Price": "Price_Avg"})
     )
-
-    # Añadir de nuevo las features temporales
+    codes = price_avg.index.get_level_values(0).to_numpy()
+    keep = codes >= 0  # Filas sin Product_Name
+    codes = codes[keep]
+
+    df_features = pd.DataFrame({
+        "Product_Name": product.categories.to_numpy()[codes],
+        "Year": price_avg.index.get_level_values(1).to_numpy()[keep],
+        "Month": price_avg.index.get_level_values(2).to_numpy()[keep],
+        "Price_Avg": price_avg.to_numpy()[keep],
+    })
+
+    # Features temporales
     df_features["Years_From_Start"] = df_features["Year"] - df_features["Year"].min()
     df_features["Time_Index"] = (df_features["Years_From_Start"] * 12) + df_features["Month"]
     df_features["Time_Index_Squared"] = df_features["Time_Index"] ** 2
@@ -52,17 +65,12 @@ def create_features(df: pd.DataFrame) -> pd.DataFrame:
     df_features["Month_cos"] = np.cos(2 * np.pi * df_features["Month"] / 12)
 
     # Rezagos y medias móviles por producto
-    df_features = df_features.sort_values(["Product_Name", "Year", "Month"])
-    df_features["Price_Lag_1"] = df_features.groupby("Product_Name")["Price_Avg"].shift(1)
-    df_features["Price_Lag_3"] = df_features.groupby("Product_Name")["Price_Avg"].shift(3)
-    df_features["Price_Lag_12"] = df_features.groupby("Product_Name")["Price_Avg"].shift(12)
-
-    df_features["Price_MA_6"] = (
-        df_features.groupby("Product_Name")["Price_Avg"].transform(lambda x: x.rolling(6).mean())
-    )
-    df_features["Price_MA_12"] = (
-        df_features.groupby("Product_Name")["Price_Avg"].transform(lambda x: x.rolling(12).mean())
-    )
+    by_product = df_features.groupby(codes, sort=False)["Price_Avg"]
+    df_features["Price_Lag_1"] = by_product.shift(1)
+    df_features["Price_Lag_3"] = by_product.shift(3)
+    df_features["Price_Lag_12"] = by_product.shift(12)
+    df_features["Price_MA_6"] = by_product.rolling(6).mean().reset_index(level=0, drop=True)
+    df_features["Price_MA_12"] = by_product.rolling(12).mean().reset_index(level=0, drop=True)
 
     df_features = df_features.dropna().reset_index(drop=True)
     return df_features
@@ -76,18 +84,14 @@ def train_models(df_features: pd.DataFrame) -> dict:
     Entrena un modelo de regresión lineal para cada producto.
     Devuelve un diccionario {producto: modelo}.
     """
+    from sklearn.linear_model import LinearRegression
+
     models = {}
-    feature_cols = [
-        "Year", "Month", "Month_sin", "Month_cos",
-        "Years_From_Start", "Time_Index", "Time_Index_Squared",
-        "Price_Lag_1", "Price_Lag_3", "Price_Lag_12",
-        "Price_MA_6", "Price_MA_12"
-    ]
 
     for product in df_features["Product_Name"].unique():
         subset = df_features[df_features["Product_Name"] == product]
 
-        X = subset[feature_cols]
+        X = subset[FEATURE_COLS]
         y = subset["Price_Avg"]
 
         model = LinearRegression()
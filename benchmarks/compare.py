@@ -0,0 +1,67 @@
+"""
+Compares two benchmark result files.
+
+    python -m benchmarks.compare benchmarks/results/base.json benchmarks/results/new.json
+
+Prints the p50/p95/p99 latency and throughput of every scenario in both
+files with the relative change. Exits with status 1 if any p95 got slower
+than --threshold (default 20%), so it can gate a CI job.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+METRICS = ("p50_ms", "p95_ms", "p99_ms", "throughput_rps")
+
+
+def change(before, after) -> float | None:
+    if not before or after is None:
+        return None
+    return (after - before) / before
+
+
+def compare(base: dict, new: dict, threshold: float) -> tuple[list[str], list[str]]:
+    """Returns (report lines, regressions)."""
+    lines, regressions = [], []
+    for section in ("startup", "inprocess", "server"):
+        if section == "startup":
+            for key in ("import_s_median", "server_startup_s", "server_ready_s"):
+                if key in base.get(section, {}) and key in new.get(section, {}):
+                    before, after = base[section][key], new[section][key]
+                    delta = change(before, after)
+                    values = [f"{value:>10.3f}" if value is not None else f"{'n/a':>10}" for value in (before, after)]
+                    lines.append(f"{key:<28} {values[0]} -> {values[1]}  {'n/a' if delta is None else f'{delta:+.1%}'}")
+            continue
+
+        scenarios = sorted(set(base.get(section, {})) & set(new.get(section, {})))
+        if scenarios:
+            lines.append(f"\n[{section}]")
+        for name in scenarios:
+            before, after = base[section][name], new[section][name]
+            cells = []
+            for metric in METRICS:
+                delta = change(before.get(metric), after.get(metric))
+                cells.append(f"{metric} {after.get(metric)} ({'n/a' if delta is None else f'{delta:+.1%}'})")
+            lines.append(f"{name:<16} " + "  ".join(cells))
+
+            delta = change(before.get("p95_ms"), after.get("p95_ms"))
+            if delta is not None and delta > threshold:
+                regressions.append(f"{section}/{name}: p95 {before['p95_ms']} -> {after['p95_ms']} ms ({delta:+.1%})")
+    return lines, regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("base", type=Path)
+    parser.add_argument("new", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative p95 slowdown")
+    args = parser.parse_args()
+
+    base, new = json.loads(args.base.read_text()), json.loads(args.new.read_text())
+    print(f"{base.get('commit')} -> {new.get('commit')}")
+    lines, regressions = compare(base, new, args.threshold)
+    print("\n".join(lines))
+    if regressions:
+        print("\nRegressions:\n  " + "\n  ".join(regressions))
+        sys.exit(1)
@@ -0,0 +1,255 @@
+"""
+Load-test benchmark of the FastAPI backend.
+
+Drives every endpoint in-process (httpx + ASGI transport, no network) and/or
+against a local uvicorn server, at a fixed concurrency, and measures the
+import and startup time of the app. Results are written as JSON so that two
+commits can be compared with `python -m benchmarks.compare`.
+
+    python -m benchmarks.run                      # both modes, default sizes
+    python -m benchmarks.run --mode inprocess -n 200 -c 8 --scenario revenue
+    python -m benchmarks.run --url http://127.0.0.1:8000   # existing server
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = PROJECT_ROOT / "benchmarks" / "results"
+
+sys.path.insert(0, str(PROJECT_ROOT))
+from benchmarks.scenarios import SCENARIOS  # noqa: E402
+
+
+def summarize(latencies: list[float], errors: int, elapsed: float) -> dict:
+    """Latency percentiles in milliseconds and throughput in requests per second."""
+    values = np.asarray(latencies) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99]) if len(values) else (np.nan,) * 3
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "mean_ms": round(float(values.mean()), 3) if len(values) else None,
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed > 0 else None,
+    }
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario, requests: int, concurrency: int, warmup: int) -> dict:
+    """Sends `requests` requests from `concurrency` concurrent workers."""
+    for i in range(warmup):
+        await client.request(scenario.method, scenario.path, **scenario.request(i))
+
+    latencies, errors = [], 0
+    counter = iter(range(warmup, warmup + requests))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            start = time.perf_counter()
+            response = await client.request(scenario.method, scenario.path, **scenario.request(i))
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+async def run_all(client: httpx.AsyncClient, scenarios, requests: int, concurrency: int, warmup: int) -> dict:
+    results = {}
+    for scenario in scenarios:
+        results[scenario.name] = await run_scenario(client, scenario, requests, concurrency, warmup)
+        print(f"  {scenario.name:<16} {format_result(results[scenario.name])}")
+    return results
+
+
+def format_result(result: dict) -> str:
+    return (
+        f"p50 {result['p50_ms']:>8.2f} ms  p95 {result['p95_ms']:>8.2f} ms  "
+        f"p99 {result['p99_ms']:>8.2f} ms  {result['throughput_rps']:>8.1f} req/s  errors {result['errors']}"
+    )
+
+
+def benchmark_inprocess(scenarios, requests: int, concurrency: int, warmup: int) -> dict:
+    from backend.api import app
+
+    async def main():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            return await run_all(client, scenarios, requests, concurrency, warmup)
+
+    return asyncio.run(main())
+
+
+def benchmark_server(url: str, scenarios, requests: int, concurrency: int, warmup: int) -> dict:
+    async def main():
+        limits = httpx.Limits(max_connections=concurrency)
+        async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+            return await run_all(client, scenarios, requests, concurrency, warmup)
+
+    return asyncio.run(main())
+
+
+def import_breakdown(stderr: str, top: int = 10) -> dict:
+    """
+    Cumulative seconds of the `top` slowest top-level packages in
+    `python -X importtime` output, each counted at its outermost import.
+    """
+    packages = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        package = name.strip().split(".")[0]
+        packages[package] = max(packages.get(package, 0), int(cumulative) / 1e6)
+    slowest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {package: round(seconds, 4) for package, seconds in slowest}
+
+
+def measure_import_time(repeat: int) -> dict:
+    """
+    Seconds to import backend.api in a fresh interpreter, the packages it
+    pulled in by import time (`-X importtime`, median of the runs) and whether
+    sklearn was among them.
+    """
+    code = (
+        "import json, sys, time; t = time.perf_counter(); import backend.api; "
+        "print(json.dumps([time.perf_counter() - t, 'sklearn' in sys.modules]))"
+    )
+    times, breakdowns, sklearn = [], [], False
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code], cwd=PROJECT_ROOT, capture_output=True, text=True,
+            check=True,
+        )
+        seconds, sklearn = json.loads(result.stdout.strip().splitlines()[-1])
+        times.append(seconds)
+        breakdowns.append(import_breakdown(result.stderr))
+    packages = {package for breakdown in breakdowns for package in breakdown}
+    slowest = {
+        package: round(statistics.median(breakdown.get(package, 0) for breakdown in breakdowns), 4)
+        for package in packages
+    }
+    return {
+        "import_s_median": round(statistics.median(times), 4),
+        "import_s": [round(t, 4) for t in times],
+        "importtime_s": dict(sorted(slowest.items(), key=lambda item: item[1], reverse=True)),
+        "sklearn_imported": sklearn,
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(timeout: float = 60) -> tuple[subprocess.Popen, str, float, float]:
+    """
+    Starts uvicorn on a free port. Returns (process, url, startup seconds,
+    ready seconds): the time until it first answers, and until /ready reports
+    every model loaded by the start-up warm-up.
+    """
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.api:app", "--port", str(port), "--log-level", "warning"],
+        cwd=PROJECT_ROOT,
+    )
+    startup = None
+    while time.perf_counter() - start < timeout:
+        try:
+            status = httpx.get(f"{url}/ready", timeout=1).status_code
+            startup = startup or time.perf_counter() - start
+            if status == 200:
+                return process, url, startup, time.perf_counter() - start
+            time.sleep(0.01)
+        except httpx.TransportError:
+            time.sleep(0.05)
+        if process.poll() is not None:
+            break
+    process.terminate()
+    raise RuntimeError("uvicorn did not start")
+
+
+def git_commit() -> str | None:
+    result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT, capture_output=True, text=True)
+    return result.stdout.strip() or None
+
+
+def main(argv=None) -> dict:
+    parser = argparse.ArgumentParser(description="Benchmark the FastAPI backend.")
+    parser.add_argument("--mode", choices=["inprocess", "server", "both"], default="both")
+    parser.add_argument("-n", "--requests", type=int, default=500, help="Requests per scenario")
+    parser.add_argument("-c", "--concurrency", type=int, default=8, help="Concurrent clients")
+    parser.add_argument("--warmup", type=int, default=20, help="Untimed requests per scenario")
+    parser.add_argument("--scenario", action="append", help="Only run these scenarios (repeatable)")
+    parser.add_argument("--url", help="Benchmark an already running server instead of starting uvicorn")
+    parser.add_argument("--import-repeat", type=int, default=3, help="Fresh-interpreter imports to time")
+    parser.add_argument("--output", type=Path, help="Results file (default: benchmarks/results/<time>-<commit>.json)")
+    args = parser.parse_args(argv)
+
+    scenarios = [s for s in SCENARIOS if not args.scenario or s.name in args.scenario]
+    commit = git_commit()
+    results = {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "config": {"requests": args.requests, "concurrency": args.concurrency, "warmup": args.warmup},
+    }
+
+    print("Import time...")
+    results["startup"] = measure_import_time(args.import_repeat) if args.import_repeat else {}
+    if results["startup"]:
+        print(f"  import backend.api: {results['startup']['import_s_median']:.3f} s (median)")
+        for package, seconds in list(results["startup"]["importtime_s"].items())[:5]:
+            print(f"    {package:<24} {seconds:.3f} s")
+
+    if args.mode in ("inprocess", "both"):
+        print("In-process (ASGI transport):")
+        results["inprocess"] = benchmark_inprocess(scenarios, args.requests, args.concurrency, args.warmup)
+
+    if args.mode in ("server", "both"):
+        process = None
+        if args.url:
+            url = args.url
+        else:
+            process, url, startup, ready = start_server()
+            results["startup"]["server_startup_s"] = round(startup, 4)
+            results["startup"]["server_ready_s"] = round(ready, 4)
+            print(f"  uvicorn startup: {startup:.3f} s, all models ready: {ready:.3f} s")
+        print(f"Server ({url}):")
+        try:
+            results["server"] = benchmark_server(url, scenarios, args.requests, args.concurrency, args.warmup)
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait(timeout=30)
+
+    output = args.output or RESULTS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}-{commit or 'nogit'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(f"Results saved to {output}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import os
+from dataclasses import dataclass, field
+from typing import Callable
+
+REVENUE = os.getenv("REVENUE_PREDICTION_ENDPOINT", "/predict/revenue")
+DISCOUNT = os.getenv("DISCOUNT_PREDICTION_ENDPOINT", "/predict/discount")
+PRICE = os.getenv("PRICE_PREDICTION_ENDPOINT", "/predict/price")
+
+# Rows per request of the batch scenarios
+BATCH_SIZE = 100
+
+PRODUCTS = ["Vitamin C", "Whey Protein", "Fish Oil", "Multivitamin", "Ashwagandha", "Zinc"]
+CATEGORIES = ["Vitamin", "Protein", "Omega", "Vitamin", "Herbal", "Mineral"]
+LOCATIONS = ["USA", "UK", "Canada"]
+PLATFORMS = ["Amazon", "Walmart", "iHerb"]
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """
+    One endpoint to benchmark. `request(i)` returns the keyword arguments of
+    the i-th request (`json`, `params`...), so payloads vary between requests
+    and the prediction cache only absorbs genuine repeats.
+    """
+
+    name: str
+    method: str
+    path: str
+    request: Callable[[int], dict] = field(default=lambda i: {})
+
+
+def revenue_row(i: int) -> dict:
+    return {
+        "Price": 1 + i % 74,
+        "Day": 1 + i % 31,
+        "Category": CATEGORIES[i % len(CATEGORIES)],
+        "Location": LOCATIONS[i % len(LOCATIONS)],
+        "Platform": PLATFORMS[i % len(PLATFORMS)],
+    }
+
+
+def discount_row(i: int) -> dict:
+    return {
+        "product_name": PRODUCTS[i % len(PRODUCTS)],
+        "category": CATEGORIES[i % len(CATEGORIES)],
+        "price": 10 + i % 50,
+        "units_sold": 100 + i % 80,
+        "location": LOCATIONS[i % len(LOCATIONS)],
+        "platform": PLATFORMS[i % len(PLATFORMS)],
+    }
+
+
+def price_params(i: int) -> dict:
+    return {"product": PRODUCTS[i % len(PRODUCTS)], "year": 2025 + i % 3, "month": 1 + i % 12}
+
+
+def batch(row: Callable[[int], dict]) -> Callable[[int], dict]:
+    return lambda i: {"json": [row(i * BATCH_SIZE + j) for j in range(BATCH_SIZE)]}
+
+
+SCENARIOS = [
+    Scenario("metadata", "GET", "/metadata"),
+    Scenario("products", "GET", "/products"),
+    Scenario("revenue", "POST", REVENUE, lambda i: {"json": revenue_row(i)}),
+    Scenario("discount", "POST", DISCOUNT, lambda i: {"json": discount_row(i)}),
+    Scenario("price", "GET", PRICE, lambda i: {"params": price_params(i)}),
+    Scenario("price_horizon", "GET", f"{PRICE}/horizon", lambda i: {"params": price_params(i)}),
+    Scenario("revenue_batch", "POST", f"{REVENUE}/batch", batch(revenue_row)),
+    Scenario("discount_batch", "POST", f"{DISCOUNT}/batch", batch(discount_row)),
+    Scenario("price_batch", "POST", f"{PRICE}/batch", batch(price_params)),
+]
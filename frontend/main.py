@@ -2,8 +2,14 @@ import streamlit as st
 import requests
 import joblib
 import os
+import itertools
+import altair as alt
+import numpy as np
+import pandas as pd
 from pathlib import Path
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import datetime
 
 # Define the project root directory.
@@ -28,24 +34,77 @@ DISCOUNT_PREDICT_ENDPOINT = os.getenv(
     "DISCOUNT_PREDICTION_ENDPOINT", "/predict/discount"
 )
 METADATA_ENDPOINT = "/metadata"
+PRODUCTS_ENDPOINT = "/products"
 PRICE_PREDICT_ENDPOINT = os.getenv("PRICE_PREDICTION_ENDPOINT", "/predict/price")
 
+# Seconds to wait for the API: to connect, and for each response
+API_CONNECT_TIMEOUT = float(os.getenv("API_CONNECT_TIMEOUT", "3"))
+API_READ_TIMEOUT = float(os.getenv("API_READ_TIMEOUT", "30"))
+# Seconds the metadata and product lists are reused before asking the API again
+METADATA_TTL = int(os.getenv("METADATA_TTL", "60"))
+
 # Define the path to the images
 AISLE_IMG = PROJECT_ROOT / os.getenv("AISLE_IMG")
 
 
 # --- API Functions ---
-@st.cache_data(ttl=3600)  # Cache the response for one hour
+@st.cache_resource
+def get_session():
+    """
+    HTTP session shared by every rerun and every user: its connections to the
+    API are kept alive and reused instead of opening one per request. GETs
+    are retried when the connection fails.
+    """
+    session = requests.Session()
+    retries = Retry(total=2, read=0, backoff_factor=0.2, allowed_methods=["GET"])
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=16, max_retries=retries)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def api_request(method, endpoint, **kwargs):
+    return get_session().request(
+        method, f"{API_URL}{endpoint}", timeout=(API_CONNECT_TIMEOUT, API_READ_TIMEOUT), **kwargs
+    )
+
+
+@st.cache_resource
+def get_validators():
+    """ETag and JSON body of the last response of each revalidated endpoint."""
+    return {}
+
+
+def get_json_revalidated(endpoint):
+    """
+    GET of a JSON endpoint that sends the ETag of the previous response in
+    If-None-Match, so an unchanged resource only costs a 304 without body.
+    """
+    validators = get_validators()
+    previous = validators.get(endpoint)
+    headers = {"If-None-Match": previous[0]} if previous else {}
+    response = api_request("GET", endpoint, headers=headers)
+    if response.status_code == 304 and previous:
+        return previous[1]
+    response.raise_for_status()
+    body = response.json()
+    if "ETag" in response.headers:
+        validators[endpoint] = (response.headers["ETag"], body)
+    return body
+
+
+@st.cache_data(ttl=METADATA_TTL)
 def get_metadata():
     try:
-        response = requests.get(f"{API_URL}{METADATA_ENDPOINT}")
-        response.raise_for_status()
-        return response.json()
+        return get_json_revalidated(METADATA_ENDPOINT)
     except requests.exceptions.ConnectionError:
         st.error(
             f"Error de conexión: Asegúrate de que la API de FastAPI se esté ejecutando en {API_URL}."
         )
         return None
+    except requests.exceptions.Timeout:
+        st.error(f"La API no respondió en {API_READ_TIMEOUT:.0f} segundos al pedir los metadatos.")
+        return None
     except requests.exceptions.HTTPError as e:
         st.error(
             f"Ocurrió un error al obtener metadatos de la API: {e}. Revisa que el endpoint {METADATA_ENDPOINT} esté funcionando."
@@ -53,6 +112,35 @@ def get_metadata():
         return None
 
 
+@st.cache_data(ttl=METADATA_TTL)
+def get_products():
+    response = api_request("GET", PRODUCTS_ENDPOINT)
+    response.raise_for_status()
+    return response.json().get("products", [])
+
+
+@st.cache_data(ttl=METADATA_TTL)
+def predict_revenue_grid(category, location, platform, prices, days):
+    """
+    Predicted revenue for every (price, day) combination, scored with one
+    request to the batch endpoint. Returns a DataFrame with Price, Day and
+    predicted_revenue.
+    """
+    grid = pd.DataFrame(list(itertools.product(prices, days)), columns=["Price", "Day"])
+    rows = [
+        {"Price": float(price), "Day": float(day), "Category": category, "Location": location, "Platform": platform}
+        for price, day in zip(grid["Price"], grid["Day"])
+    ]
+    response = api_request("POST", f"{REVENUE_PREDICT_ENDPOINT}/batch", json=rows)
+    response.raise_for_status()
+    result = response.json()
+    if result["errors"]:
+        raise ValueError(f"La API rechazó {len(result['errors'])} filas: {result['errors'][0]}")
+
+    predictions = pd.DataFrame(result["predictions"]).set_index("index")["predicted_revenue"]
+    return grid.assign(predicted_revenue=predictions.sort_index().to_numpy())
+
+
 @st.cache_data(ttl=3600)
 def load_list_from_mapping(mapping_file_path):
     try:
@@ -156,7 +244,7 @@ with tab1:
 
                     try:
                         # Send the POST request to your FastAPI API
-                        response = requests.post(f"{API_URL}{REVENUE_PREDICT_ENDPOINT}", json=payload)
+                        response = api_request("POST", REVENUE_PREDICT_ENDPOINT, json=payload)
                         response.raise_for_status() # Lanza un error si la solicitud no fue exitosa (4xx o 5xx)
 
                         # Get and display the prediction
@@ -169,6 +257,9 @@ with tab1:
                     except requests.exceptions.ConnectionError:
                         st.session_state.prediction_error = f"Error de conexión: Asegúrate de que la API de FastAPI se esté ejecutando en {API_URL}."
                         st.session_state.last_prediction = None
+                    except requests.exceptions.Timeout:
+                        st.session_state.prediction_error = f"La API no respondió en {API_READ_TIMEOUT:.0f} segundos."
+                        st.session_state.last_prediction = None
                     except requests.exceptions.HTTPError as e:
                         error_details = response.json() if response else "No hay detalles"
                         st.session_state.prediction_error = f"Error en la API: {e}. Detalles: {error_details}"
@@ -183,6 +274,58 @@ with tab1:
         elif st.session_state.last_prediction is not None:
             st.success(f"**Última Predicción de Ingresos:** ${st.session_state.last_prediction:,.2f}", )
 
+    # --- What-if: curva de ingresos por precio y día ---
+    st.markdown("---")
+    st.subheader("Simulación de precios (what-if)")
+    st.caption(
+        "Calcula los ingresos de toda una rejilla de precios × días para la categoría, el país y la tienda "
+        "seleccionados, con una sola petición a la API."
+    )
+
+    grid_col1, grid_col2 = st.columns(2)
+    with grid_col1:
+        grid_prices = st.slider(
+            "Rango de precios ($)", min_value=1.0, max_value=75.0, value=(1.0, 75.0), step=0.5, key="grid_prices"
+        )
+        grid_price_step = st.select_slider("Paso de precio ($)", options=[0.5, 1.0, 2.5, 5.0], value=1.0)
+    with grid_col2:
+        grid_days = st.slider("Rango de días", min_value=1, max_value=31, value=(1, 31), key="grid_days")
+
+    if st.button("Calcular curva de ingresos", disabled=not category):
+        prices = tuple(np.round(np.arange(grid_prices[0], grid_prices[1] + 1e-9, grid_price_step), 2).tolist())
+        days = tuple(range(grid_days[0], grid_days[1] + 1))
+        try:
+            st.session_state.revenue_grid = predict_revenue_grid(category, location, platform, prices, days)
+            st.session_state.revenue_grid_error = None
+        except requests.exceptions.ConnectionError:
+            st.session_state.revenue_grid_error = f"Error de conexión: Asegúrate de que la API de FastAPI se esté ejecutando en {API_URL}."
+        except requests.exceptions.Timeout:
+            st.session_state.revenue_grid_error = f"La API no respondió en {API_READ_TIMEOUT:.0f} segundos."
+        except Exception as e:
+            st.session_state.revenue_grid_error = f"No se pudo calcular la curva: {e}"
+
+    if st.session_state.get("revenue_grid_error"):
+        st.error(st.session_state.revenue_grid_error)
+    elif st.session_state.get("revenue_grid") is not None:
+        grid = st.session_state.revenue_grid
+        heatmap = alt.Chart(grid).mark_rect().encode(
+            x=alt.X("Day:O", title="Día del mes"),
+            y=alt.Y("Price:O", title="Precio ($)", sort="descending", axis=alt.Axis(labelOverlap=True)),
+            color=alt.Color("predicted_revenue:Q", title="Ingresos ($)"),
+            tooltip=["Price", "Day", alt.Tooltip("predicted_revenue:Q", format=",.2f", title="Ingresos")],
+        )
+        st.altair_chart(heatmap, use_container_width=True)
+
+        curve_day = day if day in set(grid["Day"]) else int(grid["Day"].iloc[0])
+        curve = grid[grid["Day"] == curve_day].set_index("Price")["predicted_revenue"]
+        st.write(f"Curva de ingresos para el día {curve_day}")
+        st.line_chart(curve, x_label="Precio ($)", y_label="Ingresos ($)")
+        best = grid.loc[grid["predicted_revenue"].idxmax()]
+        st.info(
+            f"Máximo de la rejilla: **${best['predicted_revenue']:,.2f}** con precio ${best['Price']:.2f} "
+            f"el día {int(best['Day'])}."
+        )
+
     
 
 with tab2:
@@ -251,9 +394,7 @@ with tab2:
         }
 
         try:
-            response = requests.post(
-                f"{API_URL}{DISCOUNT_PREDICT_ENDPOINT}", json=payload
-            )
+            response = api_request("POST", DISCOUNT_PREDICT_ENDPOINT, json=payload)
             response.raise_for_status()
             prediction_data = response.json()
             st.session_state.last_discount_prediction = prediction_data.get(
@@ -263,6 +404,9 @@ with tab2:
         except requests.exceptions.ConnectionError:
             st.session_state.discount_prediction_error = f"Error de conexión: Asegúrate de que la API de FastAPI se esté ejecutando en {API_URL}."
             st.session_state.last_discount_prediction = None
+        except requests.exceptions.Timeout:
+            st.session_state.discount_prediction_error = f"La API no respondió en {API_READ_TIMEOUT:.0f} segundos."
+            st.session_state.last_discount_prediction = None
         except requests.exceptions.HTTPError as e:
             error_details = response.json() if response else "No hay detalles"
             st.session_state.discount_prediction_error = (
@@ -286,13 +430,9 @@ with tab2:
 with tab3:
     st.title("📊 Predicción de precios de suplementos")
 
-    # --- Obtener lista de productos desde la API ---
+    # --- Obtener lista de productos desde la API (en caché METADATA_TTL segundos) ---
     try:
-        response = requests.get(f"{API_URL}/products")
-        if response.status_code == 200:
-            products = response.json().get("products", [])
-        else:
-            products = []
+        products = get_products()
     except Exception as e:
         st.error(f"⚠️ No se pudieron cargar los productos: {e}")
         products = []
@@ -312,8 +452,8 @@ with tab3:
     # --- Botón para predecir ---
     if st.button("🔮 Predecir precio"):
         try:
-            response = requests.get(
-                f"{API_URL}{PRICE_PREDICT_ENDPOINT}",
+            response = api_request(
+                "GET", PRICE_PREDICT_ENDPOINT,
                 params={
                     "product": product,
                     "year": int(year),